@@ -1,19 +1,296 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, render_template, request, redirect, url_for, jsonify, Response, stream_with_context, g
 import uuid
+import time
 from datetime import datetime
 import random
 import os
-from models.stylometry import StyleAnalyzer
-from models.sentiment import SentimentAnalyzer
-from models.gan_detector import GANDetector
-from models.cross_platform import CrossPlatformMatcher
-from models.reviewer_behavior import ReviewerAnalyzer
-from models.network_graph import NetworkGraphDetector
+import importlib
+import threading
+import atexit
+from itertools import islice
+from models import registry
+from models.cache import VerdictCache, CachedAnalyzer
+from jobs import AnalysisQueue, QueueFullError
+from storage import AnalysisStore, product_analysis_id, review_key
+from streaming import RatingAggregate, to_ndjson, to_sse
+from orchestrator import ModuleOrchestrator, score_in_chunks
+from models.preprocessing import as_documents
+import instrumentation
+from instrumentation import span, InstrumentedAnalyzer, SamplingProfiler
 
 app = Flask(__name__)
 
-# Mock database for storing analysis results
-analysis_db = {}
+# Warm shared models before the server forks its workers (e.g. gunicorn --preload)
+if os.environ.get('PRELOAD_MODELS'):
+    registry.preload()
+
+# Analyzer classes are imported on first use so the web app can serve pages
+# without loading sklearn, joblib and NumPy at startup
+ANALYZER_CLASSES = {
+    "stylometry": ("models.stylometry", "StyleAnalyzer"),
+    "sentiment": ("models.sentiment", "SentimentAnalyzer"),
+    "gan": ("models.gan_detector", "GANDetector"),
+    "cross_platform": ("models.cross_platform", "CrossPlatformMatcher"),
+    "reviewer_behavior": ("models.reviewer_behavior", "ReviewerAnalyzer"),
+    "network_graph": ("models.network_graph", "NetworkGraphDetector"),
+    "duplicates": ("models.dedup", "DuplicateClusterer"),
+}
+# Text analyzers whose verdicts depend only on the review text, rating and model
+CACHED_ANALYZERS = {"stylometry", "sentiment", "gan"}
+verdict_cache = VerdictCache(
+    max_entries=int(os.environ.get('VERDICT_CACHE_SIZE', 100000)),
+    disk_path=os.environ.get('VERDICT_CACHE_PATH'),
+)
+_analyzers = {}
+_analyzers_lock = threading.Lock()
+
+# Where the analyzers that learn from every analysis keep what they've learned
+ANALYZER_STATE_PATHS = {
+    "cross_platform": os.environ.get('CROSS_PLATFORM_INDEX_PATH', 'models/cross_platform_index'),
+    "reviewer_behavior": os.environ.get('REVIEWER_BEHAVIOR_PATH', 'models/reviewer_behavior.npz'),
+    "network_graph": os.environ.get('NETWORK_GRAPH_PATH', 'models/network_graph.npz'),
+}
+# Seconds between saves of that state; it's saved at exit too
+STATE_SAVE_INTERVAL = float(os.environ.get('STATE_SAVE_INTERVAL', 300))
+_state_saved_at = time.monotonic()
+_state_changed = False
+
+# Languages the text analyzers route reviews between, e.g. LANGUAGES="en,es,fr,de",
+# the first one assumed for reviews too short to identify; unset, every review
+# is scored as English without identifying its language
+LANGUAGES = [code.strip() for code in os.environ.get('LANGUAGES', '').split(',') if code.strip()]
+LANGUAGE_ANALYZERS = {"stylometry", "sentiment", "gan"}
+# Per-language analyzers kept loaded per process
+LANGUAGE_MODELS_MAX_MB = float(os.environ.get('LANGUAGE_MODELS_MAX_MB', 256))
+_language_identifier = None
+_language_models = None
+
+# Review page URLs to scrape, e.g. REVIEW_PAGE_URL="{product_url}/reviews?page={page}";
+# unset, analyses use the mock reviews
+REVIEW_PAGE_URL = os.environ.get('REVIEW_PAGE_URL')
+_scraper = None
+_stylometry_cascade = None
+
+# Reviews scored per module run while later pages are still being scraped
+SCORE_BATCH_SIZE = int(os.environ.get('SCORE_BATCH_SIZE', 1000))
+# Smaller batches for /analyze/stream, so the first verdicts arrive sooner
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 100))
+
+def get_analyzer(name):
+    # Import and construct an analyzer the first time it's needed
+    with _analyzers_lock:
+        if name not in _analyzers:
+            module_name, class_name = ANALYZER_CLASSES[name]
+            analyzer_class = getattr(importlib.import_module(module_name), class_name)
+            if LANGUAGES and name in LANGUAGE_ANALYZERS:
+                analyzer = make_language_router(analyzer_class, name)
+            elif name in ANALYZER_STATE_PATHS:
+                analyzer = analyzer_class(ANALYZER_STATE_PATHS[name])
+            else:
+                analyzer = analyzer_class()
+            # Inside the cache, so the metrics count reviews actually scored
+            analyzer = InstrumentedAnalyzer(analyzer, name)
+            if name in CACHED_ANALYZERS:
+                analyzer = CachedAnalyzer(analyzer, verdict_cache, name)
+            _analyzers[name] = analyzer
+        return _analyzers[name]
+
+def make_language_router(analyzer_class, name):
+    # Called with _analyzers_lock held; the routers share one identifier and one
+    # memory-capped set of per-language analyzers
+    global _language_identifier, _language_models
+    from models.language import LanguageIdentifier, LanguageModels, LanguageRouter
+    if _language_identifier is None:
+        _language_identifier = LanguageIdentifier(languages=LANGUAGES, default=LANGUAGES[0])
+        _language_models = LanguageModels(int(LANGUAGE_MODELS_MAX_MB * 2 ** 20))
+    return LanguageRouter(analyzer_class, name, _language_identifier, _language_models,
+                          analyzer_class().model_path)
+
+def get_scraper():
+    # One scraper per process, so its pooled connections are shared by all analyses
+    global _scraper
+    with _analyzers_lock:
+        if _scraper is None:
+            from scraper import ReviewScraper, JsonReviewPages, PageCache
+            _scraper = ReviewScraper(
+                pages=JsonReviewPages(REVIEW_PAGE_URL),
+                cache=PageCache(os.environ.get('SCRAPE_CACHE_PATH', 'data/pages.sqlite3')),
+                concurrency=int(os.environ.get('SCRAPE_CONCURRENCY', 16)),
+                connections_per_host=int(os.environ.get('SCRAPE_CONNECTIONS_PER_HOST', 8)),
+                rate=float(os.environ.get('SCRAPE_RATE', 20)),
+                retries=int(os.environ.get('SCRAPE_RETRIES', 4)),
+            )
+        return _scraper
+
+def get_stylometry_cascade():
+    # Cheap heuristics first, the stylometry model only for ambiguous reviews;
+    # run_modules feeds it the sentiment and GAN modules' results
+    global _stylometry_cascade
+    analyzers = [get_analyzer("stylometry"), get_analyzer("sentiment"), get_analyzer("gan")]
+    with _analyzers_lock:
+        if _stylometry_cascade is None:
+            from models.cascade import CascadeScorer
+            _stylometry_cascade = CascadeScorer(*analyzers, *STYLOMETRY_CASCADE)
+        return _stylometry_cascade
+
+def warm_analyzers():
+    # Import every analyzer module ahead of the first analysis
+    for name in ANALYZER_CLASSES:
+        try:
+            get_analyzer(name)
+        except Exception as e:
+            print(f"Error loading analyzer {name}: {e}")
+
+def start_background_warmup():
+    threading.Thread(target=warm_analyzers, name="analyzer-warmup", daemon=True).start()
+
+# Persistent analysis results, shared by all worker processes
+analysis_store = AnalysisStore(
+    os.environ.get('ANALYSIS_DB_PATH', 'data/analyses.sqlite3'),
+    ttl=int(os.environ.get('ANALYSIS_TTL', 7 * 24 * 3600)),
+    max_entries=int(os.environ.get('ANALYSIS_MAX_ENTRIES', 100000)),
+)
+
+# Detection modules reported in job progress
+MODULE_NAMES = [
+    "Language Stylometry",
+    "Sentiment & Emotion Analysis",
+    "GAN-Based Text Detection",
+    "Cross-Platform Review Matching",
+    "Reviewer Behavior Analysis",
+    "Network Graph Detection",
+]
+
+# Result field holding each module's per-review score
+MODULE_SCORE_KEYS = {
+    "Language Stylometry": "fake_score",
+    "Sentiment & Emotion Analysis": "fake_score",
+    "GAN-Based Text Detection": "ai_score",
+    "Cross-Platform Review Matching": "match_score",
+    "Reviewer Behavior Analysis": "fake_score",
+    "Network Graph Detection": "fake_score",
+}
+
+# Result field holding each module's per-review verdict
+MODULE_FLAG_KEYS = {
+    "Language Stylometry": "is_fake",
+    "Sentiment & Emotion Analysis": "is_fake",
+    "GAN-Based Text Detection": "is_ai_generated",
+    "Cross-Platform Review Matching": "is_duplicate",
+    "Reviewer Behavior Analysis": "is_fake",
+    "Network Graph Detection": "is_fake",
+}
+
+# Modules that must flag a scraped review for it to be reported as fake
+FAKE_MIN_FLAGS = int(os.environ.get('FAKE_MIN_FLAGS', 1))
+
+# Seconds each module may take per analysis, e.g. MODULE_BUDGETS="Language Stylometry=2.5"
+MODULE_BUDGETS = {
+    name.strip(): float(budget)
+    for name, _, budget in (item.partition('=') for item in os.environ.get('MODULE_BUDGETS', '').split(','))
+    if budget
+}
+
+def parse_cascade_thresholds(value):
+    # "LOW,HIGH" as for bulk_score.py --cascade, or None when unset
+    if not value:
+        return None
+    try:
+        low, high = (float(threshold) for threshold in value.split(','))
+    except ValueError:
+        raise ValueError(f"STYLOMETRY_CASCADE: expected LOW,HIGH, got {value!r}")
+    if low >= high:
+        raise ValueError(f"STYLOMETRY_CASCADE: LOW must be below HIGH, got {value!r}")
+    return low, high
+
+# Cheap-tier exit thresholds for stylometry, e.g. STYLOMETRY_CASCADE="0.2,0.8";
+# unset, the stylometry model scores every review
+STYLOMETRY_CASCADE = parse_cascade_thresholds(os.environ.get('STYLOMETRY_CASCADE'))
+
+# ReviewerAnalyzer updates its aggregates while scoring
+_reviewer_lock = threading.Lock()
+# CrossPlatformMatcher indexes each review it scores
+_cross_platform_lock = threading.Lock()
+# NetworkGraphDetector adds each product's reviewers to its graph
+_network_graph_lock = threading.Lock()
+# Analyzers with learned state: the lock guarding it and the method saving it
+STATEFUL_ANALYZERS = {
+    "cross_platform": (_cross_platform_lock, "save_index"),
+    "reviewer_behavior": (_reviewer_lock, "save_model"),
+    "network_graph": (_network_graph_lock, "save_model"),
+}
+
+# Share of requests and analysis jobs run under the sampling profiler, whose
+# folded stacks are written to PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'data/profiles')
+
+REQUEST_SECONDS = instrumentation.registry.histogram(
+    "deceptiscan_request_seconds", "Time to handle each request", ["endpoint"])
+MODULE_SECONDS = instrumentation.registry.histogram(
+    "deceptiscan_module_seconds", "Wall time of each detection module per analysis", ["module"])
+MODULE_QUEUE_SECONDS = instrumentation.registry.histogram(
+    "deceptiscan_module_queue_seconds", "Time each detection module waited for a worker", ["module"])
+MODULE_RUNS = instrumentation.registry.counter(
+    "deceptiscan_module_runs", "Detection module runs by outcome", ["module", "state"])
+
+def collect_cache_metrics():
+    stats = verdict_cache.stats()
+    return [
+        ("deceptiscan_verdict_cache_hits", "counter", "Verdicts served from the cache",
+         [("deceptiscan_verdict_cache_hits_total", (("tier", "memory"),), stats["hits"] - stats["disk_hits"]),
+          ("deceptiscan_verdict_cache_hits_total", (("tier", "disk"),), stats["disk_hits"])]),
+        ("deceptiscan_verdict_cache_misses", "counter", "Verdicts not found in the cache",
+         [("deceptiscan_verdict_cache_misses_total", (), stats["misses"])]),
+        ("deceptiscan_verdict_cache_entries", "gauge", "Verdicts held in memory",
+         [("deceptiscan_verdict_cache_entries", (), stats["memory_entries"])]),
+    ]
+
+instrumentation.registry.add_collector(collect_cache_metrics)
+
+def collect_language_metrics():
+    if _language_models is None:
+        return []
+    stats = _language_models.stats()
+    return [
+        ("deceptiscan_language_models_loads", "counter", "Per-language analyzers loaded",
+         [("deceptiscan_language_models_loads_total", (), stats["loads"])]),
+        ("deceptiscan_language_models_evictions", "counter", "Per-language analyzers evicted to stay within the memory cap",
+         [("deceptiscan_language_models_evictions_total", (), stats["evictions"])]),
+        ("deceptiscan_language_models_bytes", "gauge", "Size of the per-language analyzers kept loaded",
+         [("deceptiscan_language_models_bytes", (), stats["bytes"])]),
+    ]
+
+instrumentation.registry.add_collector(collect_language_metrics)
+
+def start_profiler(thread_prefix=None):
+    # Profile a sampled share of requests and jobs on the calling thread
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return SamplingProfiler(thread_prefix=thread_prefix).start()
+    return None
+
+def save_profile(profiler, name):
+    profiler.stop()
+    if not profiler.stacks:
+        return
+    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{name}-{uuid.uuid4().hex[:6]}.folded")
+    try:
+        profiler.save(path)
+    except OSError as e:
+        print(f"Error saving profile: {e}")
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profiler = start_profiler()
+
+@app.teardown_request
+def finish_request_timer(exc=None):
+    endpoint = request.endpoint or "unknown"
+    if instrumentation.registry.enabled and "request_start" in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    if g.get("profiler") is not None:
+        save_profile(g.profiler, endpoint)
 
 @app.route('/')
 def index():
@@ -22,46 +299,362 @@ def index():
 @app.route('/analyze', methods=['POST'])
 def analyze():
     if request.method == 'POST':
-        product_url = request.form.get('product_url')
-        
-        # In a real application, we would scrape the product page and reviews here
-        # For demo purposes, we'll use our mock data and analysis
+        product_url = (request.form.get('product_url') or '').strip()
+        if not product_url:
+            return "Please enter a product URL.", 400
         
-        # Generate unique ID for this analysis
-        analysis_id = uuid.uuid4().hex[:8]
-        
-        # Perform analysis using our ML models
-        result = perform_analysis(product_url, analysis_id)
-        
-        # Store result in our mock database
-        analysis_db[analysis_id] = result
+        # Queue the analysis under the product's id; workers store the result
+        # when it completes, and a rescan only adds the reviews not seen before
+        try:
+            analysis_id = analysis_queue.submit(product_url, product_analysis_id(product_url))
+        except QueueFullError:
+            return "Too many analyses in progress, please try again shortly.", 503, {'Retry-After': '5'}
         
         # Redirect to the analysis results page
         return redirect(url_for('analysis_results', id=analysis_id))
 
 @app.route('/analysis/<id>')
 def analysis_results(id):
-    # Get analysis from our mock database
-    analysis = analysis_db.get(id)
+    # Get analysis from the result store
+    with span("load"):
+        analysis = analysis_store.get(id)
+    
+    # Show a pending page while the analysis is still running
+    if not analysis:
+        status = analysis_queue.status(id)
+        if status is not None:
+            return render_template('pending.html', status=status)
     
     # If no analysis found, we could redirect to home or show an error
     if not analysis:
         # For demo, we'll generate mock data on the fly
         analysis = generate_mock_analysis(id)
-        analysis_db[id] = analysis
+        analysis_store.put(analysis)
+    
+    with span("render"):
+        return render_template('analysis.html', analysis=analysis)
+
+@app.route('/analysis/<id>/status')
+def analysis_status(id):
+    status = analysis_queue.status(id)
+    if status is None:
+        if id not in analysis_store:
+            return jsonify({"id": id, "state": "unknown"}), 404
+        status = {"id": id, "state": "done", "modules": {name: "done" for name in MODULE_NAMES}}
+    return jsonify(status)
+
+def run_analysis_job(product_url, analysis_id, progress):
+    # Runs on an analysis worker thread; its profile includes the module threads
+    profiler = start_profiler(thread_prefix="module")
+    try:
+        with span("load"):
+            previous = analysis_store.get(analysis_id)
+        analysis = perform_analysis(product_url, analysis_id, progress, previous)
+        with span("store"):
+            if previous is None:
+                analysis_store.put(analysis)
+            else:
+                analysis_store.append(analysis, rebase=rebase_rescan)
+    finally:
+        if profiler is not None:
+            save_profile(profiler, "analysis")
+
+def rebase_rescan(stored, summary, reviews):
+    # Fold a rescan's new reviews into the analysis as stored when it is
+    # written rather than as read before the rescan, so concurrent rescans
+    # of a product keep each other's counts. Reviews another rescan stored
+    # in the meantime are left out.
+    totals = RatingAggregate(**stored["rating_totals"])
+    for review in reviews:
+        totals.add(review)
+    
+    new_ids = {review["id"] for review in reviews}
+    stored_modules = {module["name"]: module for module in stored["modules"]}
+    modules = []
+    for module in summary["modules"]:
+        flagged = list(stored_modules.get(module["name"], {}).get("flagged_reviews", []))
+        already = set(flagged)
+        flagged += [review_id for review_id in module["flagged_reviews"]
+                    if review_id in new_ids and review_id not in already]
+        modules.append(dict(module, flagged_reviews=flagged))
     
-    return render_template('analysis.html', analysis=analysis)
+    # Clusters holding this rescan's reviews, over the stored ones
+    clusters = merge_clusters(stored.get("duplicate_clusters", []), summary["duplicate_clusters"], new_ids)
+    
+    return dict(summary, **totals.summary(), rating_totals=totals.state(), modules=modules,
+                duplicate_clusters=clusters)
 
-def perform_analysis(product_url, analysis_id):
+def perform_analysis(product_url, analysis_id, progress=None, previous=None):
     # In a real application, this function would:
     # 1. Scrape the product reviews from the URL
     # 2. Run the reviews through our ML models
     # 3. Aggregate results and calculate scores
+    #
+    # Given the previous analysis of the product, only reviews it doesn't
+    # contain are scored, and the returned analysis holds just those reviews
+    # on top of the updated totals
+    #
+    # Reviews are scored in batches as they are scraped, each batch folded
+    # into the analysis the way a rescan folds new reviews into a previous
+    # one; module budgets apply per batch
+    analysis = previous
+    reviews = []
+    module_totals = {}
+    for batch in iter_review_batches(product_url, SCORE_BATCH_SIZE):
+        if previous is not None:
+            with span("unseen_filter"):
+                batch = analysis_store.unseen_reviews(analysis_id, batch)
+        if not batch:
+            continue
+        
+        with span("modules"):
+            module_runs = run_modules(product_url, batch, progress)
+        with span("build"):
+            analysis = build_analysis(analysis_id, product_url, batch, analysis, module_runs,
+                                      mock_flags=not REVIEW_PAGE_URL)
+        reviews.extend(batch)
+        merge_module_runs(module_totals, module_runs)
+    
+    if not reviews:
+        with span("modules"):
+            module_runs = run_modules(product_url, [], progress)
+        analysis = build_analysis(analysis_id, product_url, [], previous, module_runs,
+                                  mock_flags=not REVIEW_PAGE_URL)
+    else:
+        analysis["reviews"] = reviews
+        for module in analysis["modules"]:
+            module.update(module_totals.get(module["name"], {}))
     
-    # For now, we'll generate mock data
-    return generate_mock_analysis(analysis_id, product_url)
+    with span("duplicates"):
+        add_duplicate_clusters(analysis, previous["reviews"] if previous is not None and reviews else ())
+    save_analyzer_state()
+    
+    return analysis
 
-def generate_mock_analysis(analysis_id, product_url="https://www.example.com/product/123"):
+def save_analyzer_state(force=False):
+    # Write what the loaded analyzers learned since the last save, at most
+    # every STATE_SAVE_INTERVAL seconds unless forced
+    global _state_saved_at, _state_changed
+    if not _state_changed:
+        return
+    if not force and time.monotonic() - _state_saved_at < STATE_SAVE_INTERVAL:
+        return
+    _state_saved_at = time.monotonic()
+    _state_changed = False
+    for name, (lock, save) in STATEFUL_ANALYZERS.items():
+        analyzer = _analyzers.get(name)
+        if analyzer is None:
+            continue
+        try:
+            with lock:
+                getattr(analyzer, save)()
+        except Exception as e:
+            print(f"Error saving {name} state: {e}")
+
+atexit.register(save_analyzer_state, force=True)
+
+def iter_review_batches(product_url, batch_size):
+    # Group the scraped reviews into batches, timing the wait for each
+    reviews = iter_product_reviews(product_url)
+    while True:
+        with span("scrape"):
+            batch = list(islice(reviews, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def merge_module_runs(totals, module_runs):
+    # Sum a batch's module runs into per-module totals; the worst state wins
+    states = ["complete", "partial", "failed"]
+    for name, run in module_runs.items():
+        total = totals.setdefault(name, {"state": "complete", "scored": 0, "wall_time": 0.0, "queue_time": 0.0})
+        total["state"] = max(total["state"], run["state"], key=states.index)
+        total["scored"] += run["scored"]
+        total["wall_time"] += run["wall_time"]
+        total["queue_time"] += run["queue_time"]
+
+def run_modules(product_url, reviews, progress=None):
+    # Score a product's reviews with every detection module concurrently, each
+    # within its time budget; a module that runs out of time is reported as partial
+    docs = as_documents(review["text"] for review in reviews)
+    ratings = [review.get("rating") for review in reviews]
+    platforms = [review.get("platform") for review in reviews]
+    ids = [review_key(review) for review in reviews]
+    
+    def stylometry(deadline):
+        return score_in_chunks(get_analyzer("stylometry").analyze_reviews, [docs], deadline)
+    
+    def stylometry_cascade(deadline, sentiment_results, gan_results):
+        # Runs after the sentiment and GAN modules and reuses their results;
+        # reviews either of them didn't get to are scored by the cheap tier itself
+        def score(docs, ratings, sentiment_results, gan_results):
+            if None in sentiment_results or None in gan_results:
+                sentiment_results = gan_results = None
+            return get_stylometry_cascade().analyze_reviews(docs, ratings, sentiment_results, gan_results)
+        
+        columns = [docs, ratings]
+        for results in (sentiment_results, gan_results):
+            results = results or []
+            columns.append(results + [None] * (len(docs) - len(results)))
+        return score_in_chunks(score, columns, deadline)
+    
+    def sentiment(deadline):
+        return score_in_chunks(get_analyzer("sentiment").analyze_reviews, [docs, ratings], deadline)
+    
+    def gan(deadline):
+        return score_in_chunks(get_analyzer("gan").analyze_reviews, [docs], deadline)
+    
+    def cross_platform(deadline):
+        # Each review is indexed once it's scored, so later analyses match against it
+        global _state_changed
+        analyzer = get_analyzer("cross_platform")
+        def score(docs, platforms, ids):
+            return analyzer.analyze_reviews(docs, platforms, ids, update=True)
+        with _cross_platform_lock:
+            _state_changed = True
+            return score_in_chunks(score, [docs, platforms, ids], deadline)
+    
+    def reviewer_behavior(deadline):
+        global _state_changed
+        analyzer = get_analyzer("reviewer_behavior")
+        with _reviewer_lock:
+            _state_changed = True
+            return score_in_chunks(analyzer.analyze_reviews, [reviews], deadline)
+    
+    def network_graph(deadline):
+        # Groups span the product's reviews so far, so the batch is added and
+        # scored in one go rather than in chunks
+        global _state_changed
+        if deadline.expired():
+            return []
+        analyzer = get_analyzer("network_graph")
+        with _network_graph_lock:
+            _state_changed = True
+            return analyzer.analyze_reviews(reviews, product_url)
+    
+    modules = dict(zip(MODULE_NAMES, [stylometry, sentiment, gan, cross_platform, reviewer_behavior, network_graph]))
+    after = {}
+    if STYLOMETRY_CASCADE:
+        modules["Language Stylometry"] = stylometry_cascade
+        after["Language Stylometry"] = ["Sentiment & Emotion Analysis", "GAN-Based Text Detection"]
+    module_runs = module_orchestrator.run(modules, len(reviews), MODULE_BUDGETS, progress, after)
+    
+    if instrumentation.registry.enabled:
+        for name, run in module_runs.items():
+            MODULE_SECONDS.observe(run["wall_time"], module=name)
+            MODULE_QUEUE_SECONDS.observe(run["queue_time"], module=name)
+            MODULE_RUNS.inc(module=name, state=run["state"])
+    return module_runs
+
+def add_duplicate_clusters(analysis, stored_reviews=()):
+    # Cluster the new reviews with each other and with the reviews stored by
+    # earlier scans of the product, adding the copy reasons to the new
+    # reviews already judged fake
+    reviews = analysis["reviews"]
+    if not reviews:
+        return
+    clusterer = get_analyzer("duplicates")
+    clusters = clusterer.find_clusters(list(stored_reviews) + reviews)
+    results = clusterer.analyze_reviews(reviews, clusters)
+    
+    for review, result in zip(reviews, results):
+        if not review.get("is_fake"):
+            continue
+        for reason in result["reasons"]:
+            if reason not in review["fake_reasons"]:
+                review["fake_reasons"].append(reason)
+    
+    analysis["duplicate_clusters"] = merge_clusters(analysis.get("duplicate_clusters", []), clusters,
+                                                    {review["id"] for review in reviews})
+
+def merge_clusters(previous_clusters, clusters, new_ids):
+    # Clusters holding a new review replace the earlier ones they grew out of;
+    # the others are kept, all numbered in order
+    clusters = [cluster for cluster in clusters
+                if any(member["id"] in new_ids for member in cluster["members"])]
+    grown = {member["id"] for cluster in clusters for member in cluster["members"]}
+    kept = [cluster for cluster in previous_clusters
+            if not any(member["id"] in grown for member in cluster["members"])]
+    return [dict(cluster, cluster_id=cluster_id) for cluster_id, cluster in enumerate(kept + clusters)]
+
+@app.route('/metrics')
+def metrics():
+    return Response(instrumentation.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(verdict_cache.stats())
+
+@app.route('/analyze/stream')
+def analyze_stream():
+    # Stream verdicts as NDJSON, or as Server-Sent Events with ?format=sse
+    product_url = request.args.get('url', "https://www.example.com/product/123")
+    use_sse = (request.args.get('format') == 'sse'
+               or request.accept_mimetypes.best == 'text/event-stream')
+    encode = to_sse if use_sse else to_ndjson
+    
+    records = stream_analysis(product_url, uuid.uuid4().hex[:8])
+    return Response(
+        stream_with_context(encode(record) for record in records),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+def stream_analysis(product_url, analysis_id):
+    # Score the reviews in batches as they are scraped, yielding a record per
+    # review with its verdict, then a record per module with its running
+    # totals, after every batch; the rating summary comes last. Only running
+    # totals are kept, never the review list.
+    mock_flags = not REVIEW_PAGE_URL
+    module_totals = {}
+    score_sums = {name: 0.0 for name in MODULE_NAMES}
+    flagged_counts = {name: 0 for name in MODULE_NAMES}
+    totals = RatingAggregate()
+    
+    for batch in iter_review_batches(product_url, STREAM_BATCH_SIZE):
+        module_runs = run_modules(product_url, batch)
+        add_module_scores(batch, module_runs)
+        flagged_by = module_flags(batch, module_runs, mock_flags)
+        merge_module_runs(module_totals, module_runs)
+        
+        for review, module_names in zip(batch, flagged_by):
+            totals.add(review)
+            for name in module_names:
+                flagged_counts[name] += 1
+            yield dict(review, type="review", flagged_by=module_names)
+        
+        for name in MODULE_NAMES:
+            run = module_runs[name]
+            score_sums[name] += sum(result[MODULE_SCORE_KEYS[name]] for result in run["results"])
+            total = module_totals[name]
+            yield {
+                "type": "module",
+                "name": name,
+                # Mean per-review score as a percentage, over the reviews scored so far
+                "score": round(100 * score_sums[name] / total["scored"]) if total["scored"] else None,
+                "flagged": flagged_counts[name],
+                "state": total["state"],
+                "scored": total["scored"],
+            }
+    save_analyzer_state()
+    
+    yield dict(
+        totals.summary(),
+        type="summary",
+        id=analysis_id,
+        url=product_url,
+        analysis_date=datetime.now().isoformat(),
+    )
+
+def iter_product_reviews(product_url):
+    # Stream the product's reviews as their pages are scraped, or the mock
+    # reviews when no review source is configured
+    if REVIEW_PAGE_URL:
+        yield from get_scraper().iter_reviews(product_url)
+    else:
+        yield from get_mock_reviews()
+
+def get_mock_reviews():
     # Create mock review data
     mock_reviews = [
         {
@@ -154,6 +747,9 @@ def generate_mock_analysis(analysis_id, product_url="https://www.example.com/pro
         },
     ]
     
+    return mock_reviews
+
+def get_mock_modules():
     # Create mock module data
     mock_modules = [
         {
@@ -211,39 +807,142 @@ def generate_mock_analysis(analysis_id, product_url="https://www.example.com/pro
                 "Unusual reviewing frequency detected in flagged accounts",
             ],
         },
+        {
+            "name": "Network Graph Detection",
+            "description": "Uncovers coordinated fake review networks",
+            "score": 58,
+            "flagged_reviews": ["r2", "r6", "r8"],
+            "insights": [
+                "3 reviewers form a group that reviews the same products",
+                "The group's reviews arrived in the same bursts on other products",
+                "Group members rarely review products outside the group",
+            ],
+        },
     ]
     
-    # Calculate metrics
-    fake_reviews = [r for r in mock_reviews if r["is_fake"]]
-    genuine_reviews = [r for r in mock_reviews if not r["is_fake"]]
+    return mock_modules
+
+def get_mock_module_flags():
+    # Map each review id to the names of the modules that flagged it
+    flagged_by = {}
+    for module in get_mock_modules():
+        for review_id in module["flagged_reviews"]:
+            flagged_by.setdefault(review_id, []).append(module["name"])
+    return flagged_by
+
+def add_module_scores(reviews, module_runs):
+    # Record each module's score on the reviews it scored
+    for name, run in module_runs.items():
+        for review, result in zip(reviews, run["results"]):
+            review.setdefault("module_scores", {})[name] = result[MODULE_SCORE_KEYS[name]]
+            # Set by the text modules when reviews are routed by language
+            if "language" in result:
+                review["language"] = result["language"]
+
+def module_flags(reviews, module_runs, mock_flags):
+    # Names of the modules flagging each review: the mock flags for the mock
+    # reviews, otherwise from the module runs, which also set the verdicts
+    if mock_flags:
+        mock_flagged_by = get_mock_module_flags()
+        return [mock_flagged_by.get(review["id"], []) for review in reviews]
+    return apply_module_verdicts(reviews, module_runs)
+
+def apply_module_verdicts(reviews, module_runs):
+    # Set each review's verdict from the modules that scored it: its highest
+    # module score, fake once FAKE_MIN_FLAGS modules flag it, with the reasons
+    # of those modules. Returns the names of the modules flagging each review.
+    flagged_by = [[] for _ in reviews]
+    scores = [[] for _ in reviews]
+    reasons = [[] for _ in reviews]
+    for name, run in module_runs.items():
+        for i, result in enumerate(run["results"]):
+            scores[i].append(result[MODULE_SCORE_KEYS[name]])
+            if result[MODULE_FLAG_KEYS[name]]:
+                flagged_by[i].append(name)
+                for reason in result["reasons"]:
+                    if reason not in reasons[i]:
+                        reasons[i].append(reason)
     
-    # Calculate ratings
-    all_ratings = [r["rating"] for r in mock_reviews]
-    genuine_ratings = [r["rating"] for r in genuine_reviews]
+    for review, module_names, review_scores, review_reasons in zip(reviews, flagged_by, scores, reasons):
+        # Left as scraped when every module ran out of time before it
+        if not review_scores:
+            continue
+        review["is_fake"] = len(module_names) >= FAKE_MIN_FLAGS
+        review["fake_score"] = float(max(review_scores))
+        review["fake_reasons"] = review_reasons if review["is_fake"] else []
+    return flagged_by
+
+def generate_mock_analysis(analysis_id, product_url="https://www.example.com/product/123"):
+    return build_analysis(analysis_id, product_url, get_mock_reviews())
+
+def build_analysis(analysis_id, product_url, reviews, previous=None, module_runs=None, mock_flags=True):
+    # Fold scored reviews into the running sums and module flags of the
+    # previous analysis of the product, so the cost follows the new reviews.
+    # Module runs add each module's scores, state and timings. The mock
+    # reviews keep their mock verdicts; with mock_flags off, each review's
+    # verdict and module flags come from the module runs instead.
+    if previous is None:
+        totals = RatingAggregate()
+        modules = [dict(module, flagged_reviews=[]) for module in get_mock_modules()]
+    else:
+        totals = RatingAggregate(**previous["rating_totals"])
+        modules = [dict(module, flagged_reviews=list(module["flagged_reviews"])) for module in previous["modules"]]
+        # Modules added since the previous analysis start from nothing
+        names = {module["name"] for module in modules}
+        modules += [dict(module, flagged_reviews=[]) for module in get_mock_modules() if module["name"] not in names]
+    modules_by_name = {module["name"]: module for module in modules}
     
-    original_rating = sum(all_ratings) / len(all_ratings) if all_ratings else 0
-    real_rating = sum(genuine_ratings) / len(genuine_ratings) if genuine_ratings else 0
+    for name, run in (module_runs or {}).items():
+        modules_by_name[name].update({
+            "state": run["state"],
+            "scored": run["scored"],
+            "wall_time": run["wall_time"],
+            "queue_time": run["queue_time"],
+        })
+    add_module_scores(reviews, module_runs or {})
     
-    fake_percentage = (len(fake_reviews) / len(mock_reviews)) * 100 if mock_reviews else 0
+    # Calculate metrics
+    flagged_by = module_flags(reviews, module_runs or {}, mock_flags)
+    for review, module_names in zip(reviews, flagged_by):
+        totals.add(review)
+        for name in module_names:
+            modules_by_name[name]["flagged_reviews"].append(review["id"])
     
     # Create the analysis result
     analysis = {
         "id": analysis_id,
         "url": product_url,
-        "product_name": "Smart Home Assistant Pro",
-        "original_rating": round(original_rating, 1),
-        "real_rating": round(real_rating, 1),
-        "total_reviews": len(mock_reviews),
-        "fake_reviews": len(fake_reviews),
-        "fake_percentage": fake_percentage,
-        "reviews": mock_reviews,
-        "modules": mock_modules,
+        "product_name": previous["product_name"] if previous else "Smart Home Assistant Pro",
+        **totals.summary(),
+        "rating_totals": totals.state(),
+        "reviews": reviews,
+        "modules": modules,
+        "duplicate_clusters": previous.get("duplicate_clusters", []) if previous else [],
         "analysis_date": datetime.now().isoformat(),
     }
     
     return analysis
 
+# Threads running the detection modules of every analysis
+module_orchestrator = ModuleOrchestrator(
+    max_workers=int(os.environ.get('MODULE_WORKERS', 8)),
+    default_budget=float(os.environ.get('MODULE_BUDGET', 10)),
+)
+
+# Background workers for /analyze
+analysis_queue = AnalysisQueue(
+    run_analysis_job,
+    max_workers=int(os.environ.get('ANALYSIS_WORKERS', 4)),
+    max_pending=int(os.environ.get('ANALYSIS_MAX_PENDING', 64)),
+)
+
+# Load analyzers in the background once the app is importable
+if os.environ.get('WARM_ANALYZERS'):
+    start_background_warmup()
+
 if __name__ == '__main__':
     # Create model directories if they don't exist
     os.makedirs('models', exist_ok=True)
+    if not os.environ.get('WARM_ANALYZERS'):
+        start_background_warmup()
     app.run(debug=True)
@@ -0,0 +1,367 @@
+"""
+Reproducible performance benchmarks.
+
+Generates a seeded synthetic corpus (see corpus.py) and measures, for every
+analyzer on its own, for the full perform_analysis path and for the
+/analyze -> /analysis/<id> round trip through the Flask app:
+
+- throughput in reviews per second
+- p50/p95/p99 latency per call (one product's reviews per call)
+- peak traced memory, from a separate pass under tracemalloc so the timings
+  aren't slowed by it
+
+Each benchmark runs an untimed warm-up pass and then --repeat timed passes,
+each on fresh inputs and a fresh analyzer; the reported timings are the
+medians over the timed passes. String hashing is seeded (PYTHONHASHSEED=0
+unless set), as set and dict order changes how much work some analyzers do.
+
+Results are written as JSON. Given --baseline, the results are compared with
+a saved run and the exit status is 1 if any metric regressed by more than
+--tolerance.
+
+Usage:
+    python benchmark.py [--products N] [--reviews-per-product N] [--seed N] [--repeat N] [--output results.json]
+    python benchmark.py --baseline baseline.json [--tolerance 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = ["analyzers", "perform_analysis", "round_trip"]
+
+# Metrics compared against a baseline, and whether higher values are better
+METRICS = {
+    "throughput": True,
+    "latency_p50_ms": False,
+    "latency_p95_ms": False,
+    "latency_p99_ms": False,
+    "peak_memory_mb": False,
+}
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+def time_calls(calls):
+    """Run calls in order, returning the total seconds and per-call latencies"""
+    latencies = []
+    start = time.perf_counter()
+    for call in calls:
+        call_start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - call_start)
+    return time.perf_counter() - start, latencies
+
+def measure(make_calls, reviews, memory=True, reset=None, repeat=1):
+    """
+    Time a list of calls over several passes, then optionally run them again to trace peak memory
+
+    An untimed warm-up pass comes first. Throughput and each latency
+    percentile are the medians over the timed passes.
+
+    Args:
+        make_calls (callable): Returns the zero-argument calls of one pass;
+            called once per pass so each pass gets fresh inputs
+        reviews (int): Reviews processed by one pass
+        memory (bool): Whether to run the memory pass
+        reset (callable, optional): Called before each pass, e.g. to clear caches
+        repeat (int): Timed passes
+
+    Returns:
+        dict: Benchmark result
+    """
+    passes = []
+    for i in range(repeat + 1):
+        if reset:
+            reset()
+        calls = make_calls()
+        elapsed, latencies = time_calls(calls)
+        if i:
+            passes.append((elapsed, latencies))
+
+    def median_latency(q):
+        if not calls:
+            return None
+        return statistics.median(percentile(latencies, q) for _, latencies in passes) * 1000
+
+    seconds = statistics.median(elapsed for elapsed, _ in passes)
+    result = {
+        "calls": len(calls),
+        "reviews": reviews,
+        "passes": repeat,
+        "seconds": seconds,
+        "throughput": statistics.median(reviews / elapsed for elapsed, _ in passes) if seconds else None,
+        "latency_p50_ms": median_latency(50),
+        "latency_p95_ms": median_latency(95),
+        "latency_p99_ms": median_latency(99),
+        "peak_memory_mb": None,
+    }
+
+    if memory:
+        if reset:
+            reset()
+        calls = make_calls()
+        tracemalloc.start()
+        try:
+            for call in calls:
+                call()
+            result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result
+
+def analyzer_calls(app):
+    """How each analyzer is called on one product's reviews, as run_modules does"""
+    from models.preprocessing import as_documents
+
+    def texts(reviews):
+        return as_documents(review["text"] for review in reviews)
+
+    return {
+        "stylometry": lambda analyzer, url, reviews: analyzer.analyze_reviews(texts(reviews)),
+        "sentiment": lambda analyzer, url, reviews: analyzer.analyze_reviews(
+            texts(reviews), [review["rating"] for review in reviews]),
+        "gan": lambda analyzer, url, reviews: analyzer.analyze_reviews(texts(reviews)),
+        "cross_platform": lambda analyzer, url, reviews: analyzer.analyze_reviews(texts(reviews)),
+        "reviewer_behavior": lambda analyzer, url, reviews: analyzer.analyze_reviews(reviews),
+        "network_graph": lambda analyzer, url, reviews: analyzer.analyze_reviews(reviews, url),
+        "duplicates": lambda analyzer, url, reviews: analyzer.analyze_reviews(
+            reviews, analyzer.find_clusters(reviews)),
+    }
+
+def run_benchmarks(app, products, selected, source, memory=True, repeat=1):
+    """
+    Run the selected benchmarks over the products
+
+    Args:
+        app (module): The imported app module
+        products (list): (product number, reviews) pairs from SyntheticCorpus
+        selected (list): Names from BENCHMARKS
+        source (dict): Filled with product URL to reviews, for the app to fetch
+        memory (bool): Whether to measure peak memory
+        repeat (int): Timed passes per benchmark
+
+    Returns:
+        dict: Benchmark name to result
+    """
+    import importlib
+
+    total = sum(len(reviews) for _, reviews in products)
+    run_id = uuid.uuid4().hex[:8]
+
+    def fresh(prefix):
+        # New URLs and review dicts per pass: analyses mutate their reviews,
+        # and a URL seen before would only be rescanned incrementally
+        prefix = f"{prefix}-{uuid.uuid4().hex[:6]}"
+        batch = []
+        for number, reviews in products:
+            url = f"https://bench.example.com/{run_id}/{prefix}/product/{number}"
+            source[url] = reviews
+            batch.append((url, [dict(review) for review in reviews]))
+        return batch
+
+    results = {}
+    if "analyzers" in selected:
+        for name, call in analyzer_calls(app).items():
+            module_name, class_name = app.ANALYZER_CLASSES[name]
+            analyzer_class = getattr(importlib.import_module(module_name), class_name)
+
+            def make_calls(name=name, call=call, analyzer_class=analyzer_class):
+                # A fresh analyzer per pass, as the graph and reviewer analyzers
+                # keep what they have seen
+                analyzer = analyzer_class()
+                call(analyzer, "https://bench.example.com/warmup", [dict(r) for r in products[0][1]])
+                return [lambda url=url, reviews=reviews: call(analyzer, url, reviews)
+                        for url, reviews in fresh(name)]
+
+            results[f"analyzer/{name}"] = measure(make_calls, total, memory, repeat=repeat)
+
+    if "perform_analysis" in selected:
+        results["perform_analysis"] = measure(
+            lambda: [lambda url=url: app.perform_analysis(url, app.product_analysis_id(url))
+                     for url, _ in fresh("perform")],
+            total, memory, reset=app.verdict_cache.clear, repeat=repeat,
+        )
+
+    if "round_trip" in selected:
+        client = app.app.test_client()
+        results["round_trip"] = measure(
+            lambda: [lambda url=url: round_trip(client, url) for url, _ in fresh("round-trip")],
+            total, memory, reset=app.verdict_cache.clear, repeat=repeat,
+        )
+
+    return results
+
+def round_trip(client, url, poll_interval=0.005, timeout=60):
+    """Submit an analysis, wait until it's done and fetch its page"""
+    response = client.post("/analyze", data={"product_url": url})
+    if response.status_code != 302:
+        raise RuntimeError(f"/analyze returned {response.status_code}")
+    analysis_id = response.headers["Location"].rstrip("/").rsplit("/", 1)[-1]
+
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f"/analysis/{analysis_id}/status").get_json()
+        if status["state"] == "done":
+            break
+        if status["state"] == "failed":
+            raise RuntimeError(f"Analysis of {url} failed: {status.get('error')}")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Analysis of {url} did not finish within {timeout}s")
+        time.sleep(poll_interval)
+
+    page = client.get(f"/analysis/{analysis_id}")
+    if page.status_code != 200:
+        raise RuntimeError(f"/analysis/{analysis_id} returned {page.status_code}")
+
+def compare(results, baseline, tolerance):
+    """
+    Compare benchmark results with a baseline
+
+    Args:
+        results (dict): Current "benchmarks" section
+        baseline (dict): Baseline "benchmarks" section
+        tolerance (float): Relative change allowed before a metric counts as regressed
+
+    Returns:
+        list: One entry per metric present in both, with the relative change
+            (positive is worse) and whether it regressed
+    """
+    comparison = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            current, previous = result.get(metric), base.get(metric)
+            if current is None or not previous:
+                continue
+            change = (previous - current) / previous if higher_is_better else (current - previous) / previous
+            comparison.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": previous,
+                "current": current,
+                "change": change,
+                "regression": change > tolerance,
+            })
+    return comparison
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analyzers and the analysis path")
+    parser.add_argument("--products", type=int, default=20, help="Synthetic products")
+    parser.add_argument("--reviews-per-product", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--median-words", type=int, default=40, help="Median review length")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--rating-skew", type=float, default=0.5)
+    parser.add_argument("--reviewer-reuse", type=float, default=0.1)
+    parser.add_argument("--fake-rate", type=float, default=0.2)
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS),
+                        help=f"Comma-separated subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per benchmark, after a warm-up pass")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    parser.add_argument("--output", help="Write results here instead of standard output")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative slowdown or growth reported as a regression")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = sorted(set(selected) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    # Restart with seeded string hashing so runs are comparable
+    if "PYTHONHASHSEED" not in os.environ:
+        os.environ["PYTHONHASHSEED"] = "0"
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    # Keep benchmark analyses out of the app's real result store
+    workdir = tempfile.mkdtemp(prefix="deceptiscan-bench-")
+    os.environ["ANALYSIS_DB_PATH"] = os.path.join(workdir, "analyses.sqlite3")
+    os.environ.pop("VERDICT_CACHE_PATH", None)
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+
+    import app
+    from corpus import SyntheticCorpus
+
+    corpus = SyntheticCorpus(args.seed, args.median_words, args.duplicate_rate, args.rating_skew,
+                             args.reviewer_reuse, args.fake_rate)
+    products = list(corpus.products(args.products, args.reviews_per_product))
+
+    # Serve the synthetic reviews wherever the app fetches a product's reviews
+    source = {}
+    app.iter_product_reviews = lambda product_url: iter(source[product_url])
+    app.warm_analyzers()
+
+    try:
+        results = run_benchmarks(app, products, selected, source, memory=not args.no_memory,
+                                 repeat=args.repeat)
+    finally:
+        app.analysis_queue.shutdown(wait=False)
+        app.module_orchestrator.shutdown(wait=False)
+
+    report = {
+        "created_at": time.time(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "hash_seed": os.environ["PYTHONHASHSEED"],
+        "corpus": dict(corpus.settings(), products=args.products,
+                       reviews_per_product=args.reviews_per_product),
+        "benchmarks": results,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != report["corpus"]:
+            print("Warning: the baseline was run on a different corpus", file=sys.stderr)
+        report["baseline"] = {"path": args.baseline, "commit": baseline.get("commit"),
+                              "tolerance": args.tolerance}
+        report["comparison"] = compare(results, baseline.get("benchmarks", {}), args.tolerance)
+        for entry in report["comparison"]:
+            if entry["regression"]:
+                print(f"REGRESSION {entry['benchmark']} {entry['metric']}: "
+                      f"{entry['baseline']:.4g} -> {entry['current']:.4g} ({entry['change']:+.1%} worse)",
+                      file=sys.stderr)
+                status = 1
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
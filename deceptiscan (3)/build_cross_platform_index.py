@@ -0,0 +1,82 @@
+"""
+Build the cross-platform matching index from a review archive.
+
+Streams reviews from a JSONL or CSV file holding each review's id, text and
+source platform, and writes a fresh MinHash/LSH index (see
+models/cross_platform.py) that the app loads on startup. With --append the
+reviews are added to the existing index instead, which suits a daily export
+but is slower than a fresh build for large archives.
+
+Usage:
+    python build_cross_platform_index.py reviews.jsonl [--index-path DIR] [--batch-size N] [--append]
+        [--id-field id] [--text-field text] [--platform-field platform]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from bulk_score import chunked
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def read_items(path, fmt, id_field="id", text_field="text", platform_field="platform"):
+    """
+    Stream (review_id, text, platform) tuples from a JSONL or CSV file
+
+    Args:
+        path (str): Input file
+        fmt (str): "jsonl" or "csv"
+        id_field (str): Column holding the review id
+        text_field (str): Column holding the review text
+        platform_field (str): Column holding the source platform
+
+    Yields:
+        tuple: (review_id, text, platform)
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = csv.DictReader(f) if fmt == "csv" else (json.loads(line) for line in f if line.strip())
+        for n, row in enumerate(rows):
+            yield str(row.get(id_field, n)), row.get(text_field) or "", row.get(platform_field) or None
+
+def run(args):
+    sys.path.insert(0, APP_DIR)
+    from models.cross_platform import CrossPlatformMatcher
+
+    start = time.perf_counter()
+    matcher = CrossPlatformMatcher(args.index_path)
+    items = read_items(args.input, args.format, args.id_field, args.text_field, args.platform_field)
+    if args.append:
+        for batch in chunked(items, args.batch_size):
+            matcher.add_many(batch)
+    else:
+        matcher.bulk_build(items, args.batch_size)
+    matcher.save_index()
+
+    print(f"Indexed {len(matcher)} reviews across {len(matcher.platforms)} platforms "
+          f"into {args.index_path} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cross-platform matching index")
+    parser.add_argument("input", help="Reviews as JSONL or CSV")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Input format, detected from the file extension by default")
+    parser.add_argument("--index-path", default=os.environ.get('CROSS_PLATFORM_INDEX_PATH', 'models/cross_platform_index'),
+                        help="Index directory, the app's CROSS_PLATFORM_INDEX_PATH")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Reviews hashed per batch")
+    parser.add_argument("--append", action="store_true", help="Add to the existing index instead of replacing it")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--platform-field", default="platform")
+    args = parser.parse_args()
+
+    if args.format is None:
+        args.format = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
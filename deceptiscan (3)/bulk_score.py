@@ -0,0 +1,254 @@
+"""
+Offline bulk scoring of a review archive.
+
+Streams reviews from a JSONL or CSV file, scores them with the stylometry,
+sentiment and GAN analyzers across a process pool, and appends one JSON line
+per review to the output file. A checkpoint is written every few chunks, so
+a killed run started again with the same arguments resumes after the last
+checkpoint. Only a bounded number of chunks is in flight at any time, so
+memory stays flat regardless of input size.
+
+With --cascade LOW,HIGH the stylometry model only scores reviews whose
+cheap-tier score (see models/cascade.py) falls between the two thresholds.
+With --languages each review is scored by the analyzers of its language (see
+models/language.py), and each worker keeps only the languages it is seeing
+within --language-models-mb.
+
+Usage:
+    python bulk_score.py reviews.jsonl scores.jsonl [--workers N] [--chunk-size N] [--cascade LOW,HIGH]
+        [--languages en,es,fr] [--language-models-mb MB]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Analyzers built once per worker process
+_analyzers = None
+_cascade = None
+
+def _init_worker(cache_path=None, cascade=None, languages=None, language_models_mb=256):
+    global _analyzers, _cascade
+    sys.path.insert(0, APP_DIR)
+    from models.stylometry import StyleAnalyzer
+    from models.sentiment import SentimentAnalyzer
+    from models.gan_detector import GANDetector
+    from models.cache import VerdictCache, CachedAnalyzer
+
+    model_dir = os.path.join(APP_DIR, "models")
+    analyzer_classes = (
+        (StyleAnalyzer, "stylometry", os.path.join(model_dir, "stylometry_model.artifact")),
+        (SentimentAnalyzer, "sentiment", os.path.join(model_dir, "sentiment_model.artifact")),
+        (GANDetector, "gan", os.path.join(model_dir, "gan_detector_model.artifact")),
+    )
+    if languages:
+        # Routed by language, with one identifier and one memory cap per worker
+        from models.language import LanguageIdentifier, LanguageModels, LanguageRouter
+        identifier = LanguageIdentifier(os.path.join(model_dir, "language_model.artifact"),
+                                        languages=languages, default=languages[0])
+        models = LanguageModels(int(language_models_mb * 2 ** 20))
+        _analyzers = tuple(
+            LanguageRouter(analyzer_class, name, identifier, models, model_path)
+            for analyzer_class, name, model_path in analyzer_classes
+        )
+    else:
+        _analyzers = tuple(analyzer_class(model_path) for analyzer_class, _, model_path in analyzer_classes)
+
+    # Verdicts shared across workers and runs, so repeated texts are scored once
+    if cache_path:
+        cache = VerdictCache(disk_path=cache_path)
+        _analyzers = tuple(
+            CachedAnalyzer(analyzer, cache, name)
+            for analyzer, name in zip(_analyzers, ("stylometry", "sentiment", "gan"))
+        )
+
+    if cascade:
+        from models.cascade import CascadeScorer
+        _cascade = CascadeScorer(*_analyzers, *cascade)
+
+def _score_chunk(records):
+    """
+    Score one chunk of reviews in a worker process
+
+    Args:
+        records (list): Review dicts with "id", "text" and optionally "rating"
+
+    Returns:
+        list: One result dict per review, in input order
+    """
+    from models.preprocessing import as_documents
+
+    style, sentiment, gan = _analyzers
+    docs = as_documents(r["text"] for r in records)
+    ratings = [r.get("rating") for r in records]
+
+    sentiment_results = sentiment.analyze_reviews(docs, ratings)
+    gan_results = gan.analyze_reviews(docs)
+    if _cascade:
+        # The cheap tier reuses the sentiment and GAN verdicts computed above
+        style_results = _cascade.analyze_reviews(docs, ratings, sentiment_results, gan_results)
+    else:
+        style_results = style.analyze_reviews(docs)
+
+    results = []
+    for record, s, e, g in zip(records, style_results, sentiment_results, gan_results):
+        result = {
+            "id": record["id"],
+            "stylometry": {"is_fake": s["is_fake"], "fake_score": s["fake_score"], "reasons": s["reasons"]},
+            "sentiment": {"is_fake": e["is_fake"], "fake_score": e["fake_score"], "reasons": e["reasons"]},
+            "gan": {"is_fake": g["is_ai_generated"], "fake_score": g["ai_score"], "reasons": g["reasons"]},
+        }
+        if "language" in e:
+            result["language"] = e["language"]
+        results.append(result)
+    return results
+
+def read_reviews(path, fmt, id_field="id", text_field="text", rating_field="rating"):
+    """
+    Stream reviews from a JSONL or CSV file
+
+    Args:
+        path (str): Input file
+        fmt (str): "jsonl" or "csv"
+        id_field (str): Column holding the review id
+        text_field (str): Column holding the review text
+        rating_field (str): Column holding the star rating, if any
+
+    Yields:
+        dict: Review with id, text and rating
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = csv.DictReader(f) if fmt == "csv" else (json.loads(line) for line in f if line.strip())
+        for n, row in enumerate(rows):
+            rating = row.get(rating_field)
+            yield {
+                "id": row.get(id_field, n),
+                "text": row.get(text_field) or "",
+                "rating": int(float(rating)) if rating not in (None, "") else None,
+            }
+
+def chunked(iterable, size):
+    """Yield lists of up to size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"records_done": 0, "output_bytes": 0}
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path, checkpoint):
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+def run(args):
+    checkpoint_path = args.output + ".checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint.get("complete"):
+        print(f"{args.output} is already complete ({checkpoint['records_done']} reviews)")
+        return 0
+
+    # Drop anything written after the last checkpoint, then skip what it covers
+    mode = "r+b" if os.path.exists(args.output) else "wb"
+    out = open(args.output, mode)
+    out.truncate(checkpoint["output_bytes"])
+    out.seek(checkpoint["output_bytes"])
+    records_done = checkpoint["records_done"]
+    if records_done:
+        print(f"Resuming after {records_done} reviews")
+
+    reviews = read_reviews(args.input, args.format, args.id_field, args.text_field, args.rating_field)
+    chunks = chunked(islice(reviews, records_done, None), args.chunk_size)
+
+    max_in_flight = args.workers * 2
+    chunks_since_checkpoint = 0
+    initargs = (args.cache, args.cascade, args.languages, args.language_models_mb)
+    with Pool(args.workers, initializer=_init_worker, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_score_chunk, (chunk,)))
+            if len(pending) < max_in_flight:
+                continue
+
+            # Write the oldest chunk to keep output in input order
+            records_done += _write_results(out, pending.popleft().get())
+            chunks_since_checkpoint += 1
+            if chunks_since_checkpoint >= args.checkpoint_every:
+                _checkpoint(out, checkpoint_path, records_done)
+                chunks_since_checkpoint = 0
+
+        while pending:
+            records_done += _write_results(out, pending.popleft().get())
+
+    _checkpoint(out, checkpoint_path, records_done, complete=True)
+    out.close()
+    print(f"Scored {records_done} reviews into {args.output}")
+    return 0
+
+def _write_results(out, results):
+    for result in results:
+        out.write((json.dumps(result, separators=(',', ':')) + "\n").encode("utf-8"))
+    return len(results)
+
+def _checkpoint(out, checkpoint_path, records_done, complete=False):
+    out.flush()
+    os.fsync(out.fileno())
+    save_checkpoint(checkpoint_path, {
+        "records_done": records_done,
+        "output_bytes": out.tell(),
+        "complete": complete,
+    })
+
+def parse_thresholds(value):
+    """Parse "LOW,HIGH" cascade thresholds"""
+    try:
+        low, high = (float(threshold) for threshold in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LOW,HIGH, got {value!r}")
+    if low >= high:
+        raise argparse.ArgumentTypeError("LOW must be below HIGH")
+    return low, high
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk score a review archive")
+    parser.add_argument("input", help="Reviews as JSONL or CSV")
+    parser.add_argument("output", help="JSONL file to write scores to")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Input format, detected from the file extension by default")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Reviews per chunk")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="Chunks between checkpoints")
+    parser.add_argument("--cache", help="SQLite file caching verdicts across workers and runs")
+    parser.add_argument("--cascade", type=parse_thresholds, metavar="LOW,HIGH",
+                        help="Only run the stylometry model on reviews the cheap tier scores between LOW and HIGH")
+    parser.add_argument("--languages", type=lambda value: [code.strip() for code in value.split(",") if code.strip()],
+                        metavar="CODES", help="Route reviews between these languages, e.g. en,es,fr; "
+                                              "the first is assumed for reviews too short to identify")
+    parser.add_argument("--language-models-mb", type=float, default=256,
+                        help="Per-language analyzers each worker keeps loaded, in MB")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--rating-field", default="rating")
+    args = parser.parse_args()
+
+    if args.format is None:
+        args.format = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Offline calibration of the stylometry cascade's thresholds.
+
+Scores a sample of labelled reviews with the cheap tier and the stylometry
+model, then reports for every (low, high) threshold pair the share of reviews
+escalated to the model, the accuracy, the agreement with the model alone and
+the estimated throughput. The recommended pair is the fastest one whose
+accuracy is within --tolerance of the model alone. The report is printed as
+JSON; pass the recommended pair to bulk_score.py --cascade or the app's
+STYLOMETRY_CASCADE setting.
+
+Usage:
+    python calibrate_cascade.py labelled.jsonl [--sample N] [--tolerance 0.01]
+"""
+import argparse
+import json
+import os
+import sys
+from itertools import islice
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def parse_floats(value):
+    return [float(item) for item in value.split(",")]
+
+def recommend(report, tolerance):
+    """Fastest threshold pair whose accuracy is within tolerance of the model alone, or None"""
+    accuracy = report["model_only"]["accuracy"]
+    if accuracy is None:
+        print("No labelled reviews to calibrate on, so no thresholds are recommended", file=sys.stderr)
+        return None
+    floor = accuracy - tolerance
+    eligible = [entry for entry in report["thresholds"] if entry["accuracy"] >= floor]
+    return max(eligible, key=lambda entry: entry["reviews_per_second"] or 0, default=None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the cascade thresholds on labelled reviews")
+    parser.add_argument("input", help="Labelled reviews as JSONL or CSV")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Input format, detected from the file extension by default")
+    parser.add_argument("--sample", type=int, default=20000, help="Reviews to calibrate on")
+    parser.add_argument("--lows", type=parse_floats, help="Comma-separated low thresholds to try")
+    parser.add_argument("--highs", type=parse_floats, help="Comma-separated high thresholds to try")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Accuracy the recommended pair may lose against the model alone")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--label-field", default="label")
+    args = parser.parse_args()
+
+    if args.format is None:
+        args.format = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+
+    sys.path.insert(0, APP_DIR)
+    from models.incremental import read_labelled_reviews
+    from models.stylometry import StyleAnalyzer
+    from models.sentiment import SentimentAnalyzer
+    from models.gan_detector import GANDetector
+    from models.cascade import CascadeScorer
+
+    model_dir = os.path.join(APP_DIR, "models")
+    scorer = CascadeScorer(
+        StyleAnalyzer(os.path.join(model_dir, "stylometry_model.artifact")),
+        SentimentAnalyzer(os.path.join(model_dir, "sentiment_model.artifact")),
+        GANDetector(os.path.join(model_dir, "gan_detector_model.artifact")),
+    )
+
+    reviews = read_labelled_reviews(args.input, args.format, args.text_field, args.label_field)
+    texts, labels = [], []
+    for text, label in islice(reviews, args.sample):
+        texts.append(text)
+        labels.append(label)
+
+    report = scorer.calibrate(texts, labels, lows=args.lows, highs=args.highs)
+    report["recommended"] = recommend(report, args.tolerance)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
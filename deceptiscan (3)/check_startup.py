@@ -0,0 +1,75 @@
+"""
+Cold-start budget check for the web app.
+
+Imports app.py in a fresh interpreter and fails if the import is slower than
+the budget or pulls in the heavy ML dependencies that analyzers load lazily.
+
+Usage:
+    python check_startup.py [--budget SECONDS] [--runs N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Modules that must not be imported until an analyzer is first used
+HEAVY_MODULES = ["numpy", "scipy", "sklearn", "joblib"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+def measure_import(app_dir):
+    """
+    Import app.py in a clean subprocess
+
+    Args:
+        app_dir (str): Directory containing app.py
+
+    Returns:
+        dict: Import wall time in seconds and heavy modules that were loaded
+    """
+    env = dict(os.environ)
+    for name in ("WARM_ANALYZERS", "PRELOAD_MODELS"):
+        env.pop(name, None)
+
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=app_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the app's cold-start import time")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("STARTUP_BUDGET", 1.5)),
+                        help="Maximum import time in seconds")
+    parser.add_argument("--runs", type=int, default=3, help="Imports to time; the fastest is used")
+    args = parser.parse_args()
+
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    results = [measure_import(app_dir) for _ in range(args.runs)]
+    elapsed = min(r["elapsed"] for r in results)
+    heavy = sorted({m for r in results for m in r["heavy"]})
+
+    print(f"app import: {elapsed:.3f}s (budget {args.budget:.3f}s)")
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if elapsed > args.budget:
+        print("FAIL: cold start exceeds budget")
+        failed = True
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Seeded synthetic review corpus.
+
+Generates products with reviews shaped like the mock reviews of app.py (id,
+text, rating, author, date, verified, is_fake, fake_score, fake_reasons), for
+benchmarks and local testing. The same seed and settings always produce the
+same corpus. Review length, the share of copy-pasted reviews, how strongly
+ratings pile up at 1 and 5 stars, and how often reviewers come back are all
+adjustable.
+"""
+import random
+from datetime import date, timedelta
+
+GENUINE_SENTENCES = [
+    "I've been using this for about {n} weeks now.",
+    "Bought it for my {who} and it does the job.",
+    "The battery lasts roughly {n} hours with normal use.",
+    "Setup took around {n} minutes, the manual could be clearer.",
+    "Build quality is decent but the {part} feels a bit flimsy.",
+    "The app is somewhat buggy and crashed twice during setup.",
+    "It gets warm when used for extended periods.",
+    "Customer support answered my question within {n} days.",
+    "Compared to my old one the {part} is a clear improvement.",
+    "Shipping took {n} days and the box was slightly damaged.",
+    "For the price it is fine, though there are cheaper alternatives.",
+    "Sound quality is good at low volume but distorts when turned up.",
+    "My {who} uses it every day without complaints so far.",
+    "The {part} stopped working after {n} months and was replaced under warranty.",
+]
+
+FAKE_SENTENCES = [
+    "This product is absolutely amazing!",
+    "Best purchase I have ever made!",
+    "I would recommend it to everyone!",
+    "It completely changed my life!",
+    "Everyone needs to buy this right now!",
+    "Perfect in every way and worth every penny!",
+    "Incredible quality, five stars!",
+    "You will not regret buying this!",
+    "Absolutely the greatest thing ever made!",
+]
+
+NEGATIVE_FAKE_SENTENCES = [
+    "Absolutely terrible product!",
+    "Broke after one day!",
+    "Don't waste your money!",
+    "Worst purchase ever, avoid at all costs!",
+]
+
+WHO = ["wife", "husband", "son", "daughter", "mother", "office", "dad", "roommate"]
+PARTS = ["charger", "screen", "remote", "case", "button", "cable", "speaker", "stand"]
+
+class SyntheticCorpus:
+    """
+    Deterministic generator of products and their reviews.
+    """
+
+    def __init__(self, seed=0, median_words=40, duplicate_rate=0.05, rating_skew=0.5,
+                 reviewer_reuse=0.1, fake_rate=0.2):
+        """
+        Args:
+            seed (int): Random seed
+            median_words (int): Median review length in words (lengths are log-normal)
+            duplicate_rate (float): Share of reviews that copy an earlier review of the product
+            rating_skew (float): 0 for a spread of ratings, 1 for ratings piled at 1 and 5 stars
+            reviewer_reuse (float): Share of reviews written by a reviewer seen before
+            fake_rate (float): Share of reviews written as fakes
+        """
+        self.seed = seed
+        self.median_words = median_words
+        self.duplicate_rate = duplicate_rate
+        self.rating_skew = rating_skew
+        self.reviewer_reuse = reviewer_reuse
+        self.fake_rate = fake_rate
+
+    def settings(self):
+        """Generator settings, recorded with benchmark results"""
+        return {
+            "seed": self.seed,
+            "median_words": self.median_words,
+            "duplicate_rate": self.duplicate_rate,
+            "rating_skew": self.rating_skew,
+            "reviewer_reuse": self.reviewer_reuse,
+            "fake_rate": self.fake_rate,
+        }
+
+    def products(self, n_products, reviews_per_product):
+        """
+        Generate products
+
+        Args:
+            n_products (int): Number of products
+            reviews_per_product (int): Reviews per product
+
+        Yields:
+            tuple: (product number, list of review dicts)
+        """
+        rng = random.Random(self.seed)
+        authors = []
+        for product in range(n_products):
+            yield product, self._reviews(rng, product, reviews_per_product, authors)
+
+    def reviews(self, n_reviews, reviews_per_product=100):
+        """
+        Generate a flat list of reviews across products
+
+        Args:
+            n_reviews (int): Number of reviews
+            reviews_per_product (int): Reviews per product
+
+        Returns:
+            list: Review dicts
+        """
+        n_products = -(-n_reviews // reviews_per_product)
+        reviews = [review for _, product_reviews in self.products(n_products, reviews_per_product)
+                   for review in product_reviews]
+        return reviews[:n_reviews]
+
+    def _reviews(self, rng, product, count, authors):
+        start = date(2023, 1, 1) + timedelta(days=rng.randrange(365))
+        # Fake reviews of a product arrive in a burst
+        campaign = start + timedelta(days=rng.randrange(60))
+        reviews = []
+        for n in range(count):
+            if reviews and rng.random() < self.duplicate_rate:
+                review = self._duplicate(rng, rng.choice(reviews))
+            elif rng.random() < self.fake_rate:
+                review = self._fake(rng, campaign)
+            else:
+                review = self._genuine(rng, start)
+
+            if authors and rng.random() < self.reviewer_reuse:
+                review["author"] = rng.choice(authors)
+            else:
+                review["author"] = f"user{len(authors)}"
+                authors.append(review["author"])
+            review["id"] = f"p{product}r{n}"
+            reviews.append(review)
+        return reviews
+
+    def _genuine(self, rng, start):
+        return {
+            "text": self._text(rng, GENUINE_SENTENCES),
+            "rating": self._rating(rng),
+            "date": (start + timedelta(days=rng.randrange(180))).isoformat(),
+            "verified": rng.random() < 0.7,
+            "is_fake": False,
+            "fake_score": round(rng.uniform(0.0, 0.3), 2),
+            "fake_reasons": [],
+        }
+
+    def _fake(self, rng, campaign):
+        negative = rng.random() < 0.2
+        return {
+            "text": self._text(rng, NEGATIVE_FAKE_SENTENCES if negative else FAKE_SENTENCES),
+            "rating": 1 if negative else 5,
+            "date": (campaign + timedelta(days=rng.randrange(7))).isoformat(),
+            "verified": rng.random() < 0.2,
+            "is_fake": True,
+            "fake_score": round(rng.uniform(0.7, 0.95), 2),
+            "fake_reasons": [],
+        }
+
+    def _duplicate(self, rng, original):
+        # Copy-paste, sometimes with a trivial edit
+        text = original["text"]
+        if rng.random() < 0.5:
+            text = text.rstrip("!.") + rng.choice(["!", "!!", ".", " Highly recommended!"])
+        return dict(original, text=text, is_fake=True, fake_score=round(rng.uniform(0.7, 0.95), 2),
+                    fake_reasons=[])
+
+    def _text(self, rng, sentences):
+        words = max(3, int(rng.lognormvariate(0, 0.6) * self.median_words))
+        parts, length = [], 0
+        while length < words:
+            sentence = rng.choice(sentences).format(
+                n=rng.randint(1, 12), who=rng.choice(WHO), part=rng.choice(PARTS))
+            parts.append(sentence)
+            length += len(sentence.split())
+        return " ".join(parts)
+
+    def _rating(self, rng):
+        if rng.random() < self.rating_skew:
+            return 5 if rng.random() < 0.8 else 1
+        return rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 3, 3])[0]
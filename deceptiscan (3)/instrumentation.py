@@ -0,0 +1,256 @@
+"""
+Hot-path instrumentation: counters, histograms, timing spans and a sampling
+profiler, exposed in the Prometheus text format.
+
+Only the standard library is used, so importing this module keeps app
+startup light. Recording a sample takes a lock and a bisect, cheap enough to
+leave on in production; with METRICS_ENABLED=0 spans and analyzer wrappers
+record nothing. Each process keeps its own metrics, so with several worker
+processes every worker is scraped separately.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as Tally
+from contextlib import contextmanager
+
+# Seconds, from cache hits through to slow scrapes
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name + "_total", tuple(zip(self.labels, key)), value
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets, optionally split by labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: ([*counts], total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = tuple(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket", labels + (("le", _format_value(float(bound))),), cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, count
+
+class Registry:
+    """
+    Set of metrics rendered together for /metrics.
+
+    Collectors are callables returning (name, kind, help, samples) tuples at
+    render time, for values kept elsewhere such as the verdict cache counters.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        self._collectors.append(collect)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        families = [(metric.name, metric.kind, metric.help, metric.samples()) for metric in self._metrics]
+        for collect in self._collectors:
+            try:
+                families.extend(collect())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {_escape(help)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry(enabled=os.environ.get('METRICS_ENABLED', '1') != '0')
+
+STAGE_SECONDS = registry.histogram(
+    "deceptiscan_stage_seconds", "Time spent in each stage of an analysis or request", ["stage"])
+ANALYZER_SECONDS = registry.histogram(
+    "deceptiscan_analyzer_seconds", "Time per analyzer call", ["analyzer", "method"])
+REVIEWS_SCORED = registry.counter(
+    "deceptiscan_reviews_scored", "Reviews scored by each analyzer", ["analyzer"])
+
+@contextmanager
+def span(stage):
+    """Time a block of code as one stage"""
+    if not registry.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+class InstrumentedAnalyzer:
+    """
+    Wraps an analyzer to time its analyze_review/analyze_reviews calls and
+    count the reviews it scores. Other attributes are passed through.
+    """
+
+    def __init__(self, analyzer, name):
+        self.analyzer = analyzer
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self.analyzer, attr)
+
+    def analyze_review(self, *args, **kwargs):
+        if not registry.enabled:
+            return self.analyzer.analyze_review(*args, **kwargs)
+        start = time.perf_counter()
+        result = self.analyzer.analyze_review(*args, **kwargs)
+        ANALYZER_SECONDS.observe(time.perf_counter() - start, analyzer=self.name, method="analyze_review")
+        REVIEWS_SCORED.inc(analyzer=self.name)
+        return result
+
+    def analyze_reviews(self, *args, **kwargs):
+        if not registry.enabled:
+            return self.analyzer.analyze_reviews(*args, **kwargs)
+        start = time.perf_counter()
+        results = self.analyzer.analyze_reviews(*args, **kwargs)
+        ANALYZER_SECONDS.observe(time.perf_counter() - start, analyzer=self.name, method="analyze_reviews")
+        REVIEWS_SCORED.inc(len(results), analyzer=self.name)
+        return results
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a thread and, optionally, the worker threads it
+    hands work to.
+
+    A background thread records the profiled threads' stacks every interval
+    seconds. The profiled code runs unmodified, so the cost is that of the
+    sampler thread, and only while a profile is being taken. Stacks are kept
+    in the folded format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id=None, interval=0.005, thread_prefix=None):
+        """
+        Args:
+            thread_id (int, optional): Thread to sample, the calling thread by default
+            interval (float): Seconds between samples
+            thread_prefix (str, optional): Also sample threads whose name starts with this;
+                they may be working for other requests at the same time
+        """
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.thread_prefix = thread_prefix
+        self.stacks = Tally()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def folded(self):
+        """Collected stacks as "outer;inner count" lines"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.folded())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            threads = {self.thread_id}
+            if self.thread_prefix:
+                threads.update(thread.ident for thread in threading.enumerate()
+                               if thread.name.startswith(self.thread_prefix))
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
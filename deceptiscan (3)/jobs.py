@@ -0,0 +1,120 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+class QueueFullError(Exception):
+    """Raised when the analysis queue has no room for another job"""
+
+class AnalysisQueue:
+    """
+    Bounded worker pool that runs product analyses in the background.
+    Jobs for a product URL that is already queued or running are de-duplicated.
+    """
+
+    def __init__(self, run_analysis, max_workers=4, max_pending=64, max_failed=256):
+        """
+        Args:
+            run_analysis (callable): Called as run_analysis(product_url, analysis_id, progress)
+                where progress(module_name, state) reports per-module progress
+            max_workers (int): Number of worker threads
+            max_pending (int): Maximum number of queued or running jobs
+            max_failed (int): Number of failed job statuses to remember
+        """
+        self.run_analysis = run_analysis
+        self.max_pending = max_pending
+        self.max_failed = max_failed
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._lock = threading.Lock()
+        self._jobs = {}              # analysis_id -> status of queued/running jobs
+        self._in_flight = {}         # product_url -> analysis_id
+        self._failed = OrderedDict() # analysis_id -> status of failed jobs
+
+    def submit(self, product_url, analysis_id=None):
+        """
+        Enqueue an analysis for a product URL
+
+        Args:
+            product_url (str): The product page to analyze
+            analysis_id (str, optional): Id to store the result under, a new random id by default
+
+        Returns:
+            str: The analysis id, shared with any in-flight job for the same URL
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            if product_url in self._in_flight:
+                return self._in_flight[product_url]
+            if analysis_id in self._jobs:
+                return analysis_id
+
+            if len(self._jobs) >= self.max_pending:
+                raise QueueFullError(f"{len(self._jobs)} analyses already pending")
+
+            analysis_id = analysis_id or uuid.uuid4().hex[:8]
+            self._failed.pop(analysis_id, None)
+            self._jobs[analysis_id] = {
+                "id": analysis_id,
+                "url": product_url,
+                "state": "queued",
+                "modules": {},
+            }
+            self._in_flight[product_url] = analysis_id
+
+        self._executor.submit(self._run, analysis_id, product_url)
+        return analysis_id
+
+    def status(self, analysis_id):
+        """
+        Get the status of a queued, running or failed job
+
+        Args:
+            analysis_id (str): The analysis id returned by submit
+
+        Returns:
+            dict: Copy of the job status, or None once the job has finished
+        """
+        with self._lock:
+            job = self._jobs.get(analysis_id) or self._failed.get(analysis_id)
+            if job is None:
+                return None
+            return dict(job, modules=dict(job["modules"]))
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, analysis_id, product_url):
+        """Run one job on a worker thread and record its outcome"""
+        self._update(analysis_id, state="running")
+
+        def progress(module_name, state):
+            # Abandoned modules may still report after the job has finished
+            with self._lock:
+                job = self._jobs.get(analysis_id)
+                if job is not None:
+                    job["modules"][module_name] = state
+
+        try:
+            self.run_analysis(product_url, analysis_id, progress)
+        except Exception as e:
+            print(f"Error running analysis {analysis_id}: {e}")
+            with self._lock:
+                job = self._jobs.pop(analysis_id)
+                job["state"] = "failed"
+                job["error"] = str(e)
+                self._failed[analysis_id] = job
+                while len(self._failed) > self.max_failed:
+                    self._failed.popitem(last=False)
+                self._in_flight.pop(product_url, None)
+            return
+
+        with self._lock:
+            self._jobs.pop(analysis_id, None)
+            self._in_flight.pop(product_url, None)
+
+    def _update(self, analysis_id, **fields):
+        with self._lock:
+            self._jobs[analysis_id].update(fields)
@@ -0,0 +1,380 @@
+"""
+Compact, versioned model artifact format.
+
+An artifact is a single file: a fixed header, a JSON manifest, and one data
+segment holding every NumPy array of the model back to back, each aligned to
+64 bytes. Loading parses the manifest and memory-maps the data segment, so
+arrays (vocabularies stored as sorted string arrays, coefficients, support
+vectors, tree nodes) are zero-copy read-only views and nothing is unpickled.
+
+The manifest records the format version, the encoded object tree, the dtype,
+shape and offset of every array and a SHA-256 checksum of the data segment.
+Objects are rebuilt from their __reduce__ state. Only classes can be
+referenced, by module and plain class name, and only estimators, NumPy and
+SciPy sparse types and the few other classes listed in _allowed_classes();
+the only functions that can be called are the reconstructors named in
+ALLOWED_RECONSTRUCTORS.
+"""
+import copyreg
+import hashlib
+import importlib
+import json
+import os
+import struct
+import time
+import numpy as np
+from scipy import sparse
+
+MAGIC = b"DSCANART"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+ALLOWED_MODULES = ("sklearn", "numpy", "scipy", "models")
+ALLOWED_BUILTINS = {"int", "float", "bool", "str", "complex", "object"}
+
+# Functions a manifest may call, besides the constructors of allowed classes
+ALLOWED_RECONSTRUCTORS = {
+    "copyreg:_reconstructor",
+    "numpy.core.multiarray:_reconstruct",
+    "numpy._core.multiarray:_reconstruct",
+}
+
+# Header: magic, format version, manifest length
+_HEADER = struct.Struct("<8sIQ")
+
+class ArtifactError(Exception):
+    """Raised for unreadable, incompatible or corrupted artifacts"""
+
+def is_artifact(path):
+    """Check whether a file is in this format (rather than a legacy pickle)"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def save_artifact(path, obj, metadata=None):
+    """
+    Write an object tree (e.g. {"model": ..., "vectorizer": ...}) as an artifact
+
+    The file is written next to path and moved into place, so readers that
+    have the previous version memory-mapped are unaffected.
+
+    Args:
+        path (str): Destination file
+        obj: Object to store
+        metadata (dict, optional): JSON-serializable information for the manifest
+
+    Returns:
+        dict: The manifest
+    """
+    encoder = _Encoder()
+    root = encoder.encode(obj)
+
+    # Lay the arrays out back to back, each aligned
+    arrays, offset = {}, 0
+    for name, array in encoder.arrays.items():
+        offset = _align(offset)
+        arrays[name] = {
+            "dtype": np.lib.format.dtype_to_descr(array.dtype),
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += array.nbytes
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "metadata": metadata or {},
+        "root": root,
+        "arrays": arrays,
+        "data_size": offset,
+    }
+
+    # Reserve room for the manifest with its checksum, which is only known
+    # once the data is written
+    placeholder = dict(manifest, checksum="sha256:" + "0" * 64, data_start=10 ** 15)
+    data_start = _align(_HEADER.size + len(_encode_manifest(placeholder)))
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    checksum = hashlib.sha256()
+    with open(tmp, "wb") as f:
+        f.seek(data_start)
+        position = 0
+        for name, array in encoder.arrays.items():
+            padding = b"\0" * (arrays[name]["offset"] - position)
+            chunk = array.reshape(-1).view(np.uint8).data if array.nbytes else b""
+            for part in (padding, chunk):
+                f.write(part)
+                checksum.update(part)
+            position = arrays[name]["offset"] + array.nbytes
+
+        manifest["checksum"] = "sha256:" + checksum.hexdigest()
+        manifest["data_start"] = data_start
+        encoded = _encode_manifest(manifest)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        f.write(encoded)
+        f.write(b" " * (data_start - _HEADER.size - len(encoded)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return manifest
+
+def load_artifact(path, verify=False):
+    """
+    Load an artifact, memory-mapping its arrays
+
+    Args:
+        path (str): Artifact file
+        verify (bool): Recompute the data checksum (reads the whole file)
+
+    Returns:
+        The stored object tree
+
+    Raises:
+        ArtifactError: If the file isn't a compatible, intact artifact
+    """
+    manifest, data_start = read_manifest(path)
+
+    expected = data_start + manifest["data_size"]
+    if os.path.getsize(path) < expected:
+        raise ArtifactError(f"{path} is truncated")
+
+    if manifest["data_size"]:
+        buffer = np.memmap(path, dtype=np.uint8, mode="r", offset=data_start, shape=(manifest["data_size"],))
+    else:
+        buffer = np.zeros(0, dtype=np.uint8)
+
+    if verify:
+        digest = hashlib.sha256(buffer).hexdigest() if len(buffer) else hashlib.sha256().hexdigest()
+        if "sha256:" + digest != manifest["checksum"]:
+            raise ArtifactError(f"Checksum mismatch in {path}")
+
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        dtype = np.lib.format.descr_to_dtype(_as_descr(spec["dtype"]))
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=spec["offset"]) if count else np.zeros(0, dtype)
+        arrays[name] = array.reshape(spec["shape"])
+
+    return _Decoder(arrays).decode(manifest["root"])
+
+def read_manifest(path):
+    """
+    Read an artifact's manifest without loading the model
+
+    Args:
+        path (str): Artifact file
+
+    Returns:
+        tuple: (manifest dict, byte offset of the data segment)
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ArtifactError(f"{path} is not a model artifact")
+        magic, version, manifest_size = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ArtifactError(f"{path} is not a model artifact")
+        if version > FORMAT_VERSION:
+            raise ArtifactError(f"{path} has format version {version}, newer than supported {FORMAT_VERSION}")
+        manifest = json.loads(f.read(manifest_size).decode("utf-8"))
+    return manifest, manifest["data_start"]
+
+def _encode_manifest(manifest):
+    return json.dumps(manifest, separators=(',', ':')).encode("utf-8")
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _as_descr(descr):
+    # JSON turns the tuples of structured dtype descriptions (and subarray shapes) into lists
+    if not isinstance(descr, list):
+        return descr
+    if all(isinstance(dim, int) for dim in descr):
+        return tuple(descr)
+    return [tuple(_as_descr(part) for part in field) for field in descr]
+
+def _qualified_name(obj):
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+def _allowed_classes():
+    """Classes (and their subclasses) that a manifest may reference"""
+    # Deferred so reading a manifest doesn't import sklearn
+    from sklearn.base import BaseEstimator
+    from sklearn.tree._tree import Tree
+    from sklearn._loss._loss import CyLossFunction
+    from models.incremental import CalibratedLinearClassifier
+    classes = (BaseEstimator, np.ndarray, np.dtype, np.generic, sparse.spmatrix,
+               Tree, CyLossFunction, CalibratedLinearClassifier)
+    if hasattr(sparse, "sparray"):
+        classes += (sparse.sparray,)
+    return classes
+
+def _resolve(name, call=False):
+    """
+    Look up a class referenced by the manifest, or a reconstructor it calls
+
+    Args:
+        name (str): "module:ClassName"
+        call (bool): Whether the manifest calls it, which also allows ALLOWED_RECONSTRUCTORS
+
+    Returns:
+        The class or reconstructor
+
+    Raises:
+        ArtifactError: If the name isn't an allowed class or reconstructor
+    """
+    module_name, _, qualname = name.partition(":")
+    if call and name in ALLOWED_RECONSTRUCTORS:
+        try:
+            return getattr(importlib.import_module(module_name), qualname)
+        except (ImportError, AttributeError):
+            raise ArtifactError(f"Artifact references unknown reconstructor {name}")
+
+    if not qualname or "." in qualname:
+        raise ArtifactError(f"Artifact references disallowed name {name}")
+    if module_name == "builtins":
+        if qualname not in ALLOWED_BUILTINS:
+            raise ArtifactError(f"Artifact references disallowed builtin {qualname}")
+    elif module_name.split(".")[0] not in ALLOWED_MODULES:
+        raise ArtifactError(f"Artifact references disallowed module {module_name}")
+
+    try:
+        obj = getattr(importlib.import_module(module_name), qualname)
+    except (ImportError, AttributeError):
+        raise ArtifactError(f"Artifact references unknown class {name}")
+    if not isinstance(obj, type):
+        raise ArtifactError(f"Artifact references {name}, which is not a class")
+    if module_name != "builtins" and not issubclass(obj, _allowed_classes()):
+        raise ArtifactError(f"Artifact references disallowed class {name}")
+    return obj
+
+class _Encoder:
+    """Turns an object tree into JSON-compatible values plus named arrays"""
+
+    def __init__(self):
+        self.arrays = {}
+
+    def add_array(self, array):
+        name = f"a{len(self.arrays)}"
+        self.arrays[name] = np.ascontiguousarray(array)
+        return name
+
+    def encode(self, value):
+        if value is None or isinstance(value, (bool, str)):
+            return value
+        if isinstance(value, (int, float)) and type(value) in (int, float):
+            if isinstance(value, float) and not np.isfinite(value):
+                return {"__float__": repr(value)}
+            return value
+        if isinstance(value, np.generic):
+            return {"__scalar__": np.lib.format.dtype_to_descr(value.dtype),
+                    "value": self.encode(value.item())}
+        if isinstance(value, np.dtype):
+            return {"__dtype__": np.lib.format.dtype_to_descr(value)}
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject:
+                return {"__object_array__": [self.encode(item) for item in value.ravel().tolist()],
+                        "shape": list(value.shape)}
+            return {"__array__": self.add_array(value)}
+        if sparse.issparse(value):
+            csr = value.tocsr()
+            return {"__sparse__": value.format, "shape": list(csr.shape),
+                    "data": self.add_array(csr.data), "indices": self.add_array(csr.indices),
+                    "indptr": self.add_array(csr.indptr)}
+        if isinstance(value, list):
+            return [self.encode(item) for item in value]
+        if isinstance(value, tuple):
+            return {"__tuple__": [self.encode(item) for item in value]}
+        if isinstance(value, (set, frozenset)):
+            return {"__set__": [self.encode(item) for item in sorted(value, key=repr)],
+                    "frozen": isinstance(value, frozenset)}
+        if type(value) is dict:
+            if all(isinstance(key, str) for key in value):
+                return {"__dict__": {key: self.encode(item) for key, item in value.items()}}
+            return {"__items__": [[self.encode(key), self.encode(item)] for key, item in value.items()]}
+        if isinstance(value, type):
+            return {"__type__": _qualified_name(value)}
+        return self.encode_object(value)
+
+    def encode_object(self, value):
+        reduced = value.__reduce_ex__(2)
+        if isinstance(reduced, str) or len(reduced) > 3 and any(part is not None for part in reduced[3:]):
+            raise TypeError(f"Cannot store {type(value).__name__} in a model artifact")
+        constructor, args = reduced[0], reduced[1]
+        state = reduced[2] if len(reduced) > 2 else None
+
+        if constructor is copyreg.__newobj__:
+            encoded = {"__new__": _qualified_name(args[0]), "args": self.encode(tuple(args[1:]))}
+        else:
+            encoded = {"__call__": _qualified_name(constructor), "args": self.encode(tuple(args))}
+        if state is not None:
+            encoded["state"] = self.encode(state)
+        return encoded
+
+class _Decoder:
+    """Inverse of _Encoder, with arrays taken from the memory-mapped data segment"""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+
+    def decode(self, value):
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        if "__array__" in value:
+            return self.arrays[value["__array__"]]
+        if "__dict__" in value:
+            return {key: self.decode(item) for key, item in value["__dict__"].items()}
+        if "__tuple__" in value:
+            return tuple(self.decode(item) for item in value["__tuple__"])
+        if "__items__" in value:
+            return {self.decode(key): self.decode(item) for key, item in value["__items__"]}
+        if "__set__" in value:
+            items = (self.decode(item) for item in value["__set__"])
+            return frozenset(items) if value["frozen"] else set(items)
+        if "__float__" in value:
+            return float(value["__float__"])
+        if "__scalar__" in value:
+            return np.lib.format.descr_to_dtype(_as_descr(value["__scalar__"])).type(self.decode(value["value"]))
+        if "__dtype__" in value:
+            return np.lib.format.descr_to_dtype(_as_descr(value["__dtype__"]))
+        if "__object_array__" in value:
+            array = np.empty(len(value["__object_array__"]), dtype=object)
+            array[:] = [self.decode(item) for item in value["__object_array__"]]
+            return array.reshape(value["shape"])
+        if "__sparse__" in value:
+            csr = sparse.csr_matrix(
+                (self.arrays[value["data"]], self.arrays[value["indices"]], self.arrays[value["indptr"]]),
+                shape=tuple(value["shape"]),
+            )
+            return csr if value["__sparse__"] == "csr" else csr.asformat(value["__sparse__"])
+        if "__type__" in value:
+            return _resolve(value["__type__"])
+        if "__new__" in value:
+            cls = _resolve(value["__new__"])
+            obj = cls.__new__(cls, *self.decode(value["args"]))
+            return self._set_state(obj, value)
+        if "__call__" in value:
+            obj = _resolve(value["__call__"], call=True)(*self.decode(value["args"]))
+            return self._set_state(obj, value)
+        raise ArtifactError(f"Unknown value in artifact manifest: {sorted(value)}")
+
+    def _set_state(self, obj, value):
+        if "state" not in value:
+            return obj
+        state = self.decode(value["state"])
+        if hasattr(obj, "__setstate__"):
+            obj.__setstate__(state)
+        elif isinstance(state, tuple):
+            state, slots = state
+            if state:
+                obj.__dict__.update(state)
+            for key, item in (slots or {}).items():
+                setattr(obj, key, item)
+        else:
+            obj.__dict__.update(state)
+        return obj
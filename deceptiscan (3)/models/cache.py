@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from models import registry
+from models.preprocessing import as_document, as_documents
+
+def artifact_version(path):
+    """
+    Identify the current version of a model artifact
+
+    The version changes whenever save_model rewrites the file, which makes
+    cache entries for the previous artifact unreachable.
+
+    Args:
+        path (str): Path of the model artifact
+
+    Returns:
+        str: Version string, "untrained" if no artifact exists
+    """
+    path = registry.resolve_model_path(path)
+    if path is None:
+        return "untrained"
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "untrained"
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+class VerdictCache:
+    """
+    Content-addressed cache of analyzer verdicts.
+
+    Keys hash the analyzer name, its artifact version, the normalized review
+    text and the rating. Entries live in an in-memory LRU tier and, if
+    disk_path is given, in a SQLite tier shared across processes and runs.
+    """
+
+    def __init__(self, max_entries=100000, disk_path=None):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._versions = {}
+
+        if disk_path:
+            if os.path.dirname(disk_path):
+                os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    value BLOB NOT NULL
+                )
+            """)
+            conn.commit()
+
+    def key(self, namespace, version, text, rating=None):
+        """
+        Build the cache key for a review
+
+        Args:
+            namespace (str): Analyzer name
+            version (str): Artifact version of the analyzer
+            text (str or ReviewDocument): The review text
+            rating (int, optional): The star rating
+
+        Returns:
+            str: Hex digest identifying the verdict
+        """
+        normalized = " ".join(as_document(text).words)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{namespace}\0{version}\0{rating}\0".encode("utf-8"))
+        digest.update(normalized.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Look up a verdict
+
+        Args:
+            key (str): Key built by key()
+
+        Returns:
+            dict: Copy of the cached verdict, or None on a miss
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(value)
+
+        if self.disk_path:
+            row = self._connect().execute("SELECT value FROM verdicts WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value = json.loads(zlib.decompress(row[0]))
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return dict(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value, namespace="", version=""):
+        """
+        Store a verdict
+
+        Args:
+            key (str): Key built by key()
+            value (dict): JSON-serializable verdict
+            namespace (str): Analyzer name, used to drop stale versions on disk
+            version (str): Artifact version the verdict was computed with
+        """
+        self._remember(key, value)
+        if self.disk_path:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, namespace, version, value) VALUES (?, ?, ?, ?)",
+                    (key, namespace, version, zlib.compress(json.dumps(value, separators=(',', ':')).encode("utf-8"))),
+                )
+
+    def check_version(self, namespace, version):
+        """
+        Drop on-disk verdicts of older artifact versions when an analyzer's version changes
+
+        Args:
+            namespace (str): Analyzer name
+            version (str): Current artifact version
+        """
+        with self._lock:
+            if self._versions.get(namespace) == version:
+                return
+            self._versions[namespace] = version
+        if self.disk_path:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM verdicts WHERE namespace = ? AND version != ?", (namespace, version))
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            dict: Hit, disk hit and miss counters, hit rate and in-memory size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self):
+        """Drop every cached verdict"""
+        with self._lock:
+            self._memory.clear()
+        if self.disk_path:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM verdicts")
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _connect(self):
+        """Return this thread's SQLite connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+class CachedAnalyzer:
+    """
+    Puts a VerdictCache in front of an analyzer's analyze_review/analyze_reviews.
+    Batches only send cache misses to the wrapped analyzer.
+    """
+
+    def __init__(self, analyzer, cache, namespace=None):
+        self.analyzer = analyzer
+        self.cache = cache
+        self.namespace = namespace or type(analyzer).__name__
+
+    def __getattr__(self, name):
+        return getattr(self.analyzer, name)
+
+    def analyze_review(self, text, rating=None):
+        """
+        Analyze a single review, reusing a cached verdict when possible
+
+        Args:
+            text (str or ReviewDocument): The review text to analyze
+            rating (int, optional): Passed through to analyzers that take a rating
+
+        Returns:
+            dict: Analysis result of the wrapped analyzer
+        """
+        ratings = None if rating is None else [rating]
+        return self.analyze_reviews([text], ratings)[0]
+
+    def analyze_reviews(self, texts, ratings=None):
+        """
+        Analyze multiple reviews, scoring only the cache misses
+
+        Args:
+            texts (list): List of review texts or ReviewDocument objects
+            ratings (list, optional): Passed through to analyzers that take ratings
+
+        Returns:
+            list: List of analysis results
+        """
+        docs = as_documents(texts)
+        # Analyzers backed by several artifacts (LanguageRouter) report a combined version;
+        # looked up through any wrapper, such as InstrumentedAnalyzer
+        model_version = getattr(self.analyzer, 'model_version', None)
+        if model_version is not None:
+            version = model_version()
+        else:
+            version = artifact_version(self.analyzer.model_path)
+        self.cache.check_version(self.namespace, version)
+
+        keys = [
+            self.cache.key(self.namespace, version, doc, None if ratings is None else ratings[i])
+            for i, doc in enumerate(docs)
+        ]
+        results = [None] * len(docs)
+        missing, first_miss = [], {}
+        for i, key in enumerate(keys):
+            if key in first_miss:
+                continue  # Repeated text in this batch, filled in below
+            results[i] = self.cache.get(key)
+            if results[i] is None:
+                first_miss[key] = i
+                missing.append(i)
+
+        if missing:
+            miss_docs = [docs[i] for i in missing]
+            if ratings is None:
+                computed = self.analyzer.analyze_reviews(miss_docs)
+            else:
+                computed = self.analyzer.analyze_reviews(miss_docs, [ratings[i] for i in missing])
+            for i, result in zip(missing, computed):
+                self.cache.put(keys[i], result, self.namespace, version)
+                results[i] = dict(result)
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    results[i] = dict(results[first_miss[key]])
+
+        return results
@@ -0,0 +1,152 @@
+import time
+import numpy as np
+from models.preprocessing import as_documents
+
+class CascadeScorer:
+    """
+    Tiered fake-review scoring with early exit.
+
+    The cheap tier combines the GAN detector's feature heuristics, the
+    sentiment lexicon score and length/exclamation checks. Reviews whose cheap
+    score is at most low are accepted as genuine and those at or above high
+    are flagged, without touching the model. Only the ambiguous band in
+    between goes to the expensive stylometry model.
+    """
+
+    def __init__(self, style, sentiment, gan, low=0.2, high=0.8):
+        """
+        Args:
+            style (StyleAnalyzer): Expensive tier
+            sentiment (SentimentAnalyzer): Lexicon scores for the cheap tier
+            gan (GANDetector): Feature heuristics for the cheap tier
+            low (float): Cheap scores at or below this exit as genuine
+            high (float): Cheap scores at or above this exit as fake
+        """
+        self.style = style
+        self.sentiment = sentiment
+        self.gan = gan
+        self.low = low
+        self.high = high
+
+    def cheap_scores(self, docs, ratings=None, sentiment_results=None, gan_results=None):
+        """
+        Score reviews with the cheap tier only
+
+        Args:
+            docs (list): ReviewDocument objects
+            ratings (list, optional): Star ratings
+            sentiment_results (list, optional): Precomputed SentimentAnalyzer results
+            gan_results (list, optional): Precomputed GANDetector results
+
+        Returns:
+            np.ndarray: Cheap fake scores in [0, 0.95]
+        """
+        if sentiment_results is None:
+            sentiment_results = self.sentiment.analyze_reviews(docs, ratings)
+        if gan_results is None:
+            gan_results = self.gan.analyze_reviews(docs)
+
+        scores = np.array([
+            (s["fake_score"] + g["ai_score"]) / 2
+            for s, g in zip(sentiment_results, gan_results)
+        ])
+
+        # Short reviews and shouting are the stylometry model's strongest cues
+        word_counts = np.array([doc.word_count for doc in docs])
+        exclamations = np.array([doc.exclamation_count for doc in docs])
+        scores += np.where(word_counts < 20, 0.1, 0.0) + np.where(exclamations > 2, 0.1, 0.0)
+        return np.minimum(0.95, scores)
+
+    def analyze_reviews(self, texts, ratings=None, sentiment_results=None, gan_results=None):
+        """
+        Score reviews, escalating only the ambiguous ones to the model
+
+        Args:
+            texts (list): Review texts or ReviewDocument objects
+            ratings (list, optional): Star ratings
+            sentiment_results (list, optional): Precomputed SentimentAnalyzer results
+            gan_results (list, optional): Precomputed GANDetector results
+
+        Returns:
+            list: Results with is_fake, fake_score, tier ("cheap" or "model") and reasons
+        """
+        docs = as_documents(texts)
+        cheap = self.cheap_scores(docs, ratings, sentiment_results, gan_results)
+        ambiguous = np.flatnonzero((cheap > self.low) & (cheap < self.high))
+
+        results = [
+            {
+                "is_fake": bool(score >= self.high),
+                "fake_score": float(score),
+                "tier": "cheap",
+                "reasons": self.style._get_stylometry_reasons(doc, score),
+            }
+            for doc, score in zip(docs, cheap)
+        ]
+        if len(ambiguous):
+            escalated = self.style.analyze_reviews([docs[i] for i in ambiguous])
+            for i, result in zip(ambiguous, escalated):
+                results[i] = dict(result, tier="model")
+        return results
+
+    def calibrate(self, texts, labels, ratings=None, lows=None, highs=None):
+        """
+        Report the accuracy/throughput trade-off of threshold pairs on labelled reviews
+
+        Both tiers are run over every review once and timed; each threshold
+        pair is then evaluated from those scores, with throughput estimated
+        from the measured per-review cost of each tier.
+
+        Args:
+            texts (list): Review texts or ReviewDocument objects
+            labels (list): Binary labels (1 for fake, 0 for genuine)
+            ratings (list, optional): Star ratings
+            lows (list, optional): Candidate low thresholds
+            highs (list, optional): Candidate high thresholds
+
+        Returns:
+            dict: Model-only baseline and one entry per threshold pair
+        """
+        docs = as_documents(texts)
+        labels = np.asarray(labels).astype(bool)
+        lows = lows if lows is not None else [0.0, 0.1, 0.2, 0.3, 0.4]
+        highs = highs if highs is not None else [0.6, 0.7, 0.8, 0.9, 1.0]
+
+        start = time.perf_counter()
+        cheap = self.cheap_scores(docs, ratings)
+        cheap_cost = (time.perf_counter() - start) / max(1, len(docs))
+
+        start = time.perf_counter()
+        model = np.array([r["is_fake"] for r in self.style.analyze_reviews(docs)], dtype=bool)
+        model_cost = (time.perf_counter() - start) / max(1, len(docs))
+
+        baseline = {
+            "accuracy": float(np.mean(model == labels)) if len(labels) else None,
+            "reviews_per_second": 1.0 / model_cost if model_cost else None,
+        }
+
+        thresholds = []
+        for low in lows:
+            for high in highs:
+                if low >= high:
+                    continue
+                escalate = (cheap > low) & (cheap < high)
+                predicted = np.where(escalate, model, cheap >= high)
+                cost = cheap_cost + escalate.mean() * model_cost
+                thresholds.append({
+                    "low": low,
+                    "high": high,
+                    "escalated": float(escalate.mean()),
+                    "accuracy": float(np.mean(predicted == labels)),
+                    "agreement_with_model": float(np.mean(predicted == model)),
+                    "reviews_per_second": float(1.0 / cost) if cost else None,
+                    "speedup": float(model_cost / cost) if cost else None,
+                })
+
+        return {
+            "reviews": len(docs),
+            "cheap_cost_ms": cheap_cost * 1000,
+            "model_cost_ms": model_cost * 1000,
+            "model_only": baseline,
+            "thresholds": thresholds,
+        }
@@ -0,0 +1,368 @@
+import numpy as np
+import json
+import os
+from models.minhash import MinHasher
+from models.preprocessing import as_document, as_documents
+
+INDEX_VERSION = 1
+
+class CrossPlatformMatcher:
+    """
+    Cross-Platform Review Matching module that spots reviews duplicated across storefronts.
+    Uses a MinHash/LSH index over normalized review text.
+
+    The index has an immutable base segment, stored on disk as sorted NumPy
+    arrays that are memory-mapped on load, plus an in-memory segment for
+    incremental inserts. Each LSH band is looked up with a binary search in
+    the base segment and a dict lookup in the pending segment, so queries stay
+    sublinear in the number of indexed reviews. save_index() merges both segments.
+    """
+
+    def __init__(self, index_path="models/cross_platform_index", num_perm=128, bands=16,
+                 threshold=0.5, max_bucket_size=1000):
+        self.index_path = index_path
+        self.threshold = threshold
+        self.max_bucket_size = max_bucket_size
+        self.hasher = MinHasher(num_perm=num_perm, bands=bands)
+        self.platforms = []
+        self._platform_codes = {}
+        self._reset_base()
+        self._reset_pending()
+
+        # Load index if it exists, otherwise start empty
+        if os.path.exists(os.path.join(index_path, "meta.json")):
+            try:
+                self.load_index()
+            except Exception as e:
+                print(f"Error loading index: {e}")
+                self._reset_base()
+
+    def __len__(self):
+        return len(self._base_refs) + len(self._pending_refs)
+
+    def add(self, review_id, text, platform):
+        """
+        Insert one review into the index
+
+        Args:
+            review_id (str): Identifier of the review on its platform
+            text (str or ReviewDocument): The review text
+            platform (str): Source storefront, e.g. "amazon"
+        """
+        self.add_many([(review_id, text, platform)])
+
+    def add_many(self, items):
+        """
+        Insert reviews into the in-memory segment
+
+        Args:
+            items (iterable): (review_id, text, platform) tuples
+        """
+        items = list(items)
+        if not items:
+            return
+        signatures = self.hasher.signatures(text for _, text, _ in items)
+        keys = self.hasher.band_keys(signatures)
+        empty = self.hasher.is_empty(signatures)
+
+        for (review_id, _, platform), signature, row_keys, is_empty in zip(items, signatures, keys, empty):
+            self._insert(review_id, platform, signature, row_keys, is_empty)
+
+    def bulk_build(self, items, batch_size=10000):
+        """
+        Build a fresh index from a large collection of reviews
+
+        Signatures are computed in batches and the band tables are sorted
+        once at the end, instead of growing the in-memory buckets per item.
+
+        Args:
+            items (iterable): (review_id, text, platform) tuples
+            batch_size (int): Reviews hashed per batch
+        """
+        self._reset_base()
+        self._reset_pending()
+        self.platforms = []
+        self._platform_codes = {}
+
+        refs, platforms, signature_chunks = [], [], []
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                signature_chunks.append(self._hash_batch(batch, refs, platforms))
+                batch = []
+        if batch:
+            signature_chunks.append(self._hash_batch(batch, refs, platforms))
+
+        signatures = (np.vstack(signature_chunks) if signature_chunks
+                      else np.zeros((0, self.hasher.num_perm), dtype=np.uint32))
+        self._set_base(refs, np.array(platforms, dtype=np.uint16), signatures)
+
+    def query(self, text, threshold=None, exclude_platform=None, limit=10):
+        """
+        Find indexed reviews that are near-duplicates of a text
+
+        Args:
+            text (str or ReviewDocument): The review text
+            threshold (float, optional): Minimum estimated Jaccard similarity
+            exclude_platform (str, optional): Ignore matches from this platform
+            limit (int): Maximum number of matches to return
+
+        Returns:
+            list: Matches as dicts with review_id, platform and score, best first
+        """
+        signature = self.hasher.signature(text)
+        return self._query_signature(signature, threshold, exclude_platform, limit)
+
+    def analyze_review(self, text, platform=None):
+        """
+        Analyze a single review for duplicates on other platforms
+
+        Args:
+            text (str or ReviewDocument): The review text to analyze
+            platform (str, optional): Platform the review was collected from
+
+        Returns:
+            dict: Analysis result with match score, matches and reasons
+        """
+        return self.analyze_reviews([text], [platform])[0]
+
+    def analyze_reviews(self, texts, platforms=None, review_ids=None, update=False):
+        """
+        Analyze multiple review texts
+
+        Args:
+            texts (list): List of review texts or ReviewDocument objects
+            platforms (list, optional): Source platform of each review
+            review_ids (list, optional): Id of each review; an indexed review
+                with the same id is the review itself and never a match
+            update (bool): Insert each review after looking it up, so later
+                reviews, in this batch too, are matched against it
+
+        Returns:
+            list: List of analysis results
+        """
+        docs = as_documents(texts)
+        if platforms is None:
+            platforms = [None] * len(docs)
+        if review_ids is None:
+            review_ids = [None] * len(docs)
+
+        signatures = self.hasher.signatures(docs)
+        if update:
+            keys = self.hasher.band_keys(signatures)
+            empty = self.hasher.is_empty(signatures)
+
+        results = []
+        for i, (signature, platform, review_id) in enumerate(zip(signatures, platforms, review_ids)):
+            matches = self._query_signature(signature, None, platform, 10, review_id)
+            if update:
+                self._insert(review_id, platform, signature, keys[i], empty[i])
+            match_score = matches[0]["score"] if matches else 0.0
+            matched_platforms = sorted({m["platform"] for m in matches})
+            results.append({
+                "is_duplicate": bool(matches),
+                "match_score": match_score,
+                "matches": matches,
+                "platforms": matched_platforms,
+                "reasons": self._get_matching_reasons(matches, matched_platforms)
+            })
+        return results
+
+    def save_index(self):
+        """Merge pending inserts into the base segment and write the index to disk"""
+        if self._pending_refs:
+            refs = list(self._base_refs) + self._pending_refs
+            platforms = np.concatenate([self._base_platforms,
+                                        np.array(self._pending_platforms, dtype=np.uint16)])
+            signatures = np.vstack([self._base_signatures] + self._pending_signatures)
+            self._reset_pending()
+            self._set_base(refs, platforms, signatures)
+
+        os.makedirs(self.index_path, exist_ok=True)
+        self._write_array("signatures.npy", self._base_signatures)
+        self._write_array("platforms.npy", self._base_platforms)
+        self._write_array("band_keys.npy", self._band_keys)
+        self._write_array("band_ids.npy", self._band_ids)
+        self._write_array("refs.npy", np.array(self._base_refs, dtype=str))
+        meta_path = os.path.join(self.index_path, "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "num_perm": self.hasher.num_perm,
+                "bands": self.hasher.bands,
+                "shingle_size": self.hasher.shingle_size,
+                "seed": self.hasher.seed,
+                "count": len(self._base_refs),
+                "platforms": self.platforms,
+            }, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def load_index(self):
+        """Load the index from disk, memory-mapping its arrays"""
+        with open(os.path.join(self.index_path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {meta['version']}")
+
+        self.hasher = MinHasher(num_perm=meta["num_perm"], bands=meta["bands"],
+                                shingle_size=meta["shingle_size"], seed=meta["seed"])
+        self.platforms = meta["platforms"]
+        self._platform_codes = {name: code for code, name in enumerate(self.platforms)}
+
+        load = lambda name: np.load(os.path.join(self.index_path, name), mmap_mode='r')
+        self._base_signatures = load("signatures.npy")
+        self._base_platforms = load("platforms.npy")
+        self._band_keys = load("band_keys.npy")
+        self._band_ids = load("band_ids.npy")
+        self._base_refs = load("refs.npy")
+        self._reset_pending()
+
+    def _write_array(self, name, array):
+        """Write an array next to the current one and swap it in atomically"""
+        # Renaming leaves arrays that are still memory-mapped from the old file intact
+        path = os.path.join(self.index_path, name)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(path + ".tmp", path)
+
+    def _hash_batch(self, batch, refs, platforms):
+        for review_id, _, platform in batch:
+            refs.append(review_id)
+            platforms.append(self._platform_code(platform))
+        return self.hasher.signatures(as_document(text) for _, text, _ in batch)
+
+    def _set_base(self, refs, platforms, signatures):
+        """Replace the base segment and rebuild its sorted band tables"""
+        self._base_refs = refs
+        self._base_platforms = platforms
+        self._base_signatures = signatures
+
+        keys = self.hasher.band_keys(signatures).T  # (bands, n)
+        ids = np.broadcast_to(np.arange(len(signatures), dtype=np.int64), keys.shape)
+
+        # Reviews without shingles never match anything
+        keep = ~self.hasher.is_empty(signatures)
+        keys, ids = keys[:, keep], ids[:, keep]
+
+        order = np.argsort(keys, axis=1, kind='stable')
+        self._band_keys = np.take_along_axis(keys, order, axis=1)
+        self._band_ids = np.take_along_axis(ids, order, axis=1)
+
+    def _candidates(self, signature):
+        """Collect ids sharing at least one LSH bucket with a signature"""
+        candidates = set()
+        for band, key in enumerate(self.hasher.band_keys(signature)[0]):
+            band_keys = self._band_keys[band]
+            lo = np.searchsorted(band_keys, key, side='left')
+            hi = min(np.searchsorted(band_keys, key, side='right'), lo + self.max_bucket_size)
+            candidates.update(self._band_ids[band, lo:hi].tolist())
+            candidates.update(self._pending_buckets[band].get(int(key), ())[:self.max_bucket_size])
+        return candidates
+
+    def _insert(self, review_id, platform, signature, row_keys, is_empty):
+        """Add one hashed review to the in-memory segment"""
+        item_id = len(self)
+        self._pending_refs.append(review_id)
+        self._pending_platforms.append(self._platform_code(platform))
+        self._pending_signatures.append(signature)
+        if is_empty:
+            return
+        for band, key in enumerate(row_keys):
+            self._pending_buckets[band].setdefault(int(key), []).append(item_id)
+
+    def _query_signature(self, signature, threshold, exclude_platform, limit, exclude_id=None):
+        if self.hasher.is_empty(signature)[0] or not len(self):
+            return []
+        threshold = self.threshold if threshold is None else threshold
+        excluded = self._platform_codes.get(exclude_platform) if exclude_platform else None
+
+        ids = np.array(sorted(self._candidates(signature)), dtype=np.int64)
+        if not ids.size:
+            return []
+
+        n_base = len(self._base_refs)
+        scores = self.hasher.similarity(signature, np.vstack([self._signature_at(i, n_base) for i in ids]))
+
+        matches = []
+        for i in np.argsort(-scores, kind='stable'):
+            if scores[i] < threshold:
+                break
+            item_id = int(ids[i])
+            code = self._platform_at(item_id, n_base)
+            if code == excluded:
+                continue
+            ref = str(self._ref_at(item_id, n_base))
+            if exclude_id is not None and ref == str(exclude_id):
+                continue
+            matches.append({
+                "review_id": ref,
+                "platform": self.platforms[code],
+                "score": float(scores[i]),
+            })
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def _signature_at(self, item_id, n_base):
+        if item_id < n_base:
+            return self._base_signatures[item_id]
+        return self._pending_signatures[item_id - n_base]
+
+    def _platform_at(self, item_id, n_base):
+        if item_id < n_base:
+            return int(self._base_platforms[item_id])
+        return self._pending_platforms[item_id - n_base]
+
+    def _ref_at(self, item_id, n_base):
+        if item_id < n_base:
+            return self._base_refs[item_id]
+        return self._pending_refs[item_id - n_base]
+
+    def _platform_code(self, platform):
+        code = self._platform_codes.get(platform)
+        if code is None:
+            code = len(self.platforms)
+            self.platforms.append(platform)
+            self._platform_codes[platform] = code
+        return code
+
+    def _reset_base(self):
+        bands = self.hasher.bands
+        self._base_refs = []
+        self._base_platforms = np.zeros(0, dtype=np.uint16)
+        self._base_signatures = np.zeros((0, self.hasher.num_perm), dtype=np.uint32)
+        self._band_keys = np.zeros((bands, 0), dtype=np.uint64)
+        self._band_ids = np.zeros((bands, 0), dtype=np.int64)
+
+    def _reset_pending(self):
+        self._pending_refs = []
+        self._pending_platforms = []
+        self._pending_signatures = []
+        self._pending_buckets = [{} for _ in range(self.hasher.bands)]
+
+    def _get_matching_reasons(self, matches, platforms):
+        """
+        Extract reasons for why a review might be fake based on cross-platform matches
+
+        Args:
+            matches (list): Matches returned by query
+            platforms (list): Distinct platforms among the matches
+
+        Returns:
+            list: Reasons why the review might be fake
+        """
+        reasons = []
+
+        if not matches:
+            return reasons
+
+        if matches[0]["score"] >= 0.9:
+            reasons.append("Duplicate content")
+        else:
+            reasons.append("Similar to other reviews")
+
+        if len(platforms) > 1:
+            reasons.append(f"Found on {len(platforms)} other platforms")
+
+        return reasons
@@ -0,0 +1,155 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from models.minhash import MinHasher
+from models.preprocessing import as_documents
+
+class DuplicateClusterer:
+    """
+    Clusters near-identical reviews within a single product in roughly linear time.
+
+    Reviews are shingled and MinHashed. Within each LSH band, reviews that
+    share a bucket are compared only against the first review in that bucket,
+    so the number of comparisons grows with reviews x bands rather than
+    reviews squared. Pairs above the similarity threshold become graph edges
+    and clusters are the connected components.
+    """
+
+    def __init__(self, threshold=0.5, duplicate_threshold=0.8, num_perm=128, bands=16):
+        self.threshold = threshold
+        self.duplicate_threshold = duplicate_threshold
+        self.hasher = MinHasher(num_perm=num_perm, bands=bands)
+
+    def find_clusters(self, reviews):
+        """
+        Group a product's reviews into near-duplicate clusters
+
+        The representative of each cluster is the review most likely to be the
+        original: verified purchases first, then the earliest date.
+
+        Args:
+            reviews (list): Review dicts with "id" and "text", optionally "verified" and "date"
+
+        Returns:
+            list: Clusters of two or more reviews, largest first, each with
+                cluster_id, size, representative and members (id and similarity)
+        """
+        if len(reviews) < 2:
+            return []
+
+        signatures = self.hasher.signatures(as_documents(r["text"] for r in reviews))
+        labels = self._label_components(signatures)
+
+        # Group member indices by component with one sort
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        clusters = []
+        for members in np.split(order, bounds):
+            if len(members) < 2:
+                continue
+            representative = min(members, key=lambda i: (not reviews[i].get("verified", False),
+                                                         reviews[i].get("date") or ""))
+            similarity = self.hasher.similarity(signatures[representative], signatures[members])
+            clusters.append({
+                "size": int(len(members)),
+                "representative": reviews[representative]["id"],
+                "members": [
+                    {"id": reviews[i]["id"], "similarity": float(s)}
+                    for i, s in zip(members, similarity)
+                ],
+            })
+
+        clusters.sort(key=lambda c: -c["size"])
+        for cluster_id, cluster in enumerate(clusters):
+            cluster["cluster_id"] = cluster_id
+        return clusters
+
+    def analyze_reviews(self, reviews, clusters=None):
+        """
+        Analyze a product's reviews for copy-paste duplicates
+
+        Args:
+            reviews (list): Review dicts with "id" and "text", optionally "verified" and "date"
+            clusters (list, optional): Output of find_clusters, computed if omitted
+
+        Returns:
+            list: Per-review results with cluster membership and reasons, in input order
+        """
+        if clusters is None:
+            clusters = self.find_clusters(reviews)
+
+        membership = {}
+        for cluster in clusters:
+            for member in cluster["members"]:
+                membership[member["id"]] = (cluster, member["similarity"])
+
+        results = []
+        for review in reviews:
+            cluster, similarity = membership.get(review["id"], (None, 0.0))
+            is_copy = cluster is not None and review["id"] != cluster["representative"]
+            results.append({
+                "is_duplicate": is_copy,
+                "cluster_id": cluster["cluster_id"] if cluster else None,
+                "cluster_size": cluster["size"] if cluster else 1,
+                "similarity": similarity,
+                "reasons": self._get_duplicate_reasons(similarity) if is_copy else []
+            })
+        return results
+
+    def _label_components(self, signatures):
+        """
+        Label each review with its near-duplicate component
+
+        Args:
+            signatures (np.ndarray): MinHash signatures of shape (n, num_perm)
+
+        Returns:
+            np.ndarray: Component label per review
+        """
+        n = len(signatures)
+        keys = self.hasher.band_keys(signatures)
+        candidates = np.flatnonzero(~self.hasher.is_empty(signatures))
+
+        sources, targets = [], []
+        for band in range(self.hasher.bands):
+            # Sort reviews by bucket and pair every review with its bucket's leader
+            order = candidates[np.argsort(keys[candidates, band], kind='stable')]
+            sorted_keys = keys[order, band]
+            starts = np.ones(len(order), dtype=bool)
+            starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            leader_pos = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+            leaders = order[leader_pos]
+
+            pair = leaders != order
+            a, b = leaders[pair], order[pair]
+            if not a.size:
+                continue
+            similar = (signatures[a] == signatures[b]).mean(axis=1) >= self.threshold
+            sources.append(a[similar])
+            targets.append(b[similar])
+
+        if sources:
+            sources = np.concatenate(sources)
+            targets = np.concatenate(targets)
+        else:
+            sources = targets = np.zeros(0, dtype=np.int64)
+
+        graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        return labels
+
+    def _get_duplicate_reasons(self, similarity):
+        """
+        Extract reasons for why a review might be fake based on duplication
+
+        Args:
+            similarity (float): Estimated similarity to the cluster representative
+
+        Returns:
+            list: Reasons why the review might be fake
+        """
+        reasons = []
+        if similarity >= self.duplicate_threshold:
+            reasons.append("Duplicate content")
+        reasons.append("Similar to other reviews")
+        return reasons
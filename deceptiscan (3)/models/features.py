@@ -0,0 +1,242 @@
+import hashlib
+import os
+import re
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+from sklearn.preprocessing import normalize
+from models.preprocessing import as_documents
+
+# Same tokens as the default token_pattern of sklearn's vectorizers
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# N-grams of the full token sequence are joined with a space. N-grams formed
+# after removing stop words use a separator no token contains, so both kinds
+# live in one vocabulary without colliding.
+STOPPED_SEP = "|"
+
+# Bump when extract_terms changes so cached matrices are rebuilt
+FEATURE_VERSION = 1
+
+def extract_terms(lower):
+    """
+    Tokenize a lowercased review once and emit every n-gram any feature view uses
+
+    Args:
+        lower (str): Lowercased review text
+
+    Returns:
+        list: Unigrams and bigrams, plus stop-word-free bigrams and trigrams
+    """
+    tokens = TOKEN_PATTERN.findall(lower)
+    terms = list(tokens)
+    terms.extend(" ".join(tokens[i:i + 2]) for i in range(len(tokens) - 1))
+
+    kept = [token for token in tokens if token not in ENGLISH_STOP_WORDS]
+    for n in (2, 3):
+        terms.extend(STOPPED_SEP.join(kept[i:i + n]) for i in range(len(kept) - n + 1))
+    return terms
+
+def count_terms(docs, terms):
+    """
+    Count the terms of documents against a fixed, sorted vocabulary
+
+    Lookups are a binary search in the sorted term array, so a loaded
+    (memory-mapped) vocabulary is used as is, without building a dict.
+
+    Args:
+        docs (list): ReviewDocument objects
+        terms (np.ndarray): Sorted vocabulary
+
+    Returns:
+        csr_matrix: Term counts of shape (len(docs), len(terms))
+    """
+    doc_terms = [doc.terms for doc in docs]
+    lengths = np.fromiter((len(t) for t in doc_terms), dtype=np.int64, count=len(doc_terms))
+    flat = np.array([term for t in doc_terms for term in t], dtype=str)
+
+    columns = np.searchsorted(terms, flat)
+    found = columns < len(terms)
+    found[found] = terms[columns[found]] == flat[found]
+    rows = np.repeat(np.arange(len(docs)), lengths)
+
+    counts = sparse.csr_matrix(
+        (np.ones(int(found.sum()), dtype=np.int32), (rows[found], columns[found])),
+        shape=(len(docs), len(terms)),
+    )
+    counts.sum_duplicates()
+    return counts
+
+def count_terms_growing(docs, vocabulary):
+    """Count terms, adding unseen ones to vocabulary in order of appearance"""
+    indptr, indices = [0], []
+    for doc in docs:
+        for term in doc.terms:
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+        indptr.append(len(indices))
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(docs), len(vocabulary)),
+    )
+    counts.sum_duplicates()
+    return counts
+
+class FeatureStore:
+    """
+    Shared featurization layer for the analyzers.
+
+    Each review is tokenized and n-grammed once into a single sparse count
+    matrix over a sorted vocabulary. Every analyzer's features are a
+    FeatureView derived from it: a column subset, optionally TF-IDF weighted.
+    With a cache_dir, the matrix of a corpus is saved to disk under a hash of
+    its texts, so retraining one module reuses it instead of featurizing again.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.terms = None
+        self.counts = None
+
+    def fit(self, texts):
+        """
+        Count the terms of a corpus, or load the counts cached for it
+
+        Args:
+            texts (list): Review texts or ReviewDocument objects
+
+        Returns:
+            FeatureStore: self
+        """
+        texts = list(texts)
+        paths = self._cache_paths(texts)
+        if paths and all(os.path.exists(path) for path in paths):
+            try:
+                self.counts = sparse.load_npz(paths[0]).tocsr()
+                self.terms = np.load(paths[1])
+                return self
+            except Exception as e:
+                print(f"Error loading cached features: {e}")
+
+        # Number terms as they are first seen, then renumber them alphabetically
+        vocabulary = {}
+        counts = count_terms_growing(as_documents(texts), vocabulary)
+        terms = np.array(list(vocabulary), dtype=str)
+        order = np.argsort(terms, kind='stable')
+        column = np.empty(len(order), dtype=np.int32)
+        column[order] = np.arange(len(order), dtype=np.int32)
+        counts.indices = column[counts.indices]
+        counts.has_sorted_indices = False
+        counts.sort_indices()
+
+        self.terms = terms[order]
+        self.counts = counts
+
+        if paths:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _write_atomic(paths[0], lambda f: sparse.save_npz(f, counts))
+            _write_atomic(paths[1], lambda f: np.save(f, self.terms))
+        return self
+
+    def _cache_paths(self, texts):
+        """Paths of the cached counts and terms of a corpus, or None without a cache_dir"""
+        if not self.cache_dir:
+            return None
+        digest = hashlib.blake2b(f"v{FEATURE_VERSION}".encode("utf-8"), digest_size=16)
+        for text in texts:
+            digest.update(getattr(text, 'text', text).encode("utf-8"))
+            digest.update(b"\0")
+        key = digest.hexdigest()
+        return (os.path.join(self.cache_dir, f"{key}.counts.npz"),
+                os.path.join(self.cache_dir, f"{key}.terms.npy"))
+
+class FeatureView(TransformerMixin, BaseEstimator):
+    """
+    One analyzer's features, derived from the shared term counts.
+
+    Mirrors the TfidfVectorizer/CountVectorizer it replaces: n-gram range,
+    English stop word removal, the max_features most frequent terms, and
+    smoothed TF-IDF with l2 normalization (or raw counts).
+    """
+
+    def __init__(self, ngram_range=(1, 1), stop_words=None, max_features=None, tfidf=True):
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.max_features = max_features
+        self.tfidf = tfidf
+
+    def fit(self, X, y=None):
+        """
+        Select this view's terms and fit its IDF weights
+
+        Args:
+            X (FeatureStore or list): Shared counts, or review texts to count first
+
+        Returns:
+            FeatureView: self
+        """
+        self._fit_counts(X)
+        return self
+
+    def fit_transform(self, X, y=None):
+        """Fit on a FeatureStore or texts and return the training matrix without recounting"""
+        return self._weight(self._fit_counts(X))
+
+    def transform(self, X):
+        """
+        Compute this view's features for reviews
+
+        Args:
+            X (list): Review texts or ReviewDocument objects, whose terms are reused
+
+        Returns:
+            csr_matrix: Feature matrix of shape (len(X), len(terms_))
+        """
+        return self._weight(count_terms(as_documents(X), self.terms_))
+
+    def get_feature_names_out(self, input_features=None):
+        return self.terms_
+
+    def _fit_counts(self, X):
+        """Fit the view and return its slice of the training counts"""
+        store = X if isinstance(X, FeatureStore) else FeatureStore().fit(X)
+        columns = np.flatnonzero(self._select(store.terms))
+        counts = store.counts[:, columns]
+
+        if self.max_features is not None and len(columns) > self.max_features:
+            totals = np.asarray(counts.sum(axis=0)).ravel()
+            top = np.sort(np.argsort(-totals, kind='stable')[:self.max_features])
+            columns, counts = columns[top], counts[:, top]
+
+        self.terms_ = store.terms[columns]
+        if self.tfidf:
+            n_docs = counts.shape[0]
+            df = np.bincount(counts.indices, minlength=len(columns))
+            self.idf_ = np.log((1 + n_docs) / (1 + df)) + 1
+        return counts
+
+    def _select(self, terms):
+        """Mask of the shared terms that belong to this view"""
+        low, high = self.ngram_range
+        stopped = np.char.count(terms, STOPPED_SEP) > 0
+        n = np.where(stopped, np.char.count(terms, STOPPED_SEP), np.char.count(terms, " ")) + 1
+        in_range = (n >= low) & (n <= high)
+
+        if self.stop_words is None:
+            return in_range & ~stopped
+        # Without stop words, unigrams are the plain ones that aren't stop words
+        is_stop = np.isin(terms, list(ENGLISH_STOP_WORDS))
+        return in_range & np.where(n == 1, ~stopped & ~is_stop, stopped)
+
+    def _weight(self, counts):
+        if not self.tfidf:
+            return counts.astype(np.int64)
+        X = counts.astype(np.float64) @ sparse.diags(self.idf_)
+        return normalize(X.tocsr(), norm='l2', copy=False)
+
+def _write_atomic(path, write):
+    """Write a file through a temporary file so readers never see a partial one"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
@@ -1,181 +1,409 @@
 import numpy as np
-from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.ensemble import RandomForestClassifier
-import joblib
 import os
+from sklearn.base import clone
+from models import registry
+from models.artifacts import save_artifact
+from models.incremental import StreamingTrainer
+from models.features import FeatureView
 import re
+from models.preprocessing import as_document, as_documents
+from models.language import DEFAULT_LANGUAGE, lexicon_path, read_lexicon
+
+# Columns of the AI feature matrix, in order
+FEATURE_NAMES = (
+    "word_count",
+    "avg_word_len",
+    "sentence_count",
+    "avg_sent_len",
+    "has_typical_phrase",
+    "has_balanced_structure",
+    "adj_ratio",
+    "unique_starters_ratio",
+)
+(WORD_COUNT, AVG_WORD_LEN, SENTENCE_COUNT, AVG_SENT_LEN, HAS_TYPICAL_PHRASE,
+ HAS_BALANCED_STRUCTURE, ADJ_RATIO, UNIQUE_STARTERS_RATIO) = range(len(FEATURE_NAMES))
+
+TYPICAL_PHRASES = (
+    "i would recommend",
+    "i highly recommend",
+    "in conclusion",
+    "overall experience",
+    "in summary",
+    "in my opinion",
+)
+ADJECTIVES = ("great", "good", "amazing", "excellent", "wonderful", "fantastic", "awesome")
+PROS_WORDS = ("pros", "advantages", "benefits")
+CONS_WORDS = ("cons", "disadvantages", "drawbacks")
+
+def compile_ai_pattern(phrases, adjectives):
+    """Phrases and adjectives are matched together in a single scan of the text"""
+    words = tuple(phrases) + tuple(adjectives)
+    return re.compile("|".join(re.escape(w) for w in words)) if words else None
+
+def compile_balanced_structure(pros, cons):
+    """Pros followed closely by cons, e.g. 'pros and cons'"""
+    if not pros or not cons:
+        return None
+    return re.compile(r'\b(' + "|".join(map(re.escape, pros)) + r').{1,50}(' + "|".join(map(re.escape, cons)) + r')\b')
+
+AI_PATTERN = compile_ai_pattern(TYPICAL_PHRASES, ADJECTIVES)
+BALANCED_STRUCTURE = compile_balanced_structure(PROS_WORDS, CONS_WORDS)
+
+# Lexicon file categories and the word lists they extend
+LEXICON_CATEGORIES = {
+    "phrase": "typical_phrases",
+    "adjective": "adjectives",
+    "pros": "pros_words",
+    "cons": "cons_words",
+}
 
 class GANDetector:
     """
     Detector for AI-generated review content using text features common in LLM output
     """
     
-    def __init__(self, model_path="models/gan_detector_model.pkl"):
+    def __init__(self, model_path="models/gan_detector_model.artifact", language=DEFAULT_LANGUAGE):
         self.model_path = model_path
-        self.vectorizer = CountVectorizer(
+        self.language = language
+        self.vectorizer = FeatureView(
             ngram_range=(1, 2),
             max_features=5000,
-            analyzer='word'
+            tfidf=False
         )
         self.model = None
         
-        # Load model if it exists, otherwise create a new one
-        if os.path.exists(model_path):
-            try:
-                self.load_model()
-            except Exception as e:
-                print(f"Error loading model: {e}")
-                self.model = RandomForestClassifier()
-        else:
-            self.model = RandomForestClassifier()
+        # The saved model is loaded from the shared registry on first use
+        self._model_loaded = False
+        
+        # Phrases and words typical of generated reviews
+        self.typical_phrases = list(TYPICAL_PHRASES)
+        self.adjectives = list(ADJECTIVES)
+        self.pros_words = list(PROS_WORDS)
+        self.cons_words = list(CONS_WORDS)
+        self._ai_pattern = AI_PATTERN
+        self._adjective_set = set(ADJECTIVES)
+        self._balanced_structure = BALANCED_STRUCTURE
+        
+        # Other languages start from empty lists and load their lexicon file
+        if language != DEFAULT_LANGUAGE:
+            for attr in LEXICON_CATEGORIES.values():
+                setattr(self, attr, [])
+            path = lexicon_path(language, 'gan')
+            if os.path.exists(path):
+                self.load_lexicon(path)
+            else:
+                self._compile_patterns()
     
-    def train(self, texts, labels):
+    def train(self, texts, labels, features=None):
         """
         Train the GAN detector model
         
         Args:
             texts (list): List of review texts
             labels (list): Binary labels (1 for AI-generated, 0 for human-written)
+            features (FeatureStore, optional): Term counts of texts shared with the
+                other analyzers, counted from texts if not given
         """
-        X = self.vectorizer.fit_transform(texts)
+        # Fit fresh copies so models shared through the registry aren't mutated
+        self._ensure_model()
+        self.vectorizer = clone(self.vectorizer)
+        self.model = clone(self.model)
+        
+        X = self.vectorizer.fit_transform(features if features is not None else texts)
         self.model.fit(X, labels)
         
         # Save the model
         self.save_model()
     
+    def train_streaming(self, make_batches, epochs=1, **trainer_options):
+        """
+        Train out of core on labelled minibatches streamed from disk
+        
+        Uses hashed 1-2-gram counts and a logistic SGD model updated with
+        partial_fit, calibrated on held-out minibatches (see StreamingTrainer).
+        
+        Args:
+            make_batches (callable): Returns a fresh iterable of (texts, labels) minibatches,
+                labels being binary labels (1 for AI-generated, 0 for human-written)
+            epochs (int): Passes over the training minibatches
+            **trainer_options: Passed to StreamingTrainer
+            
+        Returns:
+            dict: Held-out evaluation report
+        """
+        vectorizer = HashingVectorizer(
+            ngram_range=(1, 2),
+            n_features=2 ** 20,
+            alternate_sign=False,
+            norm=None
+        )
+        trainer = StreamingTrainer(vectorizer, **trainer_options)
+        self.model = trainer.fit(make_batches, epochs)
+        self.vectorizer = vectorizer
+        self._model_loaded = True
+        
+        # Save the model
+        self.save_model()
+        return trainer.report
+    
+    def load_lexicon(self, path):
+        """
+        Extend the phrase and word lists from a tab-separated file
+        
+        Each line holds ``phrase<TAB>category`` (see models.language.read_lexicon)
+        with a category from LEXICON_CATEGORIES; others are ignored.
+        
+        Args:
+            path (str): Path to the lexicon file
+        """
+        for phrase, category in read_lexicon(path):
+            if category in LEXICON_CATEGORIES:
+                getattr(self, LEXICON_CATEGORIES[category]).append(phrase)
+        
+        self._compile_patterns()
+    
+    def _compile_patterns(self):
+        """Compile the phrase and word lists into the patterns used by feature extraction"""
+        self._ai_pattern = compile_ai_pattern(self.typical_phrases, self.adjectives)
+        self._adjective_set = set(self.adjectives)
+        self._balanced_structure = compile_balanced_structure(self.pros_words, self.cons_words)
+    
     def analyze_review(self, text):
         """
         Analyze a single review text for AI-generated patterns
         
         Args:
-            text (str): The review text to analyze
+            text (str or ReviewDocument): The review text to analyze
             
         Returns:
             dict: Analysis result with prediction and confidence score
         """
-        # Extract features that might indicate AI generation
-        features = self._extract_ai_features(text)
-        
-        # For demo purposes, calculate a fake score based on features
-        fake_score = self._calculate_ai_score(features)
-        
-        return {
-            "is_ai_generated": fake_score > 0.7,
-            "ai_score": float(fake_score),
-            "features": features,
-            "reasons": self._get_ai_reasons(text, features, fake_score)
-        }
+        return self.analyze_reviews([as_document(text)])[0]
     
     def analyze_reviews(self, texts):
         """
         Analyze multiple review texts
         
+        Features for all texts are extracted into one matrix and scored in a
+        single vectorized pass.
+        
         Args:
-            texts (list): List of review texts
+            texts (list): List of review texts or ReviewDocument objects
             
         Returns:
             list: List of analysis results
         """
-        return [self.analyze_review(text) for text in texts]
+        docs = as_documents(texts)
+        
+        # Extract features that might indicate AI generation
+        feature_matrix = self.extract_features_batch(docs)
+        
+        # For demo purposes, calculate a fake score based on features
+        fake_scores = self._calculate_ai_score(feature_matrix)
+        
+        results = []
+        for doc, row, fake_score in zip(docs, feature_matrix, fake_scores):
+            features = self._features_to_dict(row)
+            results.append({
+                "is_ai_generated": bool(fake_score > 0.7),
+                "ai_score": float(fake_score),
+                "features": features,
+                "reasons": self._get_ai_reasons(doc, features, fake_score)
+            })
+        
+        return results
     
     def save_model(self):
         """Save the trained model to disk"""
         if self.model is not None:
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            joblib.dump({
+            save_artifact(self.model_path, {
                 'model': self.model,
                 'vectorizer': self.vectorizer
-            }, self.model_path)
+            }, metadata={'analyzer': 'GANDetector'})
+            registry.invalidate(self.model_path)
     
     def load_model(self):
         """Load the trained model from disk"""
-        if os.path.exists(self.model_path):
-            saved_model = joblib.load(self.model_path)
+        path = registry.resolve_model_path(self.model_path)
+        if path is not None:
+            saved_model = registry.load_artifact(path)
             self.model = saved_model['model']
             self.vectorizer = saved_model['vectorizer']
+            self._model_loaded = True
     
-    def _extract_ai_features(self, text):
+    def _ensure_model(self):
+        """Load the saved model on first use, otherwise create a new one"""
+        if self._model_loaded:
+            return
+        self._model_loaded = True
+        
+        if registry.resolve_model_path(self.model_path) is not None:
+            try:
+                self.load_model()
+                return
+            except Exception as e:
+                print(f"Error loading model: {e}")
+        self.model = RandomForestClassifier()
+    
+    def extract_features_batch(self, texts):
         """
-        Extract features that might indicate AI generation
+        Extract AI-related features for a batch of texts
         
         Args:
-            text (str): The review text
+            texts (list): List of review texts or ReviewDocument objects
             
         Returns:
-            dict: AI-related text features
+            np.ndarray: Matrix of shape (len(texts), len(FEATURE_NAMES))
+        """
+        matrix = np.zeros((len(texts), len(FEATURE_NAMES)), dtype=np.float64)
+        for i, text in enumerate(texts):
+            matrix[i] = self._extract_ai_features(as_document(text))
+        return matrix
+    
+    def _extract_ai_features(self, doc):
         """
-        # Normalize text
-        text_lower = text.lower()
-        words = text_lower.split()
+        Extract features that might indicate AI generation
         
-        # Word count
-        word_count = len(words)
+        Args:
+            doc (ReviewDocument): The preprocessed review
+            
+        Returns:
+            list: Feature values ordered as FEATURE_NAMES
+        """
+        text_lower = doc.lower
+        words = doc.words
+        word_count = doc.word_count
         
         # Average word length
-        avg_word_len = np.mean([len(w) for w in words]) if words else 0
+        avg_word_len = sum(len(w) for w in words) / word_count if word_count else 0
         
-        # Sentence count
-        sentences = re.split(r'[.!?]+', text)
-        sentence_count = len([s for s in sentences if s.strip()])
+        # Sentences are reused for count and starters
+        sentences = doc.sentences
+        sentence_count = doc.sentence_count
         
         # Average sentence length
         avg_sent_len = word_count / sentence_count if sentence_count > 0 else 0
         
-        # Common AI patterns
-        has_typical_phrase = any(phrase in text_lower for phrase in [
-            "i would recommend", 
-            "i highly recommend",
-            "in conclusion",
-            "overall experience",
-            "in summary",
-            "in my opinion"
-        ])
+        # Common AI patterns and redundant adjectives in one pass
+        has_typical_phrase = False
+        adj_count = 0
+        if self._ai_pattern is not None:
+            for match in self._ai_pattern.finditer(text_lower):
+                if match.group() in self._adjective_set:
+                    adj_count += 1
+                else:
+                    has_typical_phrase = True
+        adj_ratio = adj_count / word_count if word_count > 0 else 0
         
         # Check for balanced structure (e.g., 'pros and cons')
-        has_balanced_structure = bool(re.search(r'\b(pros|advantages|benefits).{1,50}(cons|disadvantages|drawbacks)\b', text_lower))
-        
-        # Check for redundant adjectives
-        adjectives = ["great", "good", "amazing", "excellent", "wonderful", "fantastic", "awesome"]
-        adj_count = sum(text_lower.count(adj) for adj in adjectives)
-        adj_ratio = adj_count / word_count if word_count > 0 else 0
+        has_balanced_structure = (
+            self._balanced_structure is not None and self._balanced_structure.search(text_lower) is not None
+        )
         
         # Repeated sentence structures
-        sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
-        sentence_starters = [s.split()[0].lower() if s.split() else "" for s in sentences]
-        unique_starters_ratio = len(set(sentence_starters)) / len(sentence_starters) if sentence_starters else 0
+        sentence_starters = [s.split()[0].lower() for s in sentences]
+        unique_starters_ratio = len(set(sentence_starters)) / sentence_count if sentence_count else 0
         
+        return [
+            word_count,
+            avg_word_len,
+            sentence_count,
+            avg_sent_len,
+            has_typical_phrase,
+            has_balanced_structure,
+            adj_ratio,
+            unique_starters_ratio,
+        ]
+    
+    def _features_to_dict(self, row):
+        """
+        Convert a feature matrix row into a named feature dict
+        
+        Args:
+            row (np.ndarray): One row of the AI feature matrix
+            
+        Returns:
+            dict: AI-related text features
+        """
         return {
-            "word_count": word_count,
-            "avg_word_len": avg_word_len,
-            "sentence_count": sentence_count,
-            "avg_sent_len": avg_sent_len,
-            "has_typical_phrase": has_typical_phrase,
-            "has_balanced_structure": has_balanced_structure,
-            "adj_ratio": adj_ratio,
-            "unique_starters_ratio": unique_starters_ratio
+            "word_count": int(row[WORD_COUNT]),
+            "avg_word_len": float(row[AVG_WORD_LEN]),
+            "sentence_count": int(row[SENTENCE_COUNT]),
+            "avg_sent_len": float(row[AVG_SENT_LEN]),
+            "has_typical_phrase": bool(row[HAS_TYPICAL_PHRASE]),
+            "has_balanced_structure": bool(row[HAS_BALANCED_STRUCTURE]),
+            "adj_ratio": float(row[ADJ_RATIO]),
+            "unique_starters_ratio": float(row[UNIQUE_STARTERS_RATIO]),
         }
     
     def _calculate_ai_score(self, features):
         """
-        Calculate an AI-generation likelihood score based on features
+        Calculate AI-generation likelihood scores from a feature matrix
         
         Args:
-            features (dict): AI-related text features
+            features (np.ndarray): AI feature matrix, one row per review
             
         Returns:
-            float: AI score between 0 and 1
+            np.ndarray: AI scores between 0 and 1, one per review
         """
-        score = 0.0
+        features = np.atleast_2d(features)
+        sentence_count = features[:, SENTENCE_COUNT]
+        avg_sent_len = features[:, AVG_SENT_LEN]
         
         # Very short or very long reviews might be suspicious
-        if features["sentence_count"] == 1:
-            score += 0.1
-        elif features["sentence_count"] > 10:
-            score += 0.2
+        score = np.where(sentence_count == 1, 0.1, np.where(sentence_count > 10, 0.2, 0.0))
         
         # Overly consistent sentence length is suspicious
-        if 15 < features["avg_sent_len"] < 25:
-            score += 0.15
+        score += np.where((avg_sent_len > 15) & (avg_sent_len < 25), 0.15, 0.0)
         
         # Typical LLM phrases
-        if features
+        score += 0.25 * features[:, HAS_TYPICAL_PHRASE]
+        
+        # Formulaic pros/cons structure
+        score += 0.15 * features[:, HAS_BALANCED_STRUCTURE]
+        
+        # Heavy use of generic adjectives
+        score += np.where(features[:, ADJ_RATIO] > 0.1, 0.2, 0.0)
+        
+        # Most sentences starting the same way
+        score += np.where((sentence_count > 2) & (features[:, UNIQUE_STARTERS_RATIO] < 0.5), 0.15, 0.0)
+        
+        # Cap the score at 0.95
+        return np.minimum(score, 0.95)
+    
+    def _get_ai_reasons(self, doc, features, fake_score):
+        """
+        Extract reasons for why a review might be AI-generated
+        
+        Args:
+            doc (ReviewDocument): The preprocessed review
+            features (dict): AI-related text features
+            fake_score (float): The AI-generation score
+            
+        Returns:
+            list: Reasons why the review might be AI-generated
+        """
+        reasons = []
+        
+        if fake_score <= 0.7:
+            return reasons
+        
+        if features["has_typical_phrase"]:
+            reasons.append("Contains phrases typical of AI-generated text")
+        
+        if features["has_balanced_structure"]:
+            reasons.append("Formulaic pros-and-cons structure")
+        
+        if features["adj_ratio"] > 0.1:
+            reasons.append("Overuse of generic adjectives")
+        
+        if features["sentence_count"] > 2 and features["unique_starters_ratio"] < 0.5:
+            reasons.append("Repetitive sentence structure")
+        
+        if 15 < features["avg_sent_len"] < 25:
+            reasons.append("Unusually uniform sentence length")
+        
+        return reasons
@@ -0,0 +1,171 @@
+import csv
+import json
+import numpy as np
+from itertools import islice
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+def read_labelled_reviews(path, fmt="jsonl", text_field="text", label_field="label"):
+    """
+    Stream labelled reviews from a JSONL or CSV file
+
+    Args:
+        path (str): Input file
+        fmt (str): "jsonl" or "csv"
+        text_field (str): Column holding the review text
+        label_field (str): Column holding the label (1 for fake, 0 for genuine)
+
+    Yields:
+        tuple: (text, label)
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = csv.DictReader(f) if fmt == "csv" else (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            yield row.get(text_field) or "", int(float(row[label_field]))
+
+def minibatches(reviews, batch_size=10000):
+    """
+    Group (text, label) pairs into minibatches
+
+    Args:
+        reviews (iterable): (text, label) pairs
+        batch_size (int): Reviews per minibatch
+
+    Yields:
+        tuple: (list of texts, np.ndarray of labels)
+    """
+    reviews = iter(reviews)
+    while True:
+        chunk = list(islice(reviews, batch_size))
+        if not chunk:
+            return
+        texts, labels = zip(*chunk)
+        yield list(texts), np.asarray(labels)
+
+class CalibratedLinearClassifier:
+    """
+    Linear classifier trained with partial_fit, with Platt scaling fit on
+    held-out minibatches. Exposes classes_ and predict_proba like the
+    sklearn models it replaces.
+    """
+
+    def __init__(self, estimator, slope, intercept):
+        self.estimator = estimator
+        self.slope = slope
+        self.intercept = intercept
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def decision_function(self, X):
+        return _decision_scores(self.estimator, X)
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-(self.slope * self.decision_function(X) + self.intercept)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+class StreamingTrainer:
+    """
+    Out-of-core trainer for the analyzers.
+
+    Minibatches are vectorized with a stateless HashingVectorizer, so no
+    vocabulary is built, and fed to an incremental learner with partial_fit.
+    Every holdout_every-th minibatch is kept out of training; after the last
+    epoch those minibatches are scored to fit the probability calibration and
+    report held-out metrics. Memory is bounded by the minibatch size and the
+    hashed feature space, not by the number of reviews.
+    """
+
+    def __init__(self, vectorizer, estimator=None, holdout_every=20, max_holdout=1000000, seed=0):
+        """
+        Args:
+            vectorizer (HashingVectorizer): Stateless vectorizer
+            estimator (optional): Learner with partial_fit, defaults to logistic SGD
+            holdout_every (int): Keep every n-th minibatch for calibration
+            max_holdout (int): Maximum held-out reviews used for calibration
+            seed (int): Seed for shuffling within minibatches
+        """
+        self.vectorizer = vectorizer
+        self.estimator = estimator or SGDClassifier(loss='log_loss', alpha=1e-5, random_state=seed)
+        self.holdout_every = holdout_every
+        self.max_holdout = max_holdout
+        self.rng = np.random.default_rng(seed)
+        self.report = None
+
+    def fit(self, make_batches, epochs=1, classes=(0, 1)):
+        """
+        Train on minibatches streamed from disk
+
+        Args:
+            make_batches (callable): Returns a fresh iterable of (texts, labels)
+                minibatches each time it is called, in the same order
+            epochs (int): Passes over the training minibatches
+            classes (tuple): All labels, required by partial_fit
+
+        Returns:
+            CalibratedLinearClassifier: The calibrated model
+        """
+        classes = np.asarray(classes)
+        trained = 0
+        for _ in range(epochs):
+            for i, (texts, labels) in enumerate(make_batches()):
+                if self._is_holdout(i):
+                    continue
+                order = self.rng.permutation(len(labels))
+                X = self.vectorizer.transform([texts[j] for j in order])
+                self.estimator.partial_fit(X, labels[order], classes=classes)
+                trained += len(labels)
+
+        scores, targets = self._holdout_scores(make_batches)
+        model = self._calibrate(scores, targets, classes)
+        self.report = self._evaluate(model, scores, targets, trained, epochs)
+        return model
+
+    def _is_holdout(self, i):
+        return self.holdout_every > 1 and i % self.holdout_every == self.holdout_every - 1
+
+    def _holdout_scores(self, make_batches):
+        """Score the held-out minibatches with the trained learner"""
+        scores, targets, n = [], [], 0
+        for i, (texts, labels) in enumerate(make_batches()):
+            if not self._is_holdout(i):
+                continue
+            scores.append(_decision_scores(self.estimator, self.vectorizer.transform(texts)))
+            targets.append(labels)
+            n += len(labels)
+            if n >= self.max_holdout:
+                break
+        if not scores:
+            return np.zeros(0), np.zeros(0, dtype=int)
+        return np.concatenate(scores)[:self.max_holdout], np.concatenate(targets)[:self.max_holdout]
+
+    def _calibrate(self, scores, targets, classes):
+        """Fit Platt scaling on held-out scores, or keep the raw scores without both classes"""
+        if len(np.unique(targets)) < 2:
+            return CalibratedLinearClassifier(self.estimator, 1.0, 0.0)
+        platt = LogisticRegression(C=1e6)
+        platt.fit(scores.reshape(-1, 1), targets == classes[1])
+        return CalibratedLinearClassifier(self.estimator, float(platt.coef_[0, 0]), float(platt.intercept_[0]))
+
+    def _evaluate(self, model, scores, targets, trained, epochs):
+        report = {"trained_reviews": trained, "epochs": epochs, "holdout_reviews": int(len(targets))}
+        if len(targets):
+            p = 1.0 / (1.0 + np.exp(-(model.slope * scores + model.intercept)))
+            y = (targets == model.classes_[1]).astype(float)
+            clipped = np.clip(p, 1e-12, 1 - 1e-12)
+            report.update({
+                "accuracy": float(np.mean((p > 0.5) == y)),
+                "log_loss": float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+                "brier_score": float(np.mean((p - y) ** 2)),
+            })
+        return report
+
+def _decision_scores(estimator, X):
+    """Signed score of the positive class, from decision_function or log-odds"""
+    if hasattr(estimator, 'decision_function'):
+        return estimator.decision_function(X)
+    proba = np.clip(estimator.predict_proba(X)[:, 1], 1e-12, 1 - 1e-12)
+    return np.log(proba / (1 - proba))
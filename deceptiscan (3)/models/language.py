@@ -0,0 +1,437 @@
+"""
+Language identification and per-language routing of the text analyzers.
+
+Each review is assigned a language by a compact character n-gram model
+(hashed 1-3-grams scored by multinomial naive Bayes), identified a batch at
+a time from per-token scores computed once per distinct token.
+LanguageRouter then splits a batch by language and scores each group with
+that language's analyzer, built from the language's lexicons
+in models/lexicons/<language>/ and its own model artifact. Analyzers are
+created on first use and kept in a shared LRU bounded by the size of their
+artifacts, so a worker only holds the languages it is currently seeing.
+"""
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from models import registry
+from models.artifacts import save_artifact
+from models.preprocessing import as_documents
+
+DEFAULT_LANGUAGE = "en"
+
+# Per-language samples.txt (identifier training text) and <analyzer>.tsv lexicons
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons")
+
+# Longer reviews are identified from their first words
+MAX_IDENTIFY_WORDS = 200
+
+# Tokens whose language scores are remembered before the memo is reset
+MAX_CACHED_TOKENS = 200000
+
+def lexicon_path(language, name):
+    """
+    Path of a language's lexicon file for one analyzer
+
+    Args:
+        language (str): Language code, e.g. "es"
+        name (str): Lexicon name, e.g. "sentiment"
+
+    Returns:
+        str: Path of models/lexicons/<language>/<name>.tsv
+    """
+    return os.path.join(LEXICON_DIR, language, f"{name}.tsv")
+
+def read_lexicon(path):
+    """
+    Read a tab-separated lexicon file
+
+    Each line holds ``word<TAB>category`` with an optional third column
+    flagging the association; lines flagged 0 are skipped.
+
+    Args:
+        path (str): Path to the lexicon file
+
+    Yields:
+        tuple: (lowercased word or phrase, lowercased category)
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) < 2 or (len(parts) > 2 and parts[2].strip() == '0'):
+                continue
+            yield parts[0].lower(), parts[1].lower()
+
+def language_model_path(model_path, language):
+    """
+    Artifact path of a language's model, e.g. models/sentiment_model.es.artifact
+
+    English keeps the analyzer's default path.
+
+    Args:
+        model_path (str): The analyzer's (English) artifact path
+        language (str): Language code
+
+    Returns:
+        str: Path of the language's artifact
+    """
+    if language == DEFAULT_LANGUAGE:
+        return model_path
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.{language}{ext}"
+
+def available_languages():
+    """Languages with identifier samples under models/lexicons"""
+    return sorted(
+        language for language in os.listdir(LEXICON_DIR)
+        if os.path.exists(os.path.join(LEXICON_DIR, language, "samples.txt"))
+    )
+
+class LanguageIdentifier:
+    """
+    Batched language identification with a character n-gram model.
+    """
+
+    def __init__(self, model_path="models/language_model.artifact", languages=None,
+                 default=DEFAULT_LANGUAGE, min_confidence=0.6, min_words=3):
+        """
+        Args:
+            model_path (str): Saved model, trained from the built-in samples if missing
+            languages (list, optional): Languages to choose between, all known ones by default
+            default (str): Language of reviews too short or too ambiguous to identify
+            min_confidence (float): Probability needed to assign a language other than the default
+            min_words (int): Reviews with fewer words get the default language
+        """
+        self.model_path = model_path
+        self.languages = list(languages) if languages else None
+        self.default = default
+        self.min_confidence = min_confidence
+        self.min_words = min_words
+        self.vectorizer = HashingVectorizer(
+            analyzer='char_wb',
+            ngram_range=(1, 3),
+            n_features=2 ** 18,
+            alternate_sign=False,
+            norm=None
+        )
+        self.model = None
+        self._lock = threading.Lock()
+
+        # The saved model is loaded from the shared registry on first use
+        self._model_loaded = False
+
+    def train(self, texts, languages):
+        """
+        Train the identifier
+
+        Args:
+            texts (list): Review texts or ReviewDocument objects
+            languages (list): Language code of each text
+        """
+        # Scored token by token like the reviews being identified
+        docs = as_documents(texts)
+        self.model = MultinomialNB(alpha=0.01, fit_prior=False)
+        self.model.fit(self.vectorizer.transform([" ".join(doc.tokens) for doc in docs]), languages)
+        self._prepare()
+
+    def train_from_samples(self):
+        """Train on the sample sentences shipped in models/lexicons"""
+        texts, languages = [], []
+        for language in self.languages or available_languages():
+            path = os.path.join(LEXICON_DIR, language, "samples.txt")
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                lines = [line.strip() for line in f if line.strip()]
+            texts.extend(lines)
+            languages.extend([language] * len(lines))
+        self.train(texts, languages)
+
+    def identify(self, texts):
+        """
+        Identify the language of each review
+
+        The result is kept on each ReviewDocument, so analyzers sharing the
+        documents of a batch identify them once.
+
+        Args:
+            texts (list): Review texts or ReviewDocument objects
+
+        Returns:
+            list: Language codes in input order
+        """
+        docs = as_documents(texts)
+        pending = [doc for doc in docs if doc.language is None]
+        if pending:
+            for doc, language in zip(pending, self._predict(pending)):
+                doc.language = language
+        return [doc.language for doc in docs]
+
+    def save_model(self):
+        """Save the trained model to disk"""
+        if self.model is not None:
+            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+            save_artifact(self.model_path, {
+                'model': self.model,
+                'vectorizer': self.vectorizer
+            }, metadata={'analyzer': 'LanguageIdentifier'})
+            registry.invalidate(self.model_path)
+
+    def load_model(self):
+        """Load the trained model from disk"""
+        if os.path.exists(self.model_path):
+            saved_model = registry.load_artifact(self.model_path)
+            self.model = saved_model['model']
+            self.vectorizer = saved_model['vectorizer']
+            self._prepare()
+            self._model_loaded = True
+
+    def _ensure_model(self):
+        """Load the saved model on first use, otherwise train one from the samples"""
+        with self._lock:
+            if self._model_loaded:
+                return
+            if os.path.exists(self.model_path):
+                try:
+                    self.load_model()
+                    return
+                except Exception as e:
+                    print(f"Error loading model: {e}")
+            self.train_from_samples()
+            self._model_loaded = True
+
+    def _prepare(self):
+        """Reset the per-token scores and allowed languages after training or loading"""
+        self._token_ids = {}
+        self._token_scores = np.zeros((0, len(self.model.classes_)))
+
+        # Reviews identified as a language that isn't configured get the default
+        classes = list(self.model.classes_)
+        self._allowed = [self.languages is None or language in self.languages for language in classes]
+
+    def _predict(self, docs):
+        """
+        Identify a batch of reviews
+
+        char_wb n-grams never cross a word boundary, so the naive Bayes log
+        likelihood of a review is the sum of those of its tokens. Each token
+        is scored once, through the vectorizer, and remembered; a batch then
+        costs a dict lookup per token and one summing pass over the batch.
+
+        Args:
+            docs (list): ReviewDocument objects
+
+        Returns:
+            list: Language codes in input order
+        """
+        languages = [self.default] * len(docs)
+        index = [i for i, doc in enumerate(docs) if len(doc.tokens) >= max(1, self.min_words)]
+        if not index:
+            return languages
+
+        self._ensure_model()
+        with self._lock:
+            if len(self._token_ids) > MAX_CACHED_TOKENS:
+                self._prepare()
+            token_ids = self._token_ids
+            ids, offsets, new = [], [], []
+            for i in index:
+                offsets.append(len(ids))
+                for token in docs[i].tokens[:MAX_IDENTIFY_WORDS]:
+                    token_id = token_ids.get(token)
+                    if token_id is None:
+                        token_id = token_ids[token] = len(token_ids)
+                        new.append(token)
+                    ids.append(token_id)
+            if new:
+                X = self.vectorizer.transform(new)
+                self._token_scores = np.concatenate(
+                    [self._token_scores, np.asarray(X @ self.model.feature_log_prob_.T)])
+            token_scores = self._token_scores
+
+        scores = np.add.reduceat(token_scores[ids], offsets) + self.model.class_log_prior_
+
+        # Softmax of the joint log likelihoods
+        scores -= scores.max(axis=1, keepdims=True)
+        proba = np.exp(scores)
+        proba /= proba.sum(axis=1, keepdims=True)
+
+        best = proba.argmax(axis=1)
+        confidence = proba[np.arange(len(best)), best]
+        classes = self.model.classes_
+        for i, label, p in zip(index, best, confidence):
+            if p >= self.min_confidence and self._allowed[label]:
+                languages[i] = str(classes[label])
+        return languages
+
+class LanguageModels:
+    """
+    Per-language analyzers loaded on first use, kept in an LRU capped by size.
+
+    Sizes are those of the analyzers' artifacts and lexicon files, which is
+    what they keep resident once loaded. Evicting an analyzer also drops its
+    artifact from the registry, so the memory is released once no batch is
+    still using it.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        """
+        Args:
+            max_bytes (int): Total size of the analyzers kept loaded
+        """
+        self.max_bytes = max_bytes
+        self.loads = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        """
+        Return the analyzer stored under key, loading it if needed
+
+        Args:
+            key (tuple): (analyzer name, language)
+            load (callable): Returns (analyzer, size in bytes) for a missing key
+
+        Returns:
+            object: The analyzer
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+            analyzer, size = load()
+            self._entries[key] = (analyzer, size)
+            self._size += size
+            self.loads += 1
+
+            # The analyzer just loaded stays, even on its own above the cap
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, (evicted, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+                registry.invalidate(evicted.model_path)
+            return analyzer
+
+    def stats(self):
+        """
+        Report what is loaded
+
+        Returns:
+            dict: Loaded keys, their total size, and load and eviction counters
+        """
+        with self._lock:
+            return {
+                "loaded": [list(key) for key in self._entries],
+                "bytes": self._size,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+class LanguageRouter:
+    """
+    Scores each review with the analyzer of its language.
+
+    Batches are split by language, each group is scored in one call of that
+    language's analyzer, and results come back in input order with the
+    language added.
+    """
+
+    def __init__(self, analyzer_class, name, identifier, models, model_path):
+        """
+        Args:
+            analyzer_class (type): Analyzer taking model_path and language arguments
+            name (str): Analyzer name, also the name of its lexicon files
+            identifier (LanguageIdentifier): Assigns each review its language
+            models (LanguageModels): Loaded analyzers, shared by all routers
+            model_path (str): The English artifact; other languages derive theirs from it
+        """
+        self.analyzer_class = analyzer_class
+        self.name = name
+        self.identifier = identifier
+        self.models = models
+        self.model_path = model_path
+
+    def __getattr__(self, name):
+        # Anything else comes from the default language's analyzer
+        if name in ('analyzer_class', 'name', 'identifier', 'models', 'model_path'):
+            raise AttributeError(name)
+        return getattr(self.analyzer(self.identifier.default), name)
+
+    def analyzer(self, language):
+        """
+        Return the analyzer of a language, loading it on first use
+
+        Args:
+            language (str): Language code
+
+        Returns:
+            object: The language's analyzer
+        """
+        def load():
+            model_path = language_model_path(self.model_path, language)
+            size = sum(
+                os.path.getsize(path)
+                for path in (model_path, lexicon_path(language, self.name))
+                if os.path.exists(path)
+            )
+            return self.analyzer_class(model_path, language=language), size
+
+        return self.models.get((self.name, language), load)
+
+    def model_version(self):
+        """
+        Combined version of every language's artifact, for the verdict cache
+
+        Returns:
+            str: Changes whenever any language's model is saved
+        """
+        from models.cache import artifact_version
+        languages = self.identifier.languages or available_languages()
+        return ",".join(
+            f"{language}:{artifact_version(language_model_path(self.model_path, language))}"
+            for language in languages
+        )
+
+    def analyze_review(self, text, *args):
+        """
+        Analyze a single review with the analyzer of its language
+
+        Args:
+            text (str or ReviewDocument): The review text to analyze
+            *args: Further per-review arguments of the analyzer, e.g. the rating
+
+        Returns:
+            dict: Analysis result with its language
+        """
+        return self.analyze_reviews([text], *[[arg] for arg in args])[0]
+
+    def analyze_reviews(self, texts, *columns):
+        """
+        Analyze multiple reviews in one batch per language
+
+        Args:
+            texts (list): List of review texts or ReviewDocument objects
+            *columns: Further per-review lists of the analyzer, e.g. ratings (or None)
+
+        Returns:
+            list: List of analysis results with their language
+        """
+        docs = as_documents(texts)
+        groups = {}
+        for i, language in enumerate(self.identifier.identify(docs)):
+            groups.setdefault(language, []).append(i)
+
+        results = [None] * len(docs)
+        for language, index in groups.items():
+            args = [None if column is None else [column[i] for i in index] for column in columns]
+            scored = self.analyzer(language).analyze_reviews([docs[i] for i in index], *args)
+            for i, result in zip(index, scored):
+                result["language"] = language
+                results[i] = result
+        return results
@@ -0,0 +1,112 @@
+import numpy as np
+import zlib
+from models.preprocessing import as_document
+
+# Mersenne prime used for the universal hash family
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+def shingle_hashes(text, k=3):
+    """
+    Hash the word k-gram shingles of a review's normalized text
+
+    Args:
+        text (str or ReviewDocument): The review
+        k (int): Words per shingle
+
+    Returns:
+        np.ndarray: Unique 32-bit shingle hashes as uint64
+    """
+    tokens = as_document(text).tokens
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    if len(tokens) < k:
+        grams = [" ".join(tokens)]
+    else:
+        grams = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    return np.unique(np.array([zlib.crc32(g.encode('utf-8')) for g in grams], dtype=np.uint64))
+
+class MinHasher:
+    """
+    MinHash signatures and LSH band keys for near-duplicate text detection
+    """
+
+    def __init__(self, num_perm=128, bands=16, shingle_size=3, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        # Keep a below 2**31 so a * x + b fits in uint64 for 32-bit x
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+        self._band_mix = rng.randint(1, 1 << 62, size=self.rows, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of a review
+
+        Args:
+            text (str or ReviewDocument): The review
+
+        Returns:
+            np.ndarray: uint32 signature of length num_perm, all MAX_HASH if the text is empty
+        """
+        hashes = shingle_hashes(text, self.shingle_size)
+        if hashes.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def signatures(self, texts):
+        """
+        Compute MinHash signatures for a batch of reviews
+
+        Args:
+            texts (iterable): Review texts or ReviewDocument objects
+
+        Returns:
+            np.ndarray: uint32 matrix of shape (len(texts), num_perm)
+        """
+        sigs = [self.signature(text) for text in texts]
+        if not sigs:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        return np.vstack(sigs)
+
+    def band_keys(self, signatures):
+        """
+        Hash each LSH band of each signature to a 64-bit bucket key
+
+        Args:
+            signatures (np.ndarray): Signature matrix of shape (n, num_perm)
+
+        Returns:
+            np.ndarray: uint64 matrix of shape (n, bands)
+        """
+        signatures = np.atleast_2d(signatures)
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        # Multiply-and-sum wraps modulo 2**64, which is what we want for mixing
+        return (banded * self._band_mix).sum(axis=2, dtype=np.uint64)
+
+    @staticmethod
+    def is_empty(signatures):
+        """Mask of signatures computed from texts with no shingles"""
+        return (np.atleast_2d(signatures) == MAX_HASH).all(axis=1)
+
+    @staticmethod
+    def similarity(signature, others):
+        """
+        Estimate Jaccard similarity between one signature and many others
+
+        Args:
+            signature (np.ndarray): Signature of length num_perm
+            others (np.ndarray): Signatures of shape (n, num_perm)
+
+        Returns:
+            np.ndarray: Estimated similarity in [0, 1] per row of others
+        """
+        return (np.atleast_2d(others) == signature).mean(axis=1)
@@ -0,0 +1,390 @@
+import numpy as np
+import os
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+from models.reviewer_behavior import to_days
+
+# Day recorded for reviews without a date; later than any real day, so a
+# dated copy of the edge wins, and left out of the burst windows
+UNDATED = 1 << 30
+
+class NetworkGraphDetector:
+    """
+    Network Graph Detection module that finds coordinated reviewer groups (collusion rings).
+
+    Stores the reviewer x product bipartite graph as CSR matrices whose values
+    are review days, with CSC copies for product lookups. New edges are
+    appended to a buffer, which becomes a new segment once it is large enough.
+    A segment is merged into the one before it when that one is no larger, so
+    segment sizes grow geometrically and each edge is only re-sorted a
+    logarithmic number of times.
+
+    For one product, the reviewers' rows are sliced out and two co-occurrence
+    matrices are built with sparse products: shared other products
+    (dense co-reviewing) and shared product/time-window pairs (bursts).
+    Reviewer pairs above either threshold are linked, and connected
+    components of that graph are the flagged groups.
+    """
+
+    def __init__(self, model_path="models/network_graph.npz", min_co_reviews=3, min_co_bursts=2,
+                 burst_days=7, min_group_size=3, max_product_degree=1000, compact_threshold=1000000):
+        self.model_path = model_path
+        self.min_co_reviews = min_co_reviews
+        self.min_co_bursts = min_co_bursts
+        self.burst_days = burst_days
+        self.min_group_size = min_group_size
+        self.max_product_degree = max_product_degree
+        self.compact_threshold = compact_threshold
+
+        self._reviewer_ids, self._reviewers = {}, []
+        self._product_ids, self._products = {}, []
+        # (by reviewer CSR, by product CSC) pairs, oldest and largest first
+        self._segments = []
+        self._reset_pending()
+
+        # Load graph if it exists, otherwise start empty
+        if os.path.exists(model_path):
+            try:
+                self.load_model()
+            except Exception as e:
+                print(f"Error loading model: {e}")
+
+    @property
+    def edge_count(self):
+        return sum(by_reviewer.nnz for by_reviewer, _ in self._segments) + self._n_pending
+
+    def add_edge(self, reviewer, product, review_date):
+        """
+        Record that a reviewer reviewed a product
+
+        Args:
+            reviewer (str): Reviewer name or id
+            product (str): Product id or URL
+            review_date (str or date): When the review was posted
+        """
+        self.add_edges([(reviewer, product, review_date)])
+
+    def add_edges(self, edges):
+        """
+        Append edges to the graph
+
+        Args:
+            edges (iterable): (reviewer, product, review_date) tuples
+        """
+        rows, cols, days = [], [], []
+        for reviewer, product, review_date in edges:
+            rows.append(self._intern(self._reviewer_ids, self._reviewers, reviewer))
+            cols.append(self._intern(self._product_ids, self._products, product))
+            day = to_days(review_date)
+            days.append(UNDATED if day is None else int(day))
+        if not rows:
+            return
+
+        n = self._n_pending
+        needed = n + len(rows)
+        if needed > len(self._pending_rows):
+            capacity = max(needed, 2 * len(self._pending_rows))
+            for name in ("_pending_rows", "_pending_cols", "_pending_days"):
+                grown = np.zeros(capacity, dtype=np.int32)
+                grown[:n] = getattr(self, name)[:n]
+                setattr(self, name, grown)
+
+        self._pending_rows[n:needed] = rows
+        self._pending_cols[n:needed] = cols
+        self._pending_days[n:needed] = days
+        self._n_pending = needed
+
+        if self._n_pending >= self.compact_threshold:
+            self._flush()
+
+    def add_reviews(self, product, reviews):
+        """
+        Add a product's reviews to the graph
+
+        Args:
+            product (str): Product id or URL
+            reviews (list): Review dicts with "author" and, if known, "date"
+        """
+        self.add_edges((review["author"], product, review.get("date")) for review in reviews)
+
+    def compact(self):
+        """Merge the appended edges and every segment into one CSR/CSC pair"""
+        self._flush()
+        if len(self._segments) > 1:
+            self._segments = [self._merge(self._segments)]
+
+    def _flush(self):
+        """Turn the appended edges into a segment, merging segments of similar size"""
+        if not self._n_pending:
+            return
+        n = self._n_pending
+        self._segments.append(self._build(self._pending_rows[:n], self._pending_cols[:n], self._pending_days[:n]))
+        self._reset_pending()
+
+        while len(self._segments) > 1 and self._segments[-2][0].nnz <= self._segments[-1][0].nnz:
+            self._segments[-2:] = [self._merge(self._segments[-2:])]
+
+    def _merge(self, segments):
+        """Merge segments into one, keeping the earliest day per pair"""
+        parts = [by_reviewer.tocoo() for by_reviewer, _ in segments]
+        return self._build(
+            np.concatenate([part.row for part in parts]),
+            np.concatenate([part.col for part in parts]),
+            np.concatenate([part.data - 1 for part in parts]),
+        )
+
+    def _build(self, rows, cols, days):
+        """Build a CSR/CSC pair from edges, keeping the earliest day per reviewer/product pair"""
+        rows = rows.astype(np.int64)
+        cols = cols.astype(np.int64)
+
+        # One edge per reviewer/product pair
+        keys = rows * len(self._products) + cols
+        order = np.lexsort((days, keys))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = keys[order][1:] != keys[order][:-1]
+        order = order[first]
+
+        shape = (len(self._reviewers), len(self._products))
+        by_reviewer = csr_matrix(
+            ((days[order] + 1).astype(np.int32), (rows[order], cols[order])), shape=shape
+        )
+        return by_reviewer, by_reviewer.tocsc()
+
+    def detect_groups(self, product):
+        """
+        Find collusion rings among a product's reviewers
+
+        Args:
+            product (str): Product id or URL
+
+        Returns:
+            list: Flagged groups, largest first, with members, size, density,
+                mean shared products and mean shared review bursts
+        """
+        p = self._product_ids.get(product)
+        if p is None:
+            return []
+
+        reviewers = self._product_reviewers(p)
+        if len(reviewers) < self.min_group_size:
+            return []
+
+        local_rows, cols, days = self._subgraph(reviewers)
+        m = len(reviewers)
+
+        # Very popular products link everyone and carry no signal
+        degree = np.zeros(len(self._products), dtype=np.int64)
+        for _, by_product in self._segments:
+            degree[:by_product.shape[1]] += np.diff(by_product.indptr)
+        keep = (degree[cols] <= self.max_product_degree) | (cols == p)
+        local_rows, cols, days = local_rows[keep], cols[keep], days[keep]
+
+        # Dense co-reviewing: shared products other than this one
+        other = cols != p
+        co_reviews = self._cooccurrence(local_rows[other], cols[other], m)
+
+        # Same products in the same time bursts, on two offset window grids
+        co_bursts = None
+        dated = days != UNDATED
+        for offset in (0, self.burst_days // 2):
+            windows = (days[dated] + offset) // self.burst_days
+            keys = cols[dated].astype(np.int64) * (1 << 24) + windows
+            co = self._cooccurrence(local_rows[dated], keys, m)
+            co_bursts = co if co_bursts is None else co_bursts.maximum(co)
+
+        links = ((co_reviews >= self.min_co_reviews) + (co_bursts >= self.min_co_bursts)).astype(np.int8)
+        n_components, labels = connected_components(links, directed=False)
+
+        groups = []
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        for members in np.split(order, bounds):
+            size = len(members)
+            if size < self.min_group_size:
+                continue
+            pairs = size * (size - 1)
+            group_links = links[members][:, members]
+            groups.append({
+                "members": [self._reviewers[reviewers[i]] for i in members],
+                "size": int(size),
+                "density": float(group_links.nnz) / pairs,
+                "shared_products": float(co_reviews[members][:, members].sum()) / pairs,
+                "shared_bursts": float(co_bursts[members][:, members].sum()) / pairs,
+            })
+
+        groups.sort(key=lambda g: -g["size"])
+        return groups
+
+    def analyze_reviews(self, reviews, product, update=True):
+        """
+        Analyze a product's reviews for coordinated reviewer groups
+
+        Args:
+            reviews (list): Review dicts with "author" and "date"
+            product (str): Product id or URL
+            update (bool): Add the reviews to the graph before analyzing
+
+        Returns:
+            list: Per-review results with group membership and reasons, in input order;
+                the score is the density of the author's group
+        """
+        if update:
+            self.add_reviews(product, reviews)
+
+        membership = {}
+        for group_id, group in enumerate(self.detect_groups(product)):
+            for member in group["members"]:
+                membership[member] = (group_id, group)
+
+        results = []
+        for review in reviews:
+            group_id, group = membership.get(review["author"], (None, None))
+            results.append({
+                "is_fake": group is not None,
+                "fake_score": group["density"] if group else 0.0,
+                "group_id": group_id,
+                "group_size": group["size"] if group else 0,
+                "reasons": self._get_network_reasons(group)
+            })
+        return results
+
+    def save_model(self):
+        """Save the graph to disk"""
+        self.compact()
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        graph = self._segments[0][0] if self._segments else csr_matrix((0, 0), dtype=np.int32)
+        with open(self.model_path, "wb") as f:
+            np.savez(
+                f,
+                reviewers=np.array(self._reviewers, dtype=str),
+                products=np.array(self._products, dtype=str),
+                indptr=graph.indptr,
+                indices=graph.indices,
+                data=graph.data,
+            )
+
+    def load_model(self):
+        """Load the graph from disk"""
+        if not os.path.exists(self.model_path):
+            return
+        with np.load(self.model_path) as saved:
+            self._reviewers = saved["reviewers"].tolist()
+            self._products = saved["products"].tolist()
+            self._reviewer_ids = {name: i for i, name in enumerate(self._reviewers)}
+            self._product_ids = {name: i for i, name in enumerate(self._products)}
+            by_reviewer = csr_matrix(
+                (saved["data"], saved["indices"], saved["indptr"]),
+                shape=(len(self._reviewers), len(self._products)),
+            )
+        self._segments = [(by_reviewer, by_reviewer.tocsc())] if by_reviewer.nnz else []
+        self._reset_pending()
+
+    def _product_reviewers(self, p):
+        """Sorted ids of the reviewers of product p, including appended edges"""
+        parts = []
+        for _, by_product in self._segments:
+            if p < by_product.shape[1]:
+                start, end = by_product.indptr[p], by_product.indptr[p + 1]
+                parts.append(by_product.indices[start:end])
+        n = self._n_pending
+        parts.append(self._pending_rows[:n][self._pending_cols[:n] == p])
+        return np.unique(np.concatenate(parts))
+
+    def _subgraph(self, reviewers):
+        """
+        Collect every edge of the given reviewers
+
+        Args:
+            reviewers (np.ndarray): Sorted reviewer ids
+
+        Returns:
+            tuple: (local row, product id, day) arrays with one edge per pair, local rows
+                indexing into reviewers
+        """
+        local_rows, cols, days = [], [], []
+        for by_reviewer, _ in self._segments:
+            in_segment = np.flatnonzero(reviewers < by_reviewer.shape[0])
+            sub = by_reviewer[reviewers[in_segment]].tocoo()
+            local_rows.append(in_segment[sub.row])
+            cols.append(sub.col)
+            days.append(sub.data - 1)
+
+        n = self._n_pending
+        mask = np.isin(self._pending_rows[:n], reviewers)
+        local_rows.append(np.searchsorted(reviewers, self._pending_rows[:n][mask]))
+        cols.append(self._pending_cols[:n][mask])
+        days.append(self._pending_days[:n][mask])
+
+        local_rows = np.concatenate(local_rows).astype(np.int64)
+        cols = np.concatenate(cols).astype(np.int64)
+        days = np.concatenate(days).astype(np.int64)
+
+        # A pair may be in several segments until they are merged; keep its earliest day
+        keys = local_rows * len(self._products) + cols
+        order = np.lexsort((days, keys))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = keys[order][1:] != keys[order][:-1]
+        order = order[first]
+        return local_rows[order], cols[order], days[order]
+
+    def _cooccurrence(self, local_rows, keys, m):
+        """
+        Count shared columns between every pair of reviewers
+
+        Args:
+            local_rows (np.ndarray): Local reviewer index of each edge
+            keys (np.ndarray): Column key of each edge
+            m (int): Number of reviewers
+
+        Returns:
+            csr_matrix: m x m counts with an empty diagonal
+        """
+        _, columns = np.unique(keys, return_inverse=True)
+        incidence = coo_matrix(
+            (np.ones(len(local_rows), dtype=np.int32), (local_rows, columns.ravel())),
+            shape=(m, int(columns.max()) + 1 if len(columns) else 0),
+        ).tocsr()
+        incidence.data[:] = 1  # A reviewer counts once per column
+        co = (incidence @ incidence.T).tocsr()
+        co.setdiag(0)
+        co.eliminate_zeros()
+        return co
+
+    def _intern(self, ids, names, name):
+        i = ids.get(name)
+        if i is None:
+            i = len(names)
+            ids[name] = i
+            names.append(name)
+        return i
+
+    def _reset_pending(self):
+        self._n_pending = 0
+        self._pending_rows = np.zeros(1024, dtype=np.int32)
+        self._pending_cols = np.zeros(1024, dtype=np.int32)
+        self._pending_days = np.zeros(1024, dtype=np.int32)
+
+    def _get_network_reasons(self, group):
+        """
+        Extract reasons for why a review might be fake based on the reviewer network
+
+        Args:
+            group (dict): The flagged group the author belongs to, or None
+
+        Returns:
+            list: Reasons why the review might be fake
+        """
+        reasons = []
+
+        if group is None:
+            return reasons
+
+        reasons.append(f"Part of a coordinated group of {group['size']} reviewers")
+
+        if group["shared_bursts"] >= self.min_co_bursts:
+            reasons.append("Reviewed the same products in the same time bursts")
+        if group["shared_products"] >= self.min_co_reviews:
+            reasons.append("Frequently reviews the same products as other flagged accounts")
+
+        return reasons
@@ -0,0 +1,68 @@
+import re
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+
+class ReviewDocument:
+    """
+    Preprocessed review text shared by all analysis modules.
+    Built once per review so each analyzer reuses the same tokens and sentences.
+    """
+
+    __slots__ = ('text', 'lower', 'words', 'tokens', 'sentences', 'word_count',
+                 'sentence_count', 'exclamation_count', 'language', '_terms')
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+
+        # Whitespace-separated words (used for length checks)
+        self.words = self.lower.split()
+
+        # Alphanumeric tokens (used for lexicon lookups)
+        self.tokens = WORD_PATTERN.findall(self.lower)
+
+        # Non-empty sentences with original casing
+        self.sentences = [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+
+        self.word_count = len(self.words)
+        self.sentence_count = len(self.sentences)
+        self.exclamation_count = text.count("!")
+
+        # Set by the language identifier on first use
+        self.language = None
+        self._terms = None
+
+    @property
+    def terms(self):
+        """N-gram terms counted by the shared feature store, built on first use"""
+        if self._terms is None:
+            from models.features import extract_terms
+            self._terms = extract_terms(self.lower)
+        return self._terms
+
+def as_document(text):
+    """
+    Return a ReviewDocument for text, reusing it if already preprocessed
+
+    Args:
+        text (str or ReviewDocument): Raw review text or a prepared document
+
+    Returns:
+        ReviewDocument: The preprocessed review
+    """
+    if isinstance(text, ReviewDocument):
+        return text
+    return ReviewDocument(text)
+
+def as_documents(texts):
+    """
+    Preprocess a batch of review texts
+
+    Args:
+        texts (iterable): Raw review texts or prepared documents
+
+    Returns:
+        list: ReviewDocument objects in input order
+    """
+    return [as_document(text) for text in texts]
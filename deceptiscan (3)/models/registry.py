@@ -0,0 +1,103 @@
+import os
+import threading
+
+# Artifacts written by the analyzers' save_model with their default paths
+DEFAULT_MODEL_PATHS = [
+    "models/stylometry_model.artifact",
+    "models/sentiment_model.artifact",
+    "models/gan_detector_model.artifact",
+    "models/language_model.artifact",
+]
+
+_lock = threading.Lock()
+_artifacts = {}
+_legacy_warned = set()
+
+def resolve_model_path(path):
+    """
+    Find the file to load a model from
+
+    Models saved before the artifact format are joblib pickles under the same
+    name with a .pkl extension. They are used, with a warning, while the
+    .artifact file doesn't exist; saving the model again converts it.
+
+    Args:
+        path (str): Path of the model artifact
+
+    Returns:
+        str: path, or its legacy .pkl if only that exists; None if neither does
+    """
+    if os.path.exists(path):
+        return path
+    root, ext = os.path.splitext(path)
+    legacy = root + ".pkl"
+    if ext != ".artifact" or not os.path.exists(legacy):
+        return None
+    with _lock:
+        warn = legacy not in _legacy_warned
+        _legacy_warned.add(legacy)
+    if warn:
+        print(f"Warning: {path} not found, loading legacy model {legacy}; save the model again to convert it")
+    return legacy
+
+def load_artifact(path, verify=False):
+    """
+    Load a saved model artifact once per process and share it between analyzers
+
+    NumPy arrays inside the artifact are memory-mapped read-only, so workers
+    forked after loading share the same physical pages. Legacy joblib pickles
+    are still loaded.
+
+    Args:
+        path (str): Path of the artifact (see models.artifacts) or joblib pickle
+        verify (bool): Check the artifact's data checksum when loading it
+
+    Returns:
+        dict: The saved artifact (model and vectorizer)
+    """
+    key = os.path.abspath(path)
+    with _lock:
+        artifact = _artifacts.get(key)
+        if artifact is None:
+            # Deferred so importing the registry doesn't pull in NumPy/joblib
+            from models import artifacts
+            if artifacts.is_artifact(path):
+                artifact = artifacts.load_artifact(path, verify=verify)
+            else:
+                import joblib
+                artifact = joblib.load(path, mmap_mode='r')
+            _artifacts[key] = artifact
+        return artifact
+
+def invalidate(path):
+    """
+    Forget a cached artifact so the next load reads it from disk again
+
+    Args:
+        path (str): Path of the artifact
+    """
+    with _lock:
+        _artifacts.pop(os.path.abspath(path), None)
+
+def preload(paths=None):
+    """
+    Warm the registry, e.g. in the server master process before it forks.
+    Artifact checksums are verified here, once per deployment.
+
+    Args:
+        paths (list, optional): Artifact paths, defaults to DEFAULT_MODEL_PATHS
+
+    Returns:
+        list: Paths that were loaded
+    """
+    loaded = []
+    for path in paths or DEFAULT_MODEL_PATHS:
+        path = resolve_model_path(path)
+        if path is None:
+            continue
+        try:
+            load_artifact(path, verify=True)
+            loaded.append(path)
+        except Exception as e:
+            print(f"Error preloading model {path}: {e}")
+    return loaded
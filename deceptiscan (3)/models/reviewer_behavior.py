@@ -0,0 +1,290 @@
+import numpy as np
+import os
+from datetime import date, datetime
+
+# Half-lives in days of the decayed review-rate counters
+RATE_WINDOWS = (1.0, 7.0, 30.0)
+_DECAY = np.log(2) / np.array(RATE_WINDOWS)
+
+def to_days(value):
+    """Convert a review date (ISO string, date, datetime or day number) to days since the epoch"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.timestamp() / 86400.0
+    if isinstance(value, date):
+        return float(value.toordinal() - date(1970, 1, 1).toordinal())
+    raise TypeError(f"Unsupported date: {value!r}")
+
+class ReviewerAnalyzer:
+    """
+    Reviewer Behavior Analysis module that detects suspicious users and spam-bots.
+
+    Keeps running aggregates per author in preallocated NumPy arrays, indexed
+    by a compact author id. Each new review updates its author's row in O(1):
+    review and verified counts, a 5-bin rating histogram, first/last seen
+    dates, and review rates over sliding windows approximated by
+    exponentially decayed counters. Scoring reads a single row.
+    """
+
+    def __init__(self, model_path="models/reviewer_behavior.npz", capacity=1024):
+        self.model_path = model_path
+        self.capacity = capacity
+        self._author_ids = {}
+        self._authors = []
+        self._clock = None
+        self._allocate(capacity)
+
+        # Load aggregates if they exist, otherwise start empty
+        if os.path.exists(model_path):
+            try:
+                self.load_model()
+            except Exception as e:
+                print(f"Error loading model: {e}")
+                self._author_ids, self._authors, self._clock = {}, [], None
+                self._allocate(capacity, keep=False)
+
+    def __len__(self):
+        return len(self._authors)
+
+    def update(self, author, rating=None, review_date=None, verified=False):
+        """
+        Add one review to its author's aggregates
+
+        Args:
+            author (str): Reviewer name or id
+            rating (int, optional): Star rating from 1 to 5
+            review_date (str or date, optional): When the review was posted
+            verified (bool): Whether it is a verified purchase
+        """
+        row = self._row(author)
+        self.review_count[row] += 1
+        if verified:
+            self.verified_count[row] += 1
+        if rating is not None and 1 <= int(rating) <= 5:
+            self.rating_counts[row, int(rating) - 1] += 1
+
+        t = to_days(review_date)
+        if t is None:
+            return
+        self._clock = t if self._clock is None else max(self._clock, t)
+
+        if np.isnan(self.first_seen[row]):
+            self.first_seen[row] = self.last_seen[row] = self.rate_time[row] = t
+            self.rates[row] = 1.0
+            return
+
+        self.first_seen[row] = min(self.first_seen[row], t)
+        self.last_seen[row] = max(self.last_seen[row], t)
+
+        # Decay the counters to the newer of the two times, then add this review
+        if t >= self.rate_time[row]:
+            self.rates[row] = self.rates[row] * np.exp(-_DECAY * (t - self.rate_time[row])) + 1.0
+            self.rate_time[row] = t
+        else:
+            self.rates[row] += np.exp(-_DECAY * (self.rate_time[row] - t))
+
+    def update_many(self, reviews):
+        """
+        Add reviews to the aggregates
+
+        Args:
+            reviews (iterable): Review dicts with "author", optionally "rating", "date" and "verified"
+        """
+        for review in reviews:
+            self.update(review["author"], review.get("rating"), review.get("date"),
+                        review.get("verified", False))
+
+    def author_features(self, author, now=None):
+        """
+        Read the behavior features of one author
+
+        Args:
+            author (str): Reviewer name or id
+            now (str or date, optional): Reference time, defaults to the latest review seen
+
+        Returns:
+            dict: Behavior features, or None for an unknown author
+        """
+        row = self._author_ids.get(author)
+        if row is None:
+            return None
+
+        now = to_days(now) if now is not None else self._clock
+        count = int(self.review_count[row])
+        ratings = self.rating_counts[row]
+        rated = int(ratings.sum())
+
+        if now is not None and not np.isnan(self.rate_time[row]):
+            rates = self.rates[row] * np.exp(-_DECAY * max(0.0, now - self.rate_time[row]))
+            account_age = max(0.0, now - self.first_seen[row])
+        else:
+            rates = self.rates[row]
+            account_age = None
+
+        return {
+            "review_count": count,
+            "verified_ratio": float(self.verified_count[row]) / count if count else 0.0,
+            "rating_distribution": ratings.tolist(),
+            "extreme_ratio": float(ratings[0] + ratings[4]) / rated if rated else 0.0,
+            "reviews_per_window": {f"{int(w)}d": float(r) for w, r in zip(RATE_WINDOWS, rates)},
+            "account_age_days": account_age,
+        }
+
+    def analyze_review(self, author, now=None):
+        """
+        Analyze a reviewer's behavior
+
+        Args:
+            author (str): Reviewer name or id
+            now (str or date, optional): Reference time, defaults to the latest review seen
+
+        Returns:
+            dict: Analysis result with prediction and confidence score
+        """
+        features = self.author_features(author, now)
+        if features is None:
+            return {"is_fake": False, "fake_score": 0.0, "features": None, "reasons": []}
+
+        fake_score = 0.0
+
+        # Bursts of reviews in a short period suggest automation
+        if features["reviews_per_window"]["1d"] >= 3:
+            fake_score += 0.35
+        elif features["reviews_per_window"]["7d"] >= 5:
+            fake_score += 0.2
+
+        # Unverified purchases
+        if features["verified_ratio"] < 0.2:
+            fake_score += 0.3
+
+        # Newly created accounts (approximated by the first review seen)
+        if features["account_age_days"] is not None and features["account_age_days"] < 30:
+            fake_score += 0.25
+
+        # Only ever leaving 1 or 5 star ratings
+        if features["review_count"] >= 3 and features["extreme_ratio"] >= 0.9:
+            fake_score += 0.2
+
+        # Cap the score at 0.95
+        fake_score = min(0.95, fake_score)
+
+        return {
+            "is_fake": fake_score > 0.7,
+            "fake_score": float(fake_score),
+            "features": features,
+            "reasons": self._get_behavior_reasons(features, fake_score)
+        }
+
+    def analyze_reviews(self, reviews, update=True, now=None):
+        """
+        Analyze the authors of multiple reviews
+
+        Args:
+            reviews (list): Review dicts with "author", optionally "rating", "date" and "verified"
+            update (bool): Add the reviews to the aggregates before scoring
+            now (str or date, optional): Reference time, defaults to the latest review seen
+
+        Returns:
+            list: List of analysis results
+        """
+        if update:
+            self.update_many(reviews)
+        return [self.analyze_review(review["author"], now) for review in reviews]
+
+    def save_model(self):
+        """Save the aggregates to disk"""
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        n = len(self._authors)
+        with open(self.model_path, "wb") as f:
+            np.savez(
+                f,
+                authors=np.array(self._authors, dtype=str),
+                clock=np.array([np.nan if self._clock is None else self._clock]),
+                review_count=self.review_count[:n],
+                verified_count=self.verified_count[:n],
+                rating_counts=self.rating_counts[:n],
+                first_seen=self.first_seen[:n],
+                last_seen=self.last_seen[:n],
+                rates=self.rates[:n],
+                rate_time=self.rate_time[:n],
+            )
+
+    def load_model(self):
+        """Load the aggregates from disk"""
+        if not os.path.exists(self.model_path):
+            return
+        with np.load(self.model_path) as saved:
+            self._authors = saved["authors"].tolist()
+            self._author_ids = {author: row for row, author in enumerate(self._authors)}
+            clock = float(saved["clock"][0])
+            self._clock = None if np.isnan(clock) else clock
+
+            # Fresh arrays, as rows held in memory past the saved authors are stale
+            n = len(self._authors)
+            self._allocate(max(n, self.capacity), keep=False)
+            for name in ("review_count", "verified_count", "rating_counts", "first_seen",
+                         "last_seen", "rates", "rate_time"):
+                getattr(self, name)[:n] = saved[name]
+
+    def _row(self, author):
+        """Return the row of an author, adding it if new"""
+        row = self._author_ids.get(author)
+        if row is None:
+            row = len(self._authors)
+            if row >= len(self.review_count):
+                self._allocate(2 * len(self.review_count))
+            self._author_ids[author] = row
+            self._authors.append(author)
+        return row
+
+    def _allocate(self, capacity, keep=True):
+        """Allocate (or grow) the aggregate arrays, keeping existing rows unless keep is False"""
+        def grow(name, shape, dtype, fill):
+            new = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None) if keep else None
+            if old is not None:
+                new[:len(old)] = old
+            setattr(self, name, new)
+
+        grow("review_count", capacity, np.int32, 0)
+        grow("verified_count", capacity, np.int32, 0)
+        grow("rating_counts", (capacity, 5), np.int32, 0)
+        grow("first_seen", capacity, np.float64, np.nan)
+        grow("last_seen", capacity, np.float64, np.nan)
+        grow("rates", (capacity, len(RATE_WINDOWS)), np.float32, 0.0)
+        grow("rate_time", capacity, np.float64, np.nan)
+
+    def _get_behavior_reasons(self, features, fake_score):
+        """
+        Extract reasons for why a review might be fake based on reviewer behavior
+
+        Args:
+            features (dict): Behavior features of the author
+            fake_score (float): The fake probability score
+
+        Returns:
+            list: Reasons why the review might be fake
+        """
+        reasons = []
+
+        if fake_score < 0.5:
+            return reasons
+
+        if features["account_age_days"] is not None and features["account_age_days"] < 30:
+            reasons.append("New account")
+
+        if features["reviews_per_window"]["1d"] >= 3 or features["reviews_per_window"]["7d"] >= 5:
+            reasons.append("Unusual reviewing frequency")
+
+        if features["verified_ratio"] < 0.2:
+            reasons.append("Unverified purchases")
+
+        if features["review_count"] >= 3 and features["extreme_ratio"] >= 0.9:
+            reasons.append("Only extreme ratings")
+
+        return reasons
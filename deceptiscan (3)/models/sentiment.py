@@ -1,29 +1,28 @@
 import numpy as np
-import re
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.ensemble import RandomForestClassifier
-import joblib
 import os
+from sklearn.base import clone
+from models import registry
+from models.artifacts import save_artifact
+from models.incremental import StreamingTrainer
+from models.features import FeatureView
+from models.preprocessing import as_document, as_documents
+from models.language import DEFAULT_LANGUAGE, lexicon_path, read_lexicon
 
 class SentimentAnalyzer:
     """
     Sentiment & Emotion Analysis module to detect reviews with unnatural sentiment patterns
     """
     
-    def __init__(self, model_path="models/sentiment_model.pkl"):
+    def __init__(self, model_path="models/sentiment_model.artifact", language=DEFAULT_LANGUAGE):
         self.model_path = model_path
-        self.vectorizer = TfidfVectorizer(max_features=5000)
+        self.language = language
+        self.vectorizer = FeatureView(max_features=5000)
         self.model = None
         
-        # Load model if it exists, otherwise create a new one
-        if os.path.exists(model_path):
-            try:
-                self.load_model()
-            except Exception as e:
-                print(f"Error loading model: {e}")
-                self.model = RandomForestClassifier()
-        else:
-            self.model = RandomForestClassifier()
+        # The saved model is loaded from the shared registry on first use
+        self._model_loaded = False
             
         # Emotion words for basic emotion detection
         self.emotion_lexicon = {
@@ -34,35 +33,118 @@ class SentimentAnalyzer:
             'surprise': ['surprised', 'shocked', 'amazed', 'astonished'],
             'disgust': ['disgusted', 'repulsed', 'revolted', 'dislike'],
         }
+        
+        # Words for simple rule-based sentiment scoring
+        self.sentiment_lexicon = {
+            'positive': ['good', 'great', 'excellent', 'amazing', 'love', 'best', 'perfect', 'awesome'],
+            'negative': ['bad', 'poor', 'terrible', 'awful', 'hate', 'worst', 'horrible', 'disappointing'],
+        }
+        
+        # Other languages start from empty word lists and load their lexicon file
+        if language != DEFAULT_LANGUAGE:
+            self.emotion_lexicon = {emotion: [] for emotion in self.emotion_lexicon}
+            self.sentiment_lexicon = {polarity: [] for polarity in self.sentiment_lexicon}
+            path = lexicon_path(language, 'sentiment')
+            if os.path.exists(path):
+                self.load_lexicon(path)
+                return
+        
+        self._compile_lexicon()
     
-    def train(self, texts, labels):
+    def train(self, texts, labels, features=None):
         """
         Train the sentiment analyzer
         
         Args:
             texts (list): List of review texts
             labels (list): Binary labels (1 for fake, 0 for genuine)
+            features (FeatureStore, optional): Term counts of texts shared with the
+                other analyzers, counted from texts if not given
         """
-        X = self.vectorizer.fit_transform(texts)
+        # Fit fresh copies so models shared through the registry aren't mutated
+        self._ensure_model()
+        self.vectorizer = clone(self.vectorizer)
+        self.model = clone(self.model)
+        
+        X = self.vectorizer.fit_transform(features if features is not None else texts)
         self.model.fit(X, labels)
         
         # Save the model
         self.save_model()
     
+    def train_streaming(self, make_batches, epochs=1, **trainer_options):
+        """
+        Train out of core on labelled minibatches streamed from disk
+        
+        Uses hashed word features and a logistic SGD model updated with
+        partial_fit, calibrated on held-out minibatches (see StreamingTrainer).
+        
+        Args:
+            make_batches (callable): Returns a fresh iterable of (texts, labels) minibatches,
+                labels being binary labels (1 for fake, 0 for genuine)
+            epochs (int): Passes over the training minibatches
+            **trainer_options: Passed to StreamingTrainer
+            
+        Returns:
+            dict: Held-out evaluation report
+        """
+        vectorizer = HashingVectorizer(n_features=2 ** 18, alternate_sign=False)
+        trainer = StreamingTrainer(vectorizer, **trainer_options)
+        self.model = trainer.fit(make_batches, epochs)
+        self.vectorizer = vectorizer
+        self._model_loaded = True
+        
+        # Save the model
+        self.save_model()
+        return trainer.report
+    
+    def load_lexicon(self, path):
+        """
+        Extend the sentiment and emotion lexicons from a tab-separated file
+        
+        Each line holds ``word<TAB>category`` with an optional third column
+        flagging the association (0 lines are skipped), which covers
+        NRC-style emotion lexicons. Categories ``positive`` and ``negative``
+        feed the sentiment score; any other category is treated as an emotion.
+        
+        Args:
+            path (str): Path to the lexicon file
+        """
+        for word, category in read_lexicon(path):
+            lexicon = self.sentiment_lexicon if category in ('positive', 'negative') else self.emotion_lexicon
+            lexicon.setdefault(category, []).append(word)
+        
+        self._compile_lexicon()
+    
     def analyze_review(self, text, rating=None):
         """
         Analyze a single review text for sentiment patterns
         
         Args:
-            text (str): The review text to analyze
+            text (str or ReviewDocument): The review text to analyze
             rating (int, optional): The star rating associated with the review
             
         Returns:
             dict: Analysis result with prediction and confidence score
         """
+        doc = as_document(text)
+        
         # Extract basic sentiment and emotion features
-        sentiment_features = self._extract_sentiment_features(text)
+        sentiment_features = self._extract_sentiment_features(doc)
+        return self._score_review(doc, rating, sentiment_features)
+    
+    def _score_review(self, doc, rating, sentiment_features):
+        """
+        Score a review from its precomputed sentiment features
         
+        Args:
+            doc (ReviewDocument): The preprocessed review
+            rating (int): The star rating, or None
+            sentiment_features (dict): Output of _extract_sentiment_features
+            
+        Returns:
+            dict: Analysis result with prediction and confidence score
+        """
         # Check for sentiment-rating mismatch
         sentiment_score = sentiment_features['sentiment_score']
         has_mismatch = False
@@ -101,7 +183,7 @@ class SentimentAnalyzer:
             "fake_score": float(fake_score),
             "sentiment_score": sentiment_features['sentiment_score'],
             "emotions": sentiment_features['emotions'],
-            "reasons": self._get_sentiment_reasons(text, sentiment_features, rating, has_mismatch)
+            "reasons": self._get_sentiment_reasons(doc, sentiment_features, rating, has_mismatch)
         }
     
     def analyze_reviews(self, texts, ratings=None):
@@ -109,80 +191,157 @@ class SentimentAnalyzer:
         Analyze multiple review texts
         
         Args:
-            texts (list): List of review texts
+            texts (list): List of review texts or ReviewDocument objects
             ratings (list, optional): List of ratings corresponding to the texts
             
         Returns:
             list: List of analysis results
         """
+        docs = as_documents(texts)
         if ratings is None:
-            ratings = [None] * len(texts)
+            ratings = [None] * len(docs)
         
-        return [self.analyze_review(text, rating) for text, rating in zip(texts, ratings)]
+        features = self._extract_sentiment_features_batch(docs)
+        return [
+            self._score_review(doc, rating, sentiment_features)
+            for doc, rating, sentiment_features in zip(docs, ratings, features)
+        ]
     
     def save_model(self):
         """Save the trained model to disk"""
         if self.model is not None:
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            joblib.dump({
+            save_artifact(self.model_path, {
                 'model': self.model,
                 'vectorizer': self.vectorizer
-            }, self.model_path)
+            }, metadata={'analyzer': 'SentimentAnalyzer'})
+            registry.invalidate(self.model_path)
     
     def load_model(self):
         """Load the trained model from disk"""
-        if os.path.exists(self.model_path):
-            saved_model = joblib.load(self.model_path)
+        path = registry.resolve_model_path(self.model_path)
+        if path is not None:
+            saved_model = registry.load_artifact(path)
             self.model = saved_model['model']
             self.vectorizer = saved_model['vectorizer']
+            self._model_loaded = True
     
-    def _extract_sentiment_features(self, text):
+    def _ensure_model(self):
+        """Load the saved model on first use, otherwise create a new one"""
+        if self._model_loaded:
+            return
+        self._model_loaded = True
+        
+        if registry.resolve_model_path(self.model_path) is not None:
+            try:
+                self.load_model()
+                return
+            except Exception as e:
+                print(f"Error loading model: {e}")
+        self.model = RandomForestClassifier()
+    
+    def _compile_lexicon(self):
         """
-        Extract sentiment and emotion features from text
+        Compile the lexicons into a word -> category-id index
+        
+        Category 0 is positive, 1 is negative and the rest are emotions in
+        emotion_lexicon order. Counting then costs one dict lookup per token
+        regardless of lexicon size or number of categories.
+        """
+        self._emotion_names = list(self.emotion_lexicon)
+        categories = [self.sentiment_lexicon.get('positive', []), self.sentiment_lexicon.get('negative', [])]
+        categories += [self.emotion_lexicon[emotion] for emotion in self._emotion_names]
+        
+        word_categories = {}
+        for category_id, words in enumerate(categories):
+            for word in words:
+                ids = word_categories.setdefault(word, [])
+                if category_id not in ids:
+                    ids.append(category_id)
+        
+        self._word_categories = {word: tuple(ids) for word, ids in word_categories.items()}
+        self._category_count = len(categories)
+    
+    def _count_categories(self, docs):
+        """
+        Count lexicon category hits for a batch of reviews in one pass
         
         Args:
-            text (str): The review text
+            docs (list): ReviewDocument objects
             
         Returns:
-            dict: Sentiment features
+            np.ndarray: Counts of shape (len(docs), number of categories)
         """
-        text_lower = text.lower()
-        words = re.findall(r'\b\w+\b', text_lower)
+        n_categories = self._category_count
+        lookup = self._word_categories.get
+        hits = []
+        for doc_id, doc in enumerate(docs):
+            offset = doc_id * n_categories
+            for word in doc.tokens:
+                for category_id in lookup(word, ()):
+                    hits.append(offset + category_id)
         
-        # Simple rule-based sentiment scoring
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'love', 'best', 'perfect', 'awesome']
-        negative_words = ['bad', 'poor', 'terrible', 'awful', 'hate', 'worst', 'horrible', 'disappointing']
+        counts = np.bincount(np.asarray(hits, dtype=np.int64), minlength=len(docs) * n_categories)
+        return counts.reshape(len(docs), n_categories)
+    
+    def _extract_sentiment_features(self, doc):
+        """
+        Extract sentiment and emotion features from a review
         
-        positive_count = sum(word in positive_words for word in words)
-        negative_count = sum(word in negative_words for word in words)
+        Args:
+            doc (ReviewDocument): The preprocessed review
+            
+        Returns:
+            dict: Sentiment features
+        """
+        return self._extract_sentiment_features_batch([doc])[0]
+    
+    def _extract_sentiment_features_batch(self, docs):
+        """
+        Extract sentiment and emotion features for a batch of reviews
         
-        # Calculate basic sentiment score (-1 to 1)
-        total = positive_count + negative_count
-        sentiment_score = 0
-        if total > 0:
-            sentiment_score = (positive_count - negative_count) / total
+        Args:
+            docs (list): ReviewDocument objects
+            
+        Returns:
+            list: Sentiment feature dicts in input order
+        """
+        counts = self._count_categories(docs)
         
-        # Detect emotions
-        emotions = {}
-        for emotion, emotion_words in self.emotion_lexicon.items():
-            emotion_count = sum(word in emotion_words for word in words)
-            if emotion_count > 0:
-                emotions[emotion] = emotion_count
+        features = []
+        for row in counts:
+            positive_count = int(row[0])
+            negative_count = int(row[1])
+            
+            # Calculate basic sentiment score (-1 to 1)
+            total = positive_count + negative_count
+            sentiment_score = 0
+            if total > 0:
+                sentiment_score = (positive_count - negative_count) / total
+            
+            # Detect emotions
+            emotions = {
+                emotion: int(count)
+                for emotion, count in zip(self._emotion_names, row[2:])
+                if count > 0
+            }
+            
+            features.append({
+                'sentiment_score': sentiment_score,
+                'positive_count': positive_count,
+                'negative_count': negative_count,
+                'emotion_count': len(emotions),
+                'emotions': emotions
+            })
         
-        return {
-            'sentiment_score': sentiment_score,
-            'positive_count': positive_count,
-            'negative_count': negative_count,
-            'emotion_count': len(emotions),
-            'emotions': emotions
-        }
+        return features
     
-    def _get_sentiment_reasons(self, text, features, rating, has_mismatch):
+    def _get_sentiment_reasons(self, doc, features, rating, has_mismatch):
         """
         Extract reasons for why a review might be fake based on sentiment analysis
         
         Args:
-            text (str): The review text
+            doc (ReviewDocument): The preprocessed review
             features (dict): Sentiment features
             rating (int): The star rating
             has_mismatch (bool): Whether there's a sentiment-rating mismatch
@@ -193,7 +352,7 @@ class SentimentAnalyzer:
         reasons = []
         
         # Extreme sentiment without details
-        if abs(features['sentiment_score']) > 0.7 and len(text.split()) < 30:
+        if abs(features['sentiment_score']) > 0.7 and doc.word_count < 30:
             if features['sentiment_score'] > 0:
                 reasons.append("Extreme positive sentiment without supporting details")
             else:
@@ -207,9 +366,9 @@ class SentimentAnalyzer:
                 reasons.append(f"Negative rating ({rating}★) but positive sentiment in text")
         
         # Lack of emotional variation
-        if features['emotion_count'] == 0 and len(text.split()) > 50:
+        if features['emotion_count'] == 0 and doc.word_count > 50:
             reasons.append("No emotional language in a long review")
-        elif features['emotion_count'] == 1 and len(features['emotions']) == 1 and len(text.split()) > 50:
+        elif features['emotion_count'] == 1 and len(features['emotions']) == 1 and doc.word_count > 50:
             emotion = list(features['emotions'].keys())[0]
             reasons.append(f"Limited emotional range (only {emotion})")
         
@@ -1,117 +1,258 @@
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.svm import SVC
-import joblib
 import os
+from sklearn.base import clone
+from models import registry
+from models.artifacts import save_artifact
+from models.incremental import StreamingTrainer
+from models.features import FeatureView
+from itertools import islice
+from models.preprocessing import as_document
+from models.language import DEFAULT_LANGUAGE, lexicon_path, read_lexicon
+
+# Words behind the stylometry reasons, extended per language by lexicon files
+SUPERLATIVES = ("best", "amazing", "incredible", "perfect", "awesome", "excellent")
+GENERIC_WORDS = ("product",)
+SPECIFIC_WORDS = ("feature", "battery", "design", "quality", "price", "performance")
+
+# Lexicon file categories and the word lists they extend
+LEXICON_CATEGORIES = {
+    "superlative": "superlatives",
+    "generic": "generic_words",
+    "specific": "specific_words",
+}
 
 class StyleAnalyzer:
     """
     Language Stylometry Analyzer that detects unnatural or robotic writing styles.
-    Uses SVM model with TF-IDF features.
+    Uses SVM model with TF-IDF features from the shared feature store.
     """
     
-    def __init__(self, model_path="models/stylometry_model.pkl"):
+    def __init__(self, model_path="models/stylometry_model.artifact", batch_size=1000, language=DEFAULT_LANGUAGE):
         self.model_path = model_path
-        self.vectorizer = TfidfVectorizer(
+        self.batch_size = batch_size
+        self.language = language
+        
+        # English stop words are only removed from English reviews
+        self.vectorizer = FeatureView(
             ngram_range=(1, 3), 
             max_features=10000,
-            stop_words='english'
+            stop_words='english' if language == DEFAULT_LANGUAGE else None
         )
         self.model = None
         
-        # Load model if it exists, otherwise create a new one
-        if os.path.exists(model_path):
-            try:
-                self.load_model()
-            except Exception as e:
-                print(f"Error loading model: {e}")
-                self.model = SVC(probability=True)
-        else:
-            self.model = SVC(probability=True)
+        # The saved model is loaded from the shared registry on first use
+        self._model_loaded = False
+        
+        self.superlatives = list(SUPERLATIVES)
+        self.generic_words = list(GENERIC_WORDS)
+        self.specific_words = list(SPECIFIC_WORDS)
+        
+        # Other languages start from empty lists and load their lexicon file
+        if language != DEFAULT_LANGUAGE:
+            for attr in LEXICON_CATEGORIES.values():
+                setattr(self, attr, [])
+            path = lexicon_path(language, 'stylometry')
+            if os.path.exists(path):
+                self.load_lexicon(path)
     
-    def train(self, texts, labels):
+    def train(self, texts, labels, features=None):
         """
         Train the stylometry model
         
         Args:
             texts (list): List of review texts
             labels (list): Binary labels (1 for fake, 0 for genuine)
+            features (FeatureStore, optional): Term counts of texts shared with the
+                other analyzers, counted from texts if not given
         """
-        X = self.vectorizer.fit_transform(texts)
+        # Fit fresh copies so models shared through the registry aren't mutated
+        self._ensure_model()
+        self.vectorizer = clone(self.vectorizer)
+        self.model = clone(self.model)
+        
+        X = self.vectorizer.fit_transform(features if features is not None else texts)
         self.model.fit(X, labels)
         
         # Save the model
         self.save_model()
     
+    def train_streaming(self, make_batches, epochs=1, **trainer_options):
+        """
+        Train out of core on labelled minibatches streamed from disk
+        
+        Uses hashed 1-3-gram features and a logistic SGD model updated with
+        partial_fit, calibrated on held-out minibatches (see StreamingTrainer).
+        
+        Args:
+            make_batches (callable): Returns a fresh iterable of (texts, labels) minibatches,
+                labels being binary labels (1 for fake, 0 for genuine)
+            epochs (int): Passes over the training minibatches
+            **trainer_options: Passed to StreamingTrainer
+            
+        Returns:
+            dict: Held-out evaluation report
+        """
+        # English stop words are only removed from English reviews, as in __init__
+        vectorizer = HashingVectorizer(
+            ngram_range=(1, 3),
+            stop_words='english' if self.language == DEFAULT_LANGUAGE else None,
+            n_features=2 ** 20,
+            alternate_sign=False
+        )
+        trainer = StreamingTrainer(vectorizer, **trainer_options)
+        self.model = trainer.fit(make_batches, epochs)
+        self.vectorizer = vectorizer
+        self._model_loaded = True
+        
+        # Save the model
+        self.save_model()
+        return trainer.report
+    
+    def load_lexicon(self, path):
+        """
+        Extend the word lists behind the stylometry reasons from a tab-separated file
+        
+        Each line holds ``word<TAB>category`` (see models.language.read_lexicon)
+        with a category from LEXICON_CATEGORIES; others are ignored.
+        
+        Args:
+            path (str): Path to the lexicon file
+        """
+        for word, category in read_lexicon(path):
+            if category in LEXICON_CATEGORIES:
+                getattr(self, LEXICON_CATEGORIES[category]).append(word)
+    
     def analyze_review(self, text):
         """
         Analyze a single review text for stylometry patterns
         
         Args:
-            text (str): The review text to analyze
+            text (str or ReviewDocument): The review text to analyze
             
         Returns:
             dict: Analysis result with prediction and confidence score
         """
+        doc = as_document(text)
+        self._ensure_model()
+        
         # If model isn't trained, return a mock result
-        if not hasattr(self.model, 'predict_proba'):
+        if not hasattr(self.model, 'classes_'):
             # Mock result with randomized score for demo
             fake_score = np.random.beta(2, 5)  # Beta distribution skewed toward lower scores
-            if "amazing" in text.lower() and "best" in text.lower() and len(text) < 100:
+            if "amazing" in doc.lower and "best" in doc.lower and len(doc.text) < 100:
                 fake_score = np.random.uniform(0.7, 0.9)  # Higher score for suspicious text
             
             return {
                 "is_fake": fake_score > 0.7,
                 "fake_score": float(fake_score),
-                "reasons": self._get_stylometry_reasons(text, fake_score)
+                "reasons": self._get_stylometry_reasons(doc, fake_score)
             }
         
         # Real analysis for trained model
-        X = self.vectorizer.transform([text])
-        prediction = self.model.predict(X)[0]
-        proba = self.model.predict_proba(X)[0]
-        fake_score = proba[1]  # Probability of being fake
-        
-        return {
-            "is_fake": prediction == 1,
-            "fake_score": float(fake_score),
-            "reasons": self._get_stylometry_reasons(text, fake_score)
-        }
+        return self._predict_batch([doc])[0]
     
-    def analyze_reviews(self, texts):
+    def analyze_reviews(self, texts, batch_size=None):
         """
         Analyze multiple review texts
         
+        Texts are vectorized into one sparse matrix per chunk and scored with
+        a single predict_proba call, so memory is bounded by the chunk size
+        rather than by the number of reviews.
+        
         Args:
-            texts (list): List of review texts
+            texts (iterable): Review texts or ReviewDocument objects
+            batch_size (int, optional): Reviews per chunk, defaults to self.batch_size
             
         Returns:
             list: List of analysis results
         """
-        return [self.analyze_review(text) for text in texts]
+        self._ensure_model()
+        if not hasattr(self.model, 'classes_'):
+            return [self.analyze_review(text) for text in texts]
+        
+        batch_size = batch_size or self.batch_size
+        results = []
+        texts = iter(texts)
+        while True:
+            chunk = [as_document(text) for text in islice(texts, batch_size)]
+            if not chunk:
+                break
+            results.extend(self._predict_batch(chunk))
+        
+        return results
     
     def save_model(self):
         """Save the trained model to disk"""
         if self.model is not None:
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            joblib.dump({
+            save_artifact(self.model_path, {
                 'model': self.model,
                 'vectorizer': self.vectorizer
-            }, self.model_path)
+            }, metadata={'analyzer': 'StyleAnalyzer'})
+            registry.invalidate(self.model_path)
     
     def load_model(self):
         """Load the trained model from disk"""
-        if os.path.exists(self.model_path):
-            saved_model = joblib.load(self.model_path)
+        path = registry.resolve_model_path(self.model_path)
+        if path is not None:
+            saved_model = registry.load_artifact(path)
             self.model = saved_model['model']
             self.vectorizer = saved_model['vectorizer']
+            self._model_loaded = True
+    
+    def _ensure_model(self):
+        """Load the saved model on first use, otherwise create a new one"""
+        if self._model_loaded:
+            return
+        self._model_loaded = True
+        
+        if registry.resolve_model_path(self.model_path) is not None:
+            try:
+                self.load_model()
+                return
+            except Exception as e:
+                print(f"Error loading model: {e}")
+        self.model = SVC(probability=True)
+    
+    def _predict_batch(self, docs):
+        """
+        Score a chunk of reviews with one transform and one predict_proba call
+        
+        Args:
+            docs (list): ReviewDocument objects in the chunk
+            
+        Returns:
+            list: Analysis results in input order
+        """
+        # Feature views reuse each document's terms, sklearn vectorizers need the text
+        if isinstance(self.vectorizer, FeatureView):
+            X = self.vectorizer.transform(docs)
+        else:
+            X = self.vectorizer.transform([doc.text for doc in docs])
+        proba = self.model.predict_proba(X)
+        
+        # Derive labels from the probabilities instead of a second predict call
+        classes = self.model.classes_
+        labels = classes[proba.argmax(axis=1)]
+        fake_scores = proba[:, list(classes).index(1)]  # Probability of being fake
+        
+        return [
+            {
+                "is_fake": bool(label == 1),
+                "fake_score": float(fake_score),
+                "reasons": self._get_stylometry_reasons(doc, fake_score)
+            }
+            for doc, label, fake_score in zip(docs, labels, fake_scores)
+        ]
     
-    def _get_stylometry_reasons(self, text, fake_score):
+    def _get_stylometry_reasons(self, doc, fake_score):
         """
         Extract reasons for why a review might be fake based on stylometry
         
         Args:
-            text (str): The review text
+            doc (ReviewDocument): The preprocessed review
             fake_score (float): The fake probability score
             
         Returns:
@@ -122,22 +263,21 @@ class StyleAnalyzer:
         if fake_score < 0.7:
             return reasons
             
-        text_lower = text.lower()
+        text_lower = doc.lower
         
         # Check for excessive superlatives
-        superlatives = ["best", "amazing", "incredible", "perfect", "awesome", "excellent"]
-        superlative_count = sum(word in text_lower for word in superlatives)
-        if superlative_count >= 2 and len(text.split()) < 50:
+        superlative_count = sum(word in text_lower for word in self.superlatives)
+        if superlative_count >= 2 and doc.word_count < 50:
             reasons.append("Excessive superlatives")
         
         # Check for lack of specific details
-        if len(text.split()) < 20:
+        if doc.word_count < 20:
             reasons.append("Too short, lacks details")
-        elif "product" in text_lower and not any(specific in text_lower for specific in ["feature", "battery", "design", "quality", "price", "performance"]):
+        elif any(word in text_lower for word in self.generic_words) and not any(specific in text_lower for specific in self.specific_words):
             reasons.append("Generic praise without specific details")
         
         # Check for exclamation marks
-        if text.count("!") > 2:
+        if doc.exclamation_count > 2:
             reasons.append("Excessive exclamation marks")
         
         return reasons
@@ -0,0 +1,182 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from itertools import islice
+
+class Deadline:
+    """Point in time a module has to finish by, checked cooperatively between chunks"""
+
+    def __init__(self, budget=None):
+        self.at = time.monotonic() + budget if budget is not None else None
+
+    def remaining(self):
+        """Seconds left, or None without a budget"""
+        return None if self.at is None else max(0.0, self.at - time.monotonic())
+
+    def expired(self):
+        return self.at is not None and time.monotonic() >= self.at
+
+def score_in_chunks(score, columns, deadline, chunk_size=256):
+    """
+    Score reviews chunk by chunk until all are done or the deadline passes
+
+    Args:
+        score (callable): Called with one chunk of each column, returns a list of results
+        columns (list): Parallel lists, e.g. [texts] or [texts, ratings]
+        deadline (Deadline): Module deadline
+        chunk_size (int): Reviews per call
+
+    Returns:
+        list: Results for a prefix of the reviews, all of them unless the deadline passed
+    """
+    results = []
+    iterators = [iter(column) for column in columns]
+    while not deadline.expired():
+        chunk = [list(islice(iterator, chunk_size)) for iterator in iterators]
+        if not chunk or not chunk[0]:
+            break
+        results.extend(score(*chunk))
+    return results
+
+class ModuleOrchestrator:
+    """
+    Runs detection modules concurrently on a shared executor.
+
+    Each module gets a time budget counted from submission, so time spent
+    queued for a worker counts against it. Modules are expected to check
+    their Deadline between chunks and return what they have scored; a module
+    that overruns its budget anyway is abandoned and reported as partial
+    rather than failing the analysis. End-to-end latency is that of the
+    slowest module, capped by the largest budget.
+
+    A module can instead run after others and be given their results; it is
+    submitted once they are done, and its budget still counts from the start.
+    """
+
+    def __init__(self, max_workers=8, default_budget=10.0, grace=0.1):
+        """
+        Args:
+            max_workers (int): Threads shared by all analyses
+            default_budget (float): Seconds per module when no budget is given
+            grace (float): Extra seconds to wait for a module after its deadline
+        """
+        self.default_budget = default_budget
+        self.grace = grace
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="module")
+
+    def run(self, modules, expected, budgets=None, progress=None, after=None):
+        """
+        Run modules concurrently and collect their results
+
+        Args:
+            modules (dict): Module name to callable(deadline) returning per-review results
+            expected (int): Number of reviews each module should score
+            budgets (dict, optional): Module name to budget in seconds
+            progress (callable, optional): Called as progress(module_name, state)
+            after (dict, optional): Module name to the names of modules it runs after;
+                it is called as callable(deadline, *their_results), with None for a
+                module that failed or was abandoned
+
+        Returns:
+            dict: Module name to a run record with state ("complete", "partial"
+                or "failed"), results, scored count, queue_time (including any
+                wait for the modules it runs after), wall_time and error
+        """
+        budgets = budgets or {}
+        after = after or {}
+        runs = {}
+        for name, module in modules.items():
+            run = {"submitted": time.monotonic(), "started": None, "finished": None}
+            run["deadline"] = Deadline(budgets.get(name, self.default_budget))
+            if after.get(name):
+                run["future"] = Future()
+            else:
+                run["future"] = self._executor.submit(self._run_module, name, module, run, progress)
+            runs[name] = run
+        for name, prerequisites in after.items():
+            if prerequisites:
+                self._submit_after(name, modules[name], runs[name],
+                                   [runs[prerequisite]["future"] for prerequisite in prerequisites], progress)
+
+        # Wait for each module until its own deadline, soonest first
+        for name, run in sorted(runs.items(), key=lambda item: item[1]["deadline"].at or float("inf")):
+            remaining = run["deadline"].remaining()
+            wait([run["future"]], timeout=None if remaining is None else remaining + self.grace)
+
+        return {name: self._record(name, run, expected, progress) for name, run in runs.items()}
+
+    def shutdown(self, wait=True):
+        """Stop accepting modules and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
+
+    def _run_module(self, name, module, run, progress, inputs=()):
+        run["started"] = time.monotonic()
+        if progress:
+            progress(name, "running")
+        try:
+            return module(run["deadline"], *inputs)
+        finally:
+            run["finished"] = time.monotonic()
+
+    def _submit_after(self, name, module, run, prerequisites, progress):
+        """Submit a module once the futures it runs after are done, resolving its placeholder future"""
+        remaining = [len(prerequisites)]
+        lock = threading.Lock()
+
+        def resolve(inputs):
+            future = run["future"]
+            # Abandoned by _record while waiting
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self._run_module(name, module, run, progress, inputs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            inputs = [
+                f.result() if not f.cancelled() and f.exception() is None else None
+                for f in prerequisites
+            ]
+            self._executor.submit(resolve, inputs)
+
+        for prerequisite in prerequisites:
+            prerequisite.add_done_callback(done)
+
+    def _record(self, name, run, expected, progress):
+        """Summarize one module run, abandoning it if it is still going"""
+        future = run["future"]
+        now = time.monotonic()
+        started = run["started"]
+        record = {
+            "state": "complete",
+            "results": [],
+            "scored": 0,
+            "queue_time": (started if started is not None else now) - run["submitted"],
+            "wall_time": ((run["finished"] or now) - started) if started is not None else 0.0,
+            "error": None,
+        }
+
+        if not future.done():
+            # Never started, or ignored its deadline: drop it without blocking the analysis
+            future.cancel()
+            record["state"] = "partial"
+            record["error"] = "Timed out"
+        elif future.cancelled():
+            record["state"] = "partial"
+        elif future.exception() is not None:
+            record["state"] = "failed"
+            record["error"] = str(future.exception())
+        else:
+            record["results"] = future.result()
+            record["scored"] = len(record["results"])
+            if record["scored"] < expected:
+                record["state"] = "partial"
+
+        if progress:
+            progress(name, record["state"])
+        return record
@@ -0,0 +1,394 @@
+"""
+Concurrent review scraper.
+
+Fetches a product's paginated review pages with asyncio over pooled
+keep-alive connections. The first page tells how many pages there are; the
+rest are fetched concurrently by a fixed number of workers, within a
+per-host request rate, retrying failed requests with exponential backoff.
+Pages are cached with their ETag/Last-Modified validators, so a rescan sends
+conditional requests and unchanged pages cost a 304 instead of a download.
+
+The scraper runs its own event loop on a background thread, shared by every
+scrape in the process so connections are reused across analyses.
+iter_reviews() is a plain iterator yielding reviews as their pages arrive.
+"""
+import asyncio
+import json
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+import aiohttp
+import instrumentation
+
+USER_AGENT = "DeceptiScan/1.0"
+
+# Responses worth retrying; other errors fail the page at once
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+PAGES = instrumentation.registry.counter(
+    "deceptiscan_scraper_pages", "Review pages requested, by outcome", ["outcome"])
+FETCH_SECONDS = instrumentation.registry.histogram(
+    "deceptiscan_scraper_fetch_seconds", "Time to fetch one review page, including retries")
+
+class ScrapeError(Exception):
+    """Raised when a page can't be fetched"""
+
+class _Retry(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def normalize_review(raw):
+    """
+    Turn a review from a page into the review dict the analysis expects
+
+    The verdict fields start out unscored; the detection modules add their
+    scores when the review is analyzed.
+
+    Args:
+        raw (dict): Review as found on the page
+
+    Returns:
+        dict: Review with id, text, rating, author, date, verified and verdict fields
+    """
+    rating = raw.get("rating")
+    return {
+        "id": raw.get("id"),
+        "text": raw.get("text") or "",
+        "rating": int(float(rating)) if rating not in (None, "") else None,
+        "author": raw.get("author"),
+        "date": raw.get("date"),
+        "verified": bool(raw.get("verified", False)),
+        "platform": raw.get("platform"),
+        "is_fake": False,
+        "fake_score": 0.0,
+        "fake_reasons": [],
+    }
+
+class JsonReviewPages:
+    """
+    Review pages served as JSON: {"reviews": [...], "pages": total page count}
+    """
+
+    def __init__(self, page_url="{product_url}/reviews?page={page}"):
+        """
+        Args:
+            page_url (str): Template of a page URL with {product_url} and {page}
+        """
+        self.page_url = page_url
+
+    def url(self, product_url, page):
+        return self.page_url.format(product_url=product_url.rstrip("/"), page=page)
+
+    def parse(self, body):
+        """
+        Parse one page
+
+        Args:
+            body (bytes): Page content
+
+        Returns:
+            tuple: (list of review dicts, total number of pages or None)
+        """
+        data = json.loads(body)
+        return [normalize_review(raw) for raw in data.get("reviews", [])], data.get("pages")
+
+class PageCache:
+    """
+    Fetched pages with their ETag/Last-Modified validators, in a SQLite file.
+
+    Only used from the scraper's event loop thread.
+    """
+
+    def __init__(self, path="data/pages.sqlite3"):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, url):
+        """
+        Look up a cached page
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            tuple: (etag, last_modified, body), or None if the page isn't cached
+        """
+        row = self._conn.execute("SELECT etag, last_modified, body FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], zlib.decompress(row[2])
+
+    def put(self, url, etag, last_modified, body):
+        """Cache a page, if the server gave it a validator"""
+        if not etag and not last_modified:
+            return
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO pages (url, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                "body = excluded.body, fetched_at = excluded.fetched_at",
+                (url, etag, last_modified, zlib.compress(body), time.time()),
+            )
+
+    def close(self):
+        self._conn.close()
+
+class HostRateLimiter:
+    """Token bucket per host, for use on one event loop"""
+
+    def __init__(self, rate=20.0, burst=None):
+        """
+        Args:
+            rate (float): Requests per second per host, 0 for no limit
+            burst (int, optional): Requests allowed back to back, rate by default
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._buckets = {}
+
+    async def acquire(self, host):
+        if not self.rate:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            tokens, updated = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[host] = (tokens - 1, now)
+                return
+            self._buckets[host] = (tokens, now)
+            await asyncio.sleep((1 - tokens) / self.rate)
+
+class ReviewScraper:
+    """
+    Scrapes paginated review pages concurrently on a background event loop.
+    """
+
+    def __init__(self, pages=None, cache=None, concurrency=16, connections_per_host=8, rate=20.0,
+                 retries=4, backoff=0.5, max_backoff=30.0, timeout=30.0, max_buffered_pages=64):
+        """
+        Args:
+            pages (JsonReviewPages, optional): Page URLs and parsing
+            cache (PageCache, optional): Cache for conditional requests
+            concurrency (int): Pages fetched at once per product
+            connections_per_host (int): Pooled connections per host
+            rate (float): Requests per second per host, 0 for no limit
+            retries (int): Retries per page after the first attempt
+            backoff (float): Seconds before the first retry, doubled for each further one
+            max_backoff (float): Longest wait between retries
+            timeout (float): Seconds per request
+            max_buffered_pages (int): Pages fetched ahead of the consumer
+        """
+        self.pages = pages or JsonReviewPages()
+        self.cache = cache
+        self.concurrency = concurrency
+        self.connections_per_host = connections_per_host
+        self.limiter = HostRateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_buffered_pages = max_buffered_pages
+        self._loop = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    def iter_reviews(self, product_url):
+        """
+        Scrape a product's reviews
+
+        Pages are fetched in the background while the caller consumes them;
+        closing the iterator early stops the scrape.
+
+        Args:
+            product_url (str): The product page URL
+
+        Yields:
+            dict: Reviews, page by page in the order pages arrive
+        """
+        loop = self._ensure_loop()
+        pages = queue.Queue()
+        window = {}
+
+        async def pump():
+            # Stay at most max_buffered_pages ahead of the consumer
+            window["semaphore"] = asyncio.Semaphore(self.max_buffered_pages)
+            try:
+                async for reviews in self.scrape(product_url):
+                    await window["semaphore"].acquire()
+                    pages.put(("page", reviews))
+                pages.put(("done", None))
+            except Exception as e:
+                pages.put(("error", e))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        try:
+            while True:
+                try:
+                    kind, value = pages.get(timeout=self.stall_timeout())
+                except queue.Empty:
+                    raise ScrapeError(f"No review page of {product_url} arrived "
+                                      f"within {self.stall_timeout():.0f}s")
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise value
+                loop.call_soon_threadsafe(window["semaphore"].release)
+                yield from value
+        finally:
+            future.cancel()
+
+    async def scrape(self, product_url):
+        """
+        Fetch a product's review pages
+
+        The first page is fetched on its own to learn the page count; the
+        rest are fetched by concurrent workers. A page that still fails
+        after its retries is skipped, except for the first one.
+
+        Args:
+            product_url (str): The product page URL
+
+        Yields:
+            list: Reviews of one page
+        """
+        session = self._get_session()
+        reviews, total = self.pages.parse(await self._fetch(session, self.pages.url(product_url, 1)))
+        yield reviews
+        if not total or total < 2:
+            return
+
+        results = asyncio.Queue(maxsize=self.concurrency)
+        remaining = iter(range(2, total + 1))
+
+        async def worker():
+            # Every page posts a result, so the loop below never waits on a page that failed
+            for page in remaining:
+                url = self.pages.url(product_url, page)
+                try:
+                    reviews = self.pages.parse(await self._fetch(session, url))[0]
+                except ScrapeError:
+                    # Already counted as a failed page
+                    reviews = None
+                except Exception:
+                    PAGES.inc(outcome="malformed")
+                    reviews = None
+                await results.put(reviews)
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, total - 1))]
+        try:
+            for _ in range(total - 1):
+                reviews = await results.get()
+                if reviews:
+                    yield reviews
+        finally:
+            for task in workers:
+                task.cancel()
+
+    def stall_timeout(self):
+        """Longest a page can legitimately take: every attempt timing out, with the longest backoffs"""
+        return self.timeout * (self.retries + 1) + self.max_backoff * self.retries
+
+    def close(self):
+        """Close pooled connections and stop the event loop"""
+        with self._lock:
+            if self._loop is None:
+                return
+            if self._session is not None:
+                asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+                self._session = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="scraper", daemon=True).start()
+            return self._loop
+
+    def _get_session(self):
+        # Created on the event loop, then shared by every scrape
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency * 4,
+                                               limit_per_host=self.connections_per_host),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+            )
+        return self._session
+
+    async def _fetch(self, session, url):
+        """Fetch one page, conditionally if it's cached, retrying with backoff"""
+        start = time.perf_counter()
+        cached = self.cache.get(url) if self.cache is not None else None
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        host = urlsplit(url).netloc
+        try:
+            for attempt in range(self.retries + 1):
+                await self.limiter.acquire(host)
+                try:
+                    async with session.get(url, headers=headers) as response:
+                        if response.status == 304 and cached is not None:
+                            PAGES.inc(outcome="not_modified")
+                            return cached[2]
+                        if response.status in RETRY_STATUSES:
+                            raise _Retry(f"HTTP {response.status}", _retry_after(response.headers.get("Retry-After")))
+                        if response.status != 200:
+                            raise ScrapeError(f"HTTP {response.status} for {url}")
+                        body = await response.read()
+                except (_Retry, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == self.retries:
+                        raise ScrapeError(f"Giving up on {url} after {attempt + 1} attempts: {e}")
+                    PAGES.inc(outcome="retried")
+                    delay = getattr(e, "retry_after", None)
+                    if delay is None:
+                        # Exponential backoff with jitter
+                        delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                    await asyncio.sleep(min(delay, self.max_backoff))
+                    continue
+
+                PAGES.inc(outcome="fetched")
+                if self.cache is not None:
+                    self.cache.put(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), body)
+                return body
+        except ScrapeError:
+            PAGES.inc(outcome="failed")
+            raise
+        finally:
+            FETCH_SECONDS.observe(time.perf_counter() - start)
+
+def _retry_after(value):
+    """Seconds from a Retry-After header given in seconds"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
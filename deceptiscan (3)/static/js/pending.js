@@ -0,0 +1,53 @@
+document.addEventListener("DOMContentLoaded", () => {
+  // Set current year in footer
+  document.getElementById("current-year").textContent = new Date().getFullYear()
+
+  // Theme toggle
+  const themeToggle = document.getElementById("theme-toggle")
+  if (themeToggle) {
+    themeToggle.addEventListener("click", () => {
+      document.body.classList.toggle("dark-mode")
+      localStorage.setItem("dark-mode", document.body.classList.contains("dark-mode"))
+    })
+
+    // Check for saved theme preference
+    if (localStorage.getItem("dark-mode") === "true") {
+      document.body.classList.add("dark-mode")
+    }
+  }
+
+  // Poll the job status until results are ready
+  const statusCard = document.getElementById("analysis-status")
+  const stateLabel = document.getElementById("analysis-state")
+  const moduleList = document.getElementById("module-status")
+  const statusUrl = statusCard.getAttribute("data-status-url")
+
+  const poll = () => {
+    fetch(statusUrl)
+      .then((response) => response.json())
+      .then((status) => {
+        if (status.state === "done") {
+          window.location.reload()
+          return
+        }
+
+        if (status.state === "failed") {
+          stateLabel.textContent = "Analysis failed: " + (status.error || "unknown error")
+          return
+        }
+
+        stateLabel.textContent = status.state === "queued" ? "Queued" : "Running"
+        moduleList.innerHTML = ""
+        Object.entries(status.modules || {}).forEach(([name, state]) => {
+          const item = document.createElement("li")
+          item.textContent = name + ": " + state
+          moduleList.appendChild(item)
+        })
+
+        setTimeout(poll, 1000)
+      })
+      .catch(() => setTimeout(poll, 2000))
+  }
+
+  setTimeout(poll, 1000)
+})
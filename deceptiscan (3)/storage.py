@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+def _pack(value):
+    """Serialize a value to compressed compact JSON"""
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+def _unpack(blob):
+    """Inverse of _pack"""
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+def product_analysis_id(product_url):
+    """
+    Derive a stable analysis id from a product URL, so rescans update one analysis
+
+    Args:
+        product_url (str): The product page URL
+
+    Returns:
+        str: 16 hex characters identifying the product
+    """
+    parts = urlsplit(product_url.strip())
+    normalized = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+def review_key(review):
+    """Identify a review across scans by its id, or by its author, date and text"""
+    if review.get('id') is not None:
+        return str(review['id'])
+    content = f"{review.get('author')}\0{review.get('date')}\0{review.get('text')}"
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+class StoredAnalysis(dict):
+    """
+    Analysis summary whose reviews are loaded from the store on first access.
+    Templates can use analysis.reviews as if the list were stored inline.
+    """
+
+    def __init__(self, summary, store):
+        super().__init__(summary)
+        self._store = store
+
+    def __missing__(self, key):
+        if key != 'reviews':
+            raise KeyError(key)
+        reviews = self._store.get_reviews(self['id'])
+        self['reviews'] = reviews
+        return reviews
+
+class AnalysisStore:
+    """
+    Persistent analysis result store backed by a local SQLite file.
+
+    The file is shared by every process that opens it, so any WSGI worker can
+    serve /analysis/<id>. Summaries are cached in a small in-process LRU tier,
+    revalidated against the row's write time so updates from other processes
+    are seen; reviews are stored in separate batches and only loaded when accessed.
+    A rescan appends a batch with just its new reviews, and the ids of stored
+    reviews are indexed so new ones can be picked out without loading them.
+    Entries older than ttl seconds are evicted, and the oldest entries are
+    dropped once max_entries is exceeded.
+    """
+
+    def __init__(self, path="data/analyses.sqlite3", ttl=7 * 24 * 3600, max_entries=100000,
+                 cache_size=256, maintenance_interval=100):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_size = cache_size
+        self.maintenance_interval = maintenance_interval
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._writes = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                summary BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS analyses_created_at ON analyses (created_at);
+            CREATE TABLE IF NOT EXISTS review_batches (
+                analysis_id TEXT NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+                batch INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (analysis_id, batch)
+            );
+            CREATE TABLE IF NOT EXISTS seen_reviews (
+                analysis_id TEXT NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+                review_key TEXT NOT NULL,
+                PRIMARY KEY (analysis_id, review_key)
+            ) WITHOUT ROWID;
+        """)
+
+        # Move reviews from the single-blob layout into the first batch
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reviews'").fetchone():
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO review_batches SELECT analysis_id, 0, data FROM reviews")
+                conn.execute("DROP TABLE reviews")
+
+    def put(self, analysis):
+        """
+        Store an analysis result, replacing any previous result with the same id
+
+        Args:
+            analysis (dict): Analysis result as built by perform_analysis
+        """
+        summary = {k: v for k, v in analysis.items() if k != 'reviews'}
+        reviews = analysis.get('reviews', [])
+
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM review_batches WHERE analysis_id = ?", (analysis['id'],))
+            conn.execute("DELETE FROM seen_reviews WHERE analysis_id = ?", (analysis['id'],))
+            created_at = self._write(conn, analysis['id'], summary, reviews, 0)
+
+        self._written(analysis['id'], created_at, summary)
+
+    def append(self, analysis, rebase=None):
+        """
+        Update a stored analysis with the reviews found by a rescan
+
+        The stored summary is read and rewritten in one write transaction, so
+        rescans of the same analysis from several workers don't lose updates.
+
+        Args:
+            analysis (dict): Updated analysis whose "reviews" are only the reviews
+                not stored before, see unseen_reviews
+            rebase (callable): Called as rebase(stored, summary, reviews) with the
+                summary stored when the write begins and the reviews still unseen
+                by then; returns the summary to store. Without it the analysis
+                summary replaces the stored one.
+        """
+        summary = {k: v for k, v in analysis.items() if k != 'reviews'}
+        reviews = analysis.get('reviews', [])
+
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another worker may have stored some of these reviews since they were picked out
+            reviews = self._unseen(conn, analysis['id'], reviews)
+            if rebase is not None:
+                row = conn.execute("SELECT summary FROM analyses WHERE id = ?", (analysis['id'],)).fetchone()
+                if row is not None:
+                    summary = rebase(_unpack(row[0]), summary, reviews)
+            batch = conn.execute(
+                "SELECT COALESCE(MAX(batch) + 1, 0) FROM review_batches WHERE analysis_id = ?",
+                (analysis['id'],),
+            ).fetchone()[0]
+            created_at = self._write(conn, analysis['id'], summary, reviews, batch)
+
+        self._written(analysis['id'], created_at, summary)
+
+    def unseen_reviews(self, analysis_id, reviews):
+        """
+        Pick out the reviews that aren't stored with an analysis yet
+
+        Args:
+            analysis_id (str): The analysis id
+            reviews (list): Review dicts from a rescan
+
+        Returns:
+            list: The new reviews, in input order
+        """
+        return self._unseen(self._connect(), analysis_id, reviews)
+
+    def get(self, analysis_id):
+        """
+        Fetch an analysis result
+
+        Args:
+            analysis_id (str): The analysis id
+
+        Returns:
+            StoredAnalysis: The analysis with lazily loaded reviews, or None if missing or expired
+        """
+        cached = self._cache_get(analysis_id)
+
+        # The summary is only sent when the row changed since it was cached
+        row = self._connect().execute(
+            "SELECT created_at, CASE WHEN created_at = ? THEN NULL ELSE summary END"
+            " FROM analyses WHERE id = ? AND created_at >= ?",
+            (cached[0] if cached else None, analysis_id, time.time() - self.ttl),
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is None:
+            summary = cached[1]
+        else:
+            summary = _unpack(row[1])
+            self._cache_put(analysis_id, row[0], summary)
+
+        return StoredAnalysis(summary, self)
+
+    def get_reviews(self, analysis_id):
+        """
+        Load the reviews stored for an analysis
+
+        Args:
+            analysis_id (str): The analysis id
+
+        Returns:
+            list: Review dicts, empty if the analysis is missing
+        """
+        rows = self._connect().execute(
+            "SELECT data FROM review_batches WHERE analysis_id = ? ORDER BY batch", (analysis_id,)
+        ).fetchall()
+        return [review for row in rows for review in _unpack(row[0])]
+
+    def __contains__(self, analysis_id):
+        row = self._connect().execute(
+            "SELECT 1 FROM analyses WHERE id = ? AND created_at >= ?",
+            (analysis_id, time.time() - self.ttl),
+        ).fetchone()
+        return row is not None
+
+    def evict(self):
+        """Delete expired entries and trim the store to max_entries"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM analyses WHERE created_at < ?", (time.time() - self.ttl,))
+            conn.execute("""
+                DELETE FROM analyses WHERE id IN (
+                    SELECT id FROM analyses ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            conn.execute("DELETE FROM review_batches WHERE analysis_id NOT IN (SELECT id FROM analyses)")
+            conn.execute("DELETE FROM seen_reviews WHERE analysis_id NOT IN (SELECT id FROM analyses)")
+
+        # Drop cached summaries whose rows were trimmed
+        with self._cache_lock:
+            cached = list(self._cache)
+        if cached:
+            placeholders = ",".join("?" * len(cached))
+            rows = conn.execute(f"SELECT id FROM analyses WHERE id IN ({placeholders})", cached).fetchall()
+            live = {row[0] for row in rows}
+            with self._cache_lock:
+                for analysis_id in cached:
+                    if analysis_id not in live:
+                        self._cache.pop(analysis_id, None)
+
+    def _unseen(self, conn, analysis_id, reviews):
+        """unseen_reviews on the given connection"""
+        keys = [review_key(review) for review in reviews]
+        seen = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT review_key FROM seen_reviews WHERE analysis_id = ? AND review_key IN ({placeholders})",
+                [analysis_id] + chunk,
+            ).fetchall()
+            seen.update(row[0] for row in rows)
+        return [review for review, key in zip(reviews, keys) if key not in seen]
+
+    def _write(self, conn, analysis_id, summary, reviews, batch):
+        """
+        Write a summary and one batch of reviews inside the caller's transaction,
+        returning the summary's write time
+        """
+        created_at = time.time()
+        # An upsert, as REPLACE would cascade-delete the earlier batches
+        conn.execute("""
+            INSERT INTO analyses (id, created_at, summary) VALUES (?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET created_at = excluded.created_at, summary = excluded.summary
+        """, (analysis_id, created_at, _pack(summary)))
+        if reviews:
+            conn.execute(
+                "INSERT INTO review_batches (analysis_id, batch, data) VALUES (?, ?, ?)",
+                (analysis_id, batch, _pack(reviews)),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO seen_reviews (analysis_id, review_key) VALUES (?, ?)",
+                ((analysis_id, review_key(review)) for review in reviews),
+            )
+        return created_at
+
+    def _written(self, analysis_id, created_at, summary):
+        self._cache_put(analysis_id, created_at, summary)
+
+        self._writes += 1
+        if self._writes % self.maintenance_interval == 0:
+            self.evict()
+
+    def _cache_get(self, analysis_id):
+        """Return the (created_at, summary) of a cached, unexpired summary and mark it recently used"""
+        with self._cache_lock:
+            entry = self._cache.get(analysis_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time() - self.ttl:
+                del self._cache[analysis_id]
+                return None
+            self._cache.move_to_end(analysis_id)
+            return entry
+
+    def _cache_put(self, analysis_id, created_at, summary):
+        with self._cache_lock:
+            self._cache[analysis_id] = (created_at, summary)
+            self._cache.move_to_end(analysis_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _connect(self):
+        """Return this thread's SQLite connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
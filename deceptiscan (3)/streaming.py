@@ -0,0 +1,85 @@
+import json
+
+class RatingAggregate:
+    """
+    Running totals behind an analysis' rating summary.
+    Reviews are added one at a time, so memory doesn't grow with review count.
+    """
+
+    def __init__(self, total_reviews=0, fake_reviews=0, rating_sum=0, genuine_rating_sum=0,
+                 rated_reviews=None, genuine_rated_reviews=None):
+        self.total_reviews = total_reviews
+        self.fake_reviews = fake_reviews
+        self.rating_sum = rating_sum
+        self.genuine_rating_sum = genuine_rating_sum
+
+        # Reviews with a rating, behind the averages; states saved before
+        # unrated reviews were counted had every review rated
+        self.rated_reviews = total_reviews if rated_reviews is None else rated_reviews
+        self.genuine_rated_reviews = (total_reviews - fake_reviews if genuine_rated_reviews is None
+                                      else genuine_rated_reviews)
+
+    def add(self, review):
+        """
+        Add a scored review to the totals
+
+        Reviews without a rating count as reviews but not towards the ratings.
+
+        Args:
+            review (dict): Review with "rating" (or None) and "is_fake"
+        """
+        self.total_reviews += 1
+        if review["is_fake"]:
+            self.fake_reviews += 1
+
+        rating = review.get("rating")
+        if rating is None:
+            return
+        self.rated_reviews += 1
+        self.rating_sum += rating
+        if not review["is_fake"]:
+            self.genuine_rated_reviews += 1
+            self.genuine_rating_sum += rating
+
+    def state(self):
+        """
+        Running sums to store with an analysis, restored with RatingAggregate(**state)
+
+        Returns:
+            dict: Review, fake review and rated review counts and rating sums
+        """
+        return {
+            "total_reviews": self.total_reviews,
+            "fake_reviews": self.fake_reviews,
+            "rating_sum": self.rating_sum,
+            "genuine_rating_sum": self.genuine_rating_sum,
+            "rated_reviews": self.rated_reviews,
+            "genuine_rated_reviews": self.genuine_rated_reviews,
+        }
+
+    def summary(self):
+        """
+        Compute the rating summary from the totals
+
+        Returns:
+            dict: original_rating, real_rating, total_reviews, fake_reviews and fake_percentage
+        """
+        original_rating = self.rating_sum / self.rated_reviews if self.rated_reviews else 0
+        real_rating = self.genuine_rating_sum / self.genuine_rated_reviews if self.genuine_rated_reviews else 0
+        fake_percentage = (self.fake_reviews / self.total_reviews) * 100 if self.total_reviews else 0
+
+        return {
+            "original_rating": round(original_rating, 1),
+            "real_rating": round(real_rating, 1),
+            "total_reviews": self.total_reviews,
+            "fake_reviews": self.fake_reviews,
+            "fake_percentage": fake_percentage,
+        }
+
+def to_ndjson(record):
+    """Encode a stream record as one line of NDJSON"""
+    return json.dumps(record, separators=(',', ':')) + "\n"
+
+def to_sse(record):
+    """Encode a stream record as a Server-Sent Event named after its type"""
+    return f"event: {record['type']}\ndata: {json.dumps(record, separators=(',', ':'))}\n\n"
@@ -0,0 +1,139 @@
+"""
+Local stub of a paginated review API, for exercising the scraper.
+
+Serves the synthetic reviews of corpus.py as JSON pages at
+/product/<n>/reviews?page=<k> over HTTP/1.1 keep-alive, with ETag and
+Last-Modified validators and 304 responses to conditional requests. Added
+latency, a share of 503 responses and malformed pages can be configured to
+exercise concurrency, retries and error handling.
+
+Usage:
+    python stub_review_server.py [--port 8765] [--pages 100] [--page-size 20] [--latency MS] [--fail-rate R]
+        [--malformed-pages 3,7]
+
+Then scrape it with e.g.
+    REVIEW_PAGE_URL="{product_url}/reviews?page={page}" and product URL http://127.0.0.1:8765/product/1
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from corpus import SyntheticCorpus
+
+PAGE_PATH = re.compile(r"^/product/(\d+)/reviews/?$")
+
+# Same Last-Modified for every page; clients that send an ETag are answered by it
+LAST_MODIFIED = formatdate(0, usegmt=True)
+
+class StubReviewServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages=100, page_size=20, latency=0.0, fail_rate=0.0, seed=0, malformed_pages=()):
+        super().__init__(address, StubReviewHandler)
+        self.pages = pages
+        self.page_size = page_size
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.seed = seed
+        # Pages whose reviews aren't objects
+        self.malformed_pages = set(malformed_pages)
+        self.requests = 0
+        self._products = {}
+        self._lock = threading.Lock()
+
+    def page(self, product, page):
+        """JSON body of one page of a product's reviews"""
+        with self._lock:
+            reviews = self._products.get(product)
+            if reviews is None:
+                corpus = SyntheticCorpus(seed=self.seed * 1000003 + product)
+                reviews = corpus.reviews(self.pages * self.page_size, reviews_per_product=self.pages * self.page_size)
+                self._products[product] = reviews
+        if page in self.malformed_pages:
+            return json.dumps({"reviews": ["not-a-dict"] * self.page_size, "page": page,
+                               "pages": self.pages}).encode("utf-8")
+        start = (page - 1) * self.page_size
+        items = [
+            dict({key: review[key] for key in ("text", "rating", "author", "date", "verified")},
+                 id=f"{product}-{review['id']}")
+            for review in reviews[start:start + self.page_size]
+        ]
+        return json.dumps({"reviews": items, "page": page, "pages": self.pages}).encode("utf-8")
+
+class StubReviewHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        url = urlsplit(self.path)
+        match = PAGE_PATH.match(url.path)
+        try:
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+        except ValueError:
+            page = 0
+        if not match or not 1 <= page <= server.pages:
+            return self._send(404, b'{"error": "not found"}')
+        if server.fail_rate and random.random() < server.fail_rate:
+            return self._send(503, b'{"error": "unavailable"}', {"Retry-After": "0"})
+
+        body = server.page(int(match.group(1)), page)
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        headers = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+        # If-None-Match takes precedence over If-Modified-Since
+        if "If-None-Match" in self.headers:
+            not_modified = self.headers["If-None-Match"] == etag
+        else:
+            not_modified = self.headers.get("If-Modified-Since") == LAST_MODIFIED
+        if not_modified:
+            return self._send(304, b"", headers)
+        self._send(200, body, headers)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic review pages for the scraper")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=100, help="Review pages per product")
+    parser.add_argument("--page-size", type=int, default=20, help="Reviews per page")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--malformed-pages", default="", help="Comma-separated pages served with malformed reviews")
+    args = parser.parse_args()
+
+    malformed = [int(page) for page in args.malformed_pages.split(",") if page.strip()]
+    server = StubReviewServer((args.host, args.port), args.pages, args.page_size,
+                              args.latency / 1000, args.fail_rate, args.seed, malformed)
+    print(f"Serving review pages on http://{args.host}:{server.server_port}/product/<n>/reviews?page=<k>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
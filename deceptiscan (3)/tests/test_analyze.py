@@ -0,0 +1,39 @@
+"""
+Tests of the /analyze form endpoint.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's stores out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="deceptiscan-test-")
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(DATA_DIR, "analyses.sqlite3"))
+os.environ.setdefault("SCRAPE_CACHE_PATH", os.path.join(DATA_DIR, "pages.sqlite3"))
+os.environ.setdefault("CROSS_PLATFORM_INDEX_PATH", os.path.join(DATA_DIR, "cross_platform_index"))
+os.environ.setdefault("REVIEWER_BEHAVIOR_PATH", os.path.join(DATA_DIR, "reviewer_behavior.npz"))
+os.environ.setdefault("NETWORK_GRAPH_PATH", os.path.join(DATA_DIR, "network_graph.npz"))
+
+import app
+
+class AnalyzeFormTest(unittest.TestCase):
+
+    def test_missing_product_url_is_rejected(self):
+        submitted = []
+        submit, app.analysis_queue.submit = app.analysis_queue.submit, lambda *args: submitted.append(args)
+        try:
+            client = app.app.test_client()
+            for form in ({}, {"product_url": ""}, {"product_url": "   "}):
+                self.assertEqual(client.post("/analyze", data=form).status_code, 400)
+        finally:
+            app.analysis_queue.submit = submit
+        self.assertEqual(submitted, [])
+
+if __name__ == "__main__":
+    unittest.main()
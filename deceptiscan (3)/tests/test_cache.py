@@ -0,0 +1,98 @@
+"""
+Tests of the verdict cache and the analyzers wrapped in it.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from models.cache import VerdictCache, CachedAnalyzer
+
+class CountingAnalyzer:
+    """Scores a review by its length and records the texts it was asked to score"""
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.scored = []
+
+    def analyze_reviews(self, docs, ratings=None):
+        self.scored.extend(doc.text for doc in docs)
+        ratings = ratings or [None] * len(docs)
+        return [{"fake_score": len(doc.text) / 100, "rating": rating} for doc, rating in zip(docs, ratings)]
+
+class VerdictCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmpdir.name, "model.artifact")
+        self.disk_path = os.path.join(self.tmpdir.name, "verdicts.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def cached(self, cache):
+        analyzer = CountingAnalyzer(self.model_path)
+        return analyzer, CachedAnalyzer(analyzer, cache, "counting")
+
+    def test_only_misses_are_scored(self):
+        analyzer, cached = self.cached(VerdictCache())
+        first = cached.analyze_reviews(["Great kettle", "Broke in a week", "Great kettle"])
+        self.assertEqual(analyzer.scored, ["Great kettle", "Broke in a week"])
+        self.assertEqual(first[0], first[2])
+
+        second = cached.analyze_reviews(["great  KETTLE", "Too loud"])
+        # Normalized text hits the cache
+        self.assertEqual(analyzer.scored, ["Great kettle", "Broke in a week", "Too loud"])
+        self.assertEqual(second[0], first[0])
+        self.assertEqual(cached.cache.stats()["hits"], 1)
+
+    def test_rating_is_part_of_the_key(self):
+        analyzer, cached = self.cached(VerdictCache())
+        cached.analyze_reviews(["Great kettle"], [5])
+        cached.analyze_reviews(["Great kettle"], [1])
+        self.assertEqual(len(analyzer.scored), 2)
+
+    def test_results_are_copies(self):
+        _, cached = self.cached(VerdictCache())
+        cached.analyze_reviews(["Great kettle"])[0]["fake_score"] = 1.0
+        self.assertEqual(cached.analyze_reviews(["Great kettle"])[0]["fake_score"], len("Great kettle") / 100)
+
+    def test_memory_tier_is_bounded(self):
+        cache = VerdictCache(max_entries=2)
+        analyzer, cached = self.cached(cache)
+        cached.analyze_reviews(["one", "two", "three"])
+        self.assertEqual(cache.stats()["memory_entries"], 2)
+        cached.analyze_reviews(["one"])
+        self.assertEqual(analyzer.scored.count("one"), 2)
+
+    def test_disk_tier_is_shared(self):
+        _, cached = self.cached(VerdictCache(disk_path=self.disk_path))
+        cached.analyze_reviews(["Great kettle"])
+
+        # Another process, with an empty memory tier
+        analyzer, cached = self.cached(VerdictCache(disk_path=self.disk_path))
+        cached.analyze_reviews(["Great kettle"])
+        self.assertEqual(analyzer.scored, [])
+        self.assertEqual(cached.cache.stats()["disk_hits"], 1)
+
+    def test_new_artifact_invalidates_verdicts(self):
+        cache = VerdictCache(disk_path=self.disk_path)
+        analyzer, cached = self.cached(cache)
+        cached.analyze_reviews(["Great kettle"])
+
+        with open(self.model_path, "wb") as f:
+            f.write(b"retrained")
+        cached.analyze_reviews(["Great kettle"])
+        self.assertEqual(analyzer.scored, ["Great kettle", "Great kettle"])
+        # The old version's verdict is dropped from disk
+        count = cache._connect().execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        self.assertEqual(count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests of the stylometry cascade's thresholds and their calibration.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's stores out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="deceptiscan-test-")
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(DATA_DIR, "analyses.sqlite3"))
+os.environ.setdefault("SCRAPE_CACHE_PATH", os.path.join(DATA_DIR, "pages.sqlite3"))
+os.environ.setdefault("CROSS_PLATFORM_INDEX_PATH", os.path.join(DATA_DIR, "cross_platform_index"))
+os.environ.setdefault("REVIEWER_BEHAVIOR_PATH", os.path.join(DATA_DIR, "reviewer_behavior.npz"))
+os.environ.setdefault("NETWORK_GRAPH_PATH", os.path.join(DATA_DIR, "network_graph.npz"))
+
+import app
+from calibrate_cascade import recommend
+from models.cascade import CascadeScorer
+from models.gan_detector import GANDetector
+from models.preprocessing import as_documents
+from models.sentiment import SentimentAnalyzer
+from models.stylometry import StyleAnalyzer
+
+def report(model_accuracy, *entries):
+    return {
+        "model_only": {"accuracy": model_accuracy},
+        "thresholds": [{"low": low, "high": high, "accuracy": accuracy, "reviews_per_second": speed}
+                       for low, high, accuracy, speed in entries],
+    }
+
+class CascadeThresholdsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = lambda name: os.path.join(self.tmpdir.name, name)
+        self.analyzers = (StyleAnalyzer(path("stylometry.artifact")), SentimentAnalyzer(path("sentiment.artifact")),
+                          GANDetector(path("gan.artifact")))
+        self.texts = [review["text"] for review in app.get_mock_reviews()]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_only_reviews_between_the_thresholds_reach_the_model(self):
+        cheap = CascadeScorer(*self.analyzers).cheap_scores(as_documents(self.texts))
+        low, high = sorted(cheap)[2], sorted(cheap)[-2]
+        results = CascadeScorer(*self.analyzers, low=low, high=high).analyze_reviews(self.texts)
+        for score, result in zip(cheap, results):
+            self.assertEqual(result["tier"], "model" if low < score < high else "cheap")
+            if result["tier"] == "cheap":
+                self.assertEqual(result["is_fake"], score >= high)
+
+    def test_wide_and_empty_bands(self):
+        everything = CascadeScorer(*self.analyzers, low=-1.0, high=2.0).analyze_reviews(self.texts)
+        self.assertEqual({result["tier"] for result in everything}, {"model"})
+        nothing = CascadeScorer(*self.analyzers, low=0.95, high=1.0).analyze_reviews(self.texts)
+        self.assertEqual({result["tier"] for result in nothing}, {"cheap"})
+
+    def test_app_setting(self):
+        self.assertIsNone(app.parse_cascade_thresholds(None))
+        self.assertEqual(app.parse_cascade_thresholds("0.2,0.8"), (0.2, 0.8))
+        for value in ("0.8,0.2", "0.5", "low,high"):
+            with self.assertRaises(ValueError):
+                app.parse_cascade_thresholds(value)
+
+class RecommendTest(unittest.TestCase):
+
+    def test_fastest_pair_within_tolerance(self):
+        calibrated = report(0.9, (0.1, 0.9, 0.9, 100.0), (0.3, 0.7, 0.885, 400.0), (0.4, 0.6, 0.8, 900.0))
+        self.assertEqual(recommend(calibrated, 0.02)["reviews_per_second"], 400.0)
+        self.assertEqual(recommend(calibrated, 0.0)["reviews_per_second"], 100.0)
+
+    def test_no_labelled_reviews(self):
+        self.assertIsNone(recommend(report(None), 0.01))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests of the cross-platform matching index and its use by the app.
+
+Run with:
+    python -m pytest tests
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's stores out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="deceptiscan-test-")
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(DATA_DIR, "analyses.sqlite3"))
+os.environ.setdefault("SCRAPE_CACHE_PATH", os.path.join(DATA_DIR, "pages.sqlite3"))
+os.environ.setdefault("CROSS_PLATFORM_INDEX_PATH", os.path.join(DATA_DIR, "cross_platform_index"))
+os.environ.setdefault("REVIEWER_BEHAVIOR_PATH", os.path.join(DATA_DIR, "reviewer_behavior.npz"))
+os.environ.setdefault("NETWORK_GRAPH_PATH", os.path.join(DATA_DIR, "network_graph.npz"))
+
+import app
+from models.cross_platform import CrossPlatformMatcher
+
+ORIGINAL = "This blender crushes ice in seconds and the jug is easy to clean after every smoothie."
+NEAR_COPY = "This blender crushes ice in seconds and the jug is so easy to clean after every smoothie."
+UNRELATED = "Shipping took three weeks and the box arrived dented, though the kettle itself works."
+PRODUCT_URL = "https://www.example.com/product/123"
+
+class CrossPlatformIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self.tmpdir.name, "index")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_bulk_build_matches_other_platforms_only(self):
+        matcher = CrossPlatformMatcher(self.index_path)
+        matcher.bulk_build([("a1", ORIGINAL, "amazon"), ("w1", UNRELATED, "walmart")], batch_size=1)
+        self.assertEqual(len(matcher), 2)
+
+        result = matcher.analyze_reviews([NEAR_COPY], ["ebay"])[0]
+        self.assertTrue(result["is_duplicate"])
+        self.assertEqual(result["platforms"], ["amazon"])
+        # A copy on the same storefront isn't a cross-platform match
+        self.assertFalse(matcher.analyze_reviews([NEAR_COPY], ["amazon"])[0]["is_duplicate"])
+
+    def test_saved_index_reloads_with_pending_inserts(self):
+        matcher = CrossPlatformMatcher(self.index_path)
+        matcher.bulk_build([("w1", UNRELATED, "walmart")])
+        matcher.add("a1", ORIGINAL, "amazon")
+        matcher.save_index()
+
+        reloaded = CrossPlatformMatcher(self.index_path)
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(reloaded.platforms, matcher.platforms)
+        self.assertTrue(reloaded.analyze_reviews([NEAR_COPY], ["ebay"])[0]["is_duplicate"])
+
+    def test_update_indexes_each_review_after_scoring_it(self):
+        matcher = CrossPlatformMatcher(self.index_path)
+        results = matcher.analyze_reviews([ORIGINAL, UNRELATED, NEAR_COPY], review_ids=["r1", "r2", "r3"], update=True)
+        self.assertEqual([result["is_duplicate"] for result in results], [False, False, True])
+        self.assertEqual(len(matcher), 3)
+
+        # Scoring an indexed review again doesn't match it against itself
+        self.assertFalse(matcher.analyze_reviews([UNRELATED], review_ids=["r2"])[0]["is_duplicate"])
+
+    def test_build_script_writes_index(self):
+        archive = os.path.join(self.tmpdir.name, "reviews.jsonl")
+        with open(archive, "w") as f:
+            for review_id, text, platform in [("a1", ORIGINAL, "amazon"), ("w1", UNRELATED, "walmart")]:
+                f.write(json.dumps({"id": review_id, "text": text, "platform": platform}) + "\n")
+
+        subprocess.run([sys.executable, os.path.join(APP_DIR, "build_cross_platform_index.py"), archive,
+                        "--index-path", self.index_path], check=True, capture_output=True)
+        self.assertEqual(len(CrossPlatformMatcher(self.index_path)), 2)
+
+class AnalysisIndexingTest(unittest.TestCase):
+
+    def setUp(self):
+        # State of its own, free of other tests' reviews
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.saved_path = app.ANALYZER_STATE_PATHS["cross_platform"]
+        app.ANALYZER_STATE_PATHS["cross_platform"] = os.path.join(self.tmpdir.name, "cross_platform_index")
+        app._analyzers.pop("cross_platform", None)
+
+    def tearDown(self):
+        app._analyzers.pop("cross_platform", None)
+        app.ANALYZER_STATE_PATHS["cross_platform"] = self.saved_path
+        self.tmpdir.cleanup()
+
+    def test_near_copy_matches_across_analyses(self):
+        reviews = app.get_mock_reviews()
+        original = next(review for review in reviews if review["id"] == "r1")
+        near_copy = next(review for review in reviews if review["id"] == "r6")
+
+        first = app.run_modules(PRODUCT_URL, [original])["Cross-Platform Review Matching"]
+        self.assertFalse(first["results"][0]["is_duplicate"])
+        app.save_analyzer_state(force=True)
+
+        # A fresh process loads the saved index
+        app._analyzers.pop("cross_platform")
+        second = app.run_modules(PRODUCT_URL, [near_copy])["Cross-Platform Review Matching"]
+        self.assertTrue(second["results"][0]["is_duplicate"])
+
+if __name__ == "__main__":
+    unittest.main()
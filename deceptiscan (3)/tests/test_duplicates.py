@@ -0,0 +1,60 @@
+"""
+Tests of duplicate clustering across scans of a product.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's stores out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="deceptiscan-test-")
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(DATA_DIR, "analyses.sqlite3"))
+os.environ.setdefault("SCRAPE_CACHE_PATH", os.path.join(DATA_DIR, "pages.sqlite3"))
+os.environ.setdefault("CROSS_PLATFORM_INDEX_PATH", os.path.join(DATA_DIR, "cross_platform_index"))
+os.environ.setdefault("REVIEWER_BEHAVIOR_PATH", os.path.join(DATA_DIR, "reviewer_behavior.npz"))
+os.environ.setdefault("NETWORK_GRAPH_PATH", os.path.join(DATA_DIR, "network_graph.npz"))
+
+import app
+
+TEXT = "The kettle boils a full litre in under three minutes and switches itself off reliably."
+OTHER = "Arrived late and the handle wobbles, but customer service sent a replacement quickly."
+
+def review(review_id, text, is_fake=False):
+    return {"id": review_id, "text": text, "date": "2024-01-01", "is_fake": is_fake, "fake_reasons": []}
+
+class RescanDuplicatesTest(unittest.TestCase):
+
+    def test_new_reviews_cluster_with_stored_ones(self):
+        stored = [review("s1", TEXT), review("s2", OTHER)]
+        stored[0]["verified"] = True
+        analysis = {"reviews": [review("n1", TEXT, is_fake=True), review("n2", TEXT)], "duplicate_clusters": []}
+        app.add_duplicate_clusters(analysis, stored)
+
+        [cluster] = analysis["duplicate_clusters"]
+        self.assertEqual(cluster["representative"], "s1")
+        self.assertEqual({member["id"] for member in cluster["members"]}, {"s1", "n1", "n2"})
+        # Copy reasons only go to reviews the modules judged fake
+        self.assertIn("Duplicate content", analysis["reviews"][0]["fake_reasons"])
+        self.assertEqual(analysis["reviews"][1]["fake_reasons"], [])
+
+    def test_grown_cluster_replaces_stored_one(self):
+        previous = [
+            {"cluster_id": 0, "size": 2, "representative": "s1", "members": [{"id": "s1"}, {"id": "s2"}]},
+            {"cluster_id": 1, "size": 2, "representative": "s3", "members": [{"id": "s3"}, {"id": "s4"}]},
+        ]
+        found = [
+            {"cluster_id": 0, "size": 3, "representative": "s1", "members": [{"id": "s1"}, {"id": "s2"}, {"id": "n1"}]},
+            {"cluster_id": 1, "size": 2, "representative": "s3", "members": [{"id": "s3"}, {"id": "s4"}]},
+        ]
+        clusters = app.merge_clusters(previous, found, {"n1"})
+        self.assertEqual([(cluster["cluster_id"], cluster["size"]) for cluster in clusters], [(0, 2), (1, 3)])
+        self.assertEqual(clusters[0]["representative"], "s3")
+
+if __name__ == "__main__":
+    unittest.main()
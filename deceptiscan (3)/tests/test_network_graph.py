@@ -0,0 +1,93 @@
+"""
+Tests of the reviewer network graph and its module in the app.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's stores out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="deceptiscan-test-")
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(DATA_DIR, "analyses.sqlite3"))
+os.environ.setdefault("SCRAPE_CACHE_PATH", os.path.join(DATA_DIR, "pages.sqlite3"))
+os.environ.setdefault("CROSS_PLATFORM_INDEX_PATH", os.path.join(DATA_DIR, "cross_platform_index"))
+os.environ.setdefault("REVIEWER_BEHAVIOR_PATH", os.path.join(DATA_DIR, "reviewer_behavior.npz"))
+os.environ.setdefault("NETWORK_GRAPH_PATH", os.path.join(DATA_DIR, "network_graph.npz"))
+
+import app
+from models.network_graph import NetworkGraphDetector
+
+RING = ["ring1", "ring2", "ring3"]
+
+def ring_reviews(day):
+    """Reviews by the ring, all posted the same day"""
+    return [{"author": author, "date": f"2024-01-{day:02d}", "text": "Great!", "rating": 5} for author in RING]
+
+class NetworkGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmpdir.name, "network_graph.npz")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_undated_reviews_are_added(self):
+        detector = NetworkGraphDetector(self.model_path)
+        detector.add_reviews("p1", [{"author": "a"}, {"author": "b", "date": None}])
+        self.assertEqual(detector.edge_count, 2)
+
+    def test_ring_is_flagged_and_survives_reload(self):
+        detector = NetworkGraphDetector(self.model_path)
+        for day, product in enumerate(["p1", "p2", "p3"], start=1):
+            detector.add_reviews(product, ring_reviews(day))
+        results = detector.analyze_reviews(ring_reviews(4) + [{"author": "loner", "date": "2024-01-04"}], "p4")
+        self.assertEqual([result["is_fake"] for result in results], [True, True, True, False])
+        self.assertEqual(results[0]["group_size"], 3)
+        self.assertGreater(results[0]["fake_score"], 0)
+        self.assertEqual(results[3]["fake_score"], 0.0)
+
+        detector.save_model()
+        reloaded = NetworkGraphDetector(self.model_path)
+        self.assertEqual(reloaded.edge_count, detector.edge_count)
+        self.assertEqual(len(reloaded.detect_groups("p4")), 1)
+
+class NetworkGraphModuleTest(unittest.TestCase):
+
+    def setUp(self):
+        # State of its own, free of other tests' reviews
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.saved_path = app.ANALYZER_STATE_PATHS["network_graph"]
+        app.ANALYZER_STATE_PATHS["network_graph"] = os.path.join(self.tmpdir.name, "network_graph.npz")
+        app._analyzers.pop("network_graph", None)
+
+    def tearDown(self):
+        app._analyzers.pop("network_graph", None)
+        app.ANALYZER_STATE_PATHS["network_graph"] = self.saved_path
+        self.tmpdir.cleanup()
+
+    def test_module_flags_ring_across_analyses(self):
+        for day, product in enumerate(["https://shop.test/a", "https://shop.test/b"], start=1):
+            app.run_modules(product, ring_reviews(day))
+        app.save_analyzer_state(force=True)
+
+        # A fresh process loads the saved graph
+        app._analyzers.pop("network_graph")
+        product = "https://shop.test/c"
+        reviews = ring_reviews(3)
+        module_runs = app.run_modules(product, reviews)
+        run = module_runs["Network Graph Detection"]
+        self.assertEqual(run["state"], "complete")
+        self.assertTrue(all(result["is_fake"] for result in run["results"]))
+
+        flagged_by = app.apply_module_verdicts(reviews, module_runs)
+        self.assertTrue(all("Network Graph Detection" in names for names in flagged_by))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests of the module orchestrator's budgets, deadlines and module ordering.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from orchestrator import Deadline, ModuleOrchestrator, score_in_chunks
+
+def slow_scores(delay):
+    """Score function taking delay seconds per chunk"""
+    def score(texts):
+        time.sleep(delay)
+        return [len(text) for text in texts]
+    return score
+
+class ScoreInChunksTest(unittest.TestCase):
+
+    def test_scores_everything_without_a_budget(self):
+        texts = ["a" * n for n in range(10)]
+        self.assertEqual(score_in_chunks(slow_scores(0), [texts], Deadline(), chunk_size=3), list(range(10)))
+
+    def test_stops_between_chunks_at_the_deadline(self):
+        results = score_in_chunks(slow_scores(0.05), [["x"] * 100], Deadline(0.12), chunk_size=10)
+        self.assertGreater(len(results), 0)
+        self.assertLess(len(results), 100)
+        self.assertEqual(len(results) % 10, 0)
+
+    def test_expired_deadline_scores_nothing(self):
+        self.assertEqual(score_in_chunks(slow_scores(0), [["x"]], Deadline(0)), [])
+
+class ModuleOrchestratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.orchestrator = ModuleOrchestrator(max_workers=4, default_budget=5, grace=0.05)
+
+    def tearDown(self):
+        self.orchestrator.shutdown(wait=False)
+
+    def test_states(self):
+        texts = ["x"] * 50
+
+        def complete(deadline):
+            return score_in_chunks(slow_scores(0), [texts], deadline)
+
+        def partial(deadline):
+            return score_in_chunks(slow_scores(0.05), [texts], deadline, chunk_size=5)
+
+        def failed(deadline):
+            raise RuntimeError("model missing")
+
+        states = []
+        runs = self.orchestrator.run({"complete": complete, "partial": partial, "failed": failed},
+                                     len(texts), budgets={"partial": 0.15},
+                                     progress=lambda name, state: states.append((name, state)))
+
+        self.assertEqual(runs["complete"]["state"], "complete")
+        self.assertEqual(runs["complete"]["scored"], 50)
+        self.assertEqual(runs["partial"]["state"], "partial")
+        self.assertLess(runs["partial"]["scored"], 50)
+        self.assertEqual(runs["failed"]["state"], "failed")
+        self.assertEqual(runs["failed"]["error"], "model missing")
+        for name in runs:
+            self.assertIn((name, "running"), states)
+            self.assertIn((name, runs[name]["state"]), states)
+
+    def test_module_ignoring_its_deadline_is_abandoned(self):
+        release = threading.Event()
+
+        def stuck(deadline):
+            release.wait(5)
+            return ["late"]
+
+        start = time.monotonic()
+        runs = self.orchestrator.run({"stuck": stuck}, 1, budgets={"stuck": 0.1})
+        elapsed = time.monotonic() - start
+        release.set()
+
+        self.assertEqual(runs["stuck"]["state"], "partial")
+        self.assertEqual(runs["stuck"]["error"], "Timed out")
+        self.assertLess(elapsed, 2)
+
+    def test_module_runs_after_its_prerequisites(self):
+        def first(deadline):
+            time.sleep(0.05)
+            return [1, 2]
+
+        def broken(deadline):
+            raise ValueError("no model")
+
+        def combined(deadline, first_results, broken_results):
+            return [(value, broken_results) for value in first_results]
+
+        runs = self.orchestrator.run({"first": first, "broken": broken, "combined": combined}, 2,
+                                     after={"combined": ["first", "broken"]})
+        self.assertEqual(runs["combined"]["state"], "complete")
+        # A failed prerequisite is passed as None
+        self.assertEqual(runs["combined"]["results"], [(1, None), (2, None)])
+        self.assertGreaterEqual(runs["combined"]["queue_time"], 0.04)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests of the reviewer behavior aggregates and their persistence by the app.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's stores out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="deceptiscan-test-")
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(DATA_DIR, "analyses.sqlite3"))
+os.environ.setdefault("SCRAPE_CACHE_PATH", os.path.join(DATA_DIR, "pages.sqlite3"))
+os.environ.setdefault("CROSS_PLATFORM_INDEX_PATH", os.path.join(DATA_DIR, "cross_platform_index"))
+os.environ.setdefault("REVIEWER_BEHAVIOR_PATH", os.path.join(DATA_DIR, "reviewer_behavior.npz"))
+os.environ.setdefault("NETWORK_GRAPH_PATH", os.path.join(DATA_DIR, "network_graph.npz"))
+
+import app
+from models.reviewer_behavior import ReviewerAnalyzer
+
+# A veteran reviewing now and then, and an account posting a burst on its first day
+HISTORY = [
+    {"author": "veteran", "rating": 4, "date": "2023-01-01", "verified": True},
+    {"author": "veteran", "rating": 3, "date": "2023-06-01", "verified": True},
+    {"author": "burst", "rating": 5, "date": "2024-01-01"},
+    {"author": "burst", "rating": 5, "date": "2024-01-01"},
+    {"author": "burst", "rating": 1, "date": "2024-01-01"},
+    {"author": "veteran", "rating": 4, "date": "2024-01-01", "verified": True},
+]
+
+class ReviewerAggregatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmpdir.name, "reviewer_behavior.npz")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_features(self):
+        analyzer = ReviewerAnalyzer(self.model_path)
+        analyzer.update_many(HISTORY)
+
+        veteran = analyzer.author_features("veteran")
+        self.assertEqual(veteran["review_count"], 3)
+        self.assertEqual(veteran["verified_ratio"], 1.0)
+        self.assertAlmostEqual(veteran["account_age_days"], 365)
+
+        burst = analyzer.author_features("burst")
+        self.assertEqual(burst["account_age_days"], 0)
+        self.assertAlmostEqual(burst["reviews_per_window"]["1d"], 3, places=5)
+        self.assertEqual(burst["extreme_ratio"], 1.0)
+        self.assertTrue(analyzer.analyze_review("burst")["is_fake"])
+        self.assertFalse(analyzer.analyze_review("veteran")["is_fake"])
+
+    def test_saved_aggregates_reload(self):
+        analyzer = ReviewerAnalyzer(self.model_path)
+        analyzer.update_many(HISTORY)
+        analyzer.save_model()
+
+        reloaded = ReviewerAnalyzer(self.model_path)
+        self.assertEqual(len(reloaded), 2)
+        for author in ("veteran", "burst"):
+            self.assertEqual(reloaded.author_features(author), analyzer.author_features(author))
+
+        # Later reviews decay the reloaded rates and age the accounts
+        features = reloaded.author_features("burst", now="2024-01-08")
+        self.assertEqual(features["account_age_days"], 7)
+        self.assertAlmostEqual(features["reviews_per_window"]["7d"], 1.5, places=5)
+
+class ReviewerStateTest(unittest.TestCase):
+
+    def setUp(self):
+        # Aggregates of their own, free of other tests' reviews
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.saved_path = app.ANALYZER_STATE_PATHS["reviewer_behavior"]
+        app.ANALYZER_STATE_PATHS["reviewer_behavior"] = os.path.join(self.tmpdir.name, "reviewer_behavior.npz")
+        app._analyzers.pop("reviewer_behavior", None)
+
+    def tearDown(self):
+        app._analyzers.pop("reviewer_behavior", None)
+        app.ANALYZER_STATE_PATHS["reviewer_behavior"] = self.saved_path
+        self.tmpdir.cleanup()
+
+    def test_analyses_persist_aggregates(self):
+        product = "https://shop.test/reviewer"
+        reviews = [dict(review, text="Fine.") for review in HISTORY]
+        app.run_modules(product, reviews[:3])
+        app.save_analyzer_state(force=True)
+
+        # A fresh process continues from the saved aggregates
+        app._analyzers.pop("reviewer_behavior")
+        results = app.run_modules(product, reviews[3:])["Reviewer Behavior Analysis"]["results"]
+        veteran = results[-1]["features"]
+        self.assertEqual(veteran["review_count"], 3)
+        self.assertAlmostEqual(veteran["account_age_days"], 365)
+        self.assertEqual(results[0]["features"]["review_count"], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Scraper tests against the local stub review server.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import scraper
+from scraper import ReviewScraper, PageCache, ScrapeError
+from stub_review_server import StubReviewServer
+
+def page_outcomes():
+    """Current value of the scraper's page counter, by outcome"""
+    return {labels[0][1]: value for _, labels, value in scraper.PAGES.samples()}
+
+class StubServerTestCase(unittest.TestCase):
+    """Starts a stub review server per test"""
+
+    server_options = {}
+
+    def setUp(self):
+        options = dict(pages=12, page_size=5)
+        options.update(self.server_options)
+        self.server = StubReviewServer(("127.0.0.1", 0), **options)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.product_url = f"http://127.0.0.1:{self.server.server_port}/product/1"
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.scrapers = []
+
+    def tearDown(self):
+        for review_scraper in self.scrapers:
+            review_scraper.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def make_scraper(self, **options):
+        options = dict(dict(rate=0, backoff=0.01, timeout=5), **options)
+        options.setdefault("cache", PageCache(os.path.join(self.tmpdir.name, "pages.sqlite3")))
+        review_scraper = ReviewScraper(**options)
+        self.scrapers.append(review_scraper)
+        return review_scraper
+
+    def scrape(self, review_scraper, timeout=20):
+        """Run iter_reviews on a thread and fail instead of hanging"""
+        outcome = {}
+
+        def run():
+            try:
+                outcome["reviews"] = list(review_scraper.iter_reviews(self.product_url))
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        self.assertFalse(thread.is_alive(), f"scrape still running after {timeout}s")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["reviews"]
+
+class ScrapeTest(StubServerTestCase):
+
+    def test_scrapes_every_page(self):
+        reviews = self.scrape(self.make_scraper())
+        self.assertEqual(len(reviews), 12 * 5)
+        self.assertEqual(len({review["id"] for review in reviews}), 12 * 5)
+        self.assertTrue(all(isinstance(review["rating"], int) for review in reviews))
+
+    def test_rescan_is_answered_with_not_modified(self):
+        review_scraper = self.make_scraper()
+        first = self.scrape(review_scraper)
+        before = page_outcomes()
+        second = self.scrape(review_scraper)
+        after = page_outcomes()
+
+        self.assertEqual(sorted(r["id"] for r in first), sorted(r["id"] for r in second))
+        self.assertEqual(after.get("not_modified", 0) - before.get("not_modified", 0), 12)
+        self.assertEqual(after.get("fetched", 0) - before.get("fetched", 0), 0)
+
+class RetryTest(StubServerTestCase):
+
+    server_options = {"fail_rate": 0.3}
+
+    def test_unavailable_pages_are_retried(self):
+        before = page_outcomes()
+        reviews = self.scrape(self.make_scraper(retries=20))
+        after = page_outcomes()
+
+        self.assertEqual(len(reviews), 12 * 5)
+        self.assertGreater(after.get("retried", 0) - before.get("retried", 0), 0)
+
+    def test_gives_up_on_the_first_page_after_its_retries(self):
+        self.server.fail_rate = 1.0
+        with self.assertRaises(ScrapeError):
+            self.scrape(self.make_scraper(retries=2))
+
+class MalformedPageTest(StubServerTestCase):
+
+    server_options = {"malformed_pages": {3, 7}}
+
+    def test_malformed_pages_are_skipped(self):
+        start = time.monotonic()
+        before = page_outcomes()
+        reviews = self.scrape(self.make_scraper())
+        after = page_outcomes()
+        self.assertEqual(len(reviews), (12 - 2) * 5)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(after.get("malformed", 0) - before.get("malformed", 0), 2)
+
+    def test_malformed_first_page_fails_the_scrape(self):
+        self.server.malformed_pages = {1}
+        with self.assertRaises(Exception):
+            self.scrape(self.make_scraper())
+
+if __name__ == "__main__":
+    unittest.main()
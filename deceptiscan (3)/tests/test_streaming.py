@@ -0,0 +1,80 @@
+"""
+Tests of /analyze/stream, scraping the stub review server.
+
+Run with:
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# Keep the app's stores out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="deceptiscan-test-")
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(DATA_DIR, "analyses.sqlite3"))
+os.environ.setdefault("SCRAPE_CACHE_PATH", os.path.join(DATA_DIR, "pages.sqlite3"))
+os.environ.setdefault("CROSS_PLATFORM_INDEX_PATH", os.path.join(DATA_DIR, "cross_platform_index"))
+os.environ.setdefault("REVIEWER_BEHAVIOR_PATH", os.path.join(DATA_DIR, "reviewer_behavior.npz"))
+os.environ.setdefault("NETWORK_GRAPH_PATH", os.path.join(DATA_DIR, "network_graph.npz"))
+
+import app
+from test_scraper import StubServerTestCase
+
+class StreamScrapedReviewsTest(StubServerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.saved = app.REVIEW_PAGE_URL, app.STREAM_BATCH_SIZE, app._scraper
+        app.REVIEW_PAGE_URL = "{product_url}/reviews?page={page}"
+        app.STREAM_BATCH_SIZE = 25
+        app._scraper = None
+
+    def tearDown(self):
+        if app._scraper is not None:
+            app._scraper.close()
+        app.REVIEW_PAGE_URL, app.STREAM_BATCH_SIZE, app._scraper = self.saved
+        super().tearDown()
+
+    def stream(self):
+        response = app.app.test_client().get("/analyze/stream", query_string={"url": self.product_url})
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_reviews_carry_module_verdicts(self):
+        records = self.stream()
+        reviews = [record for record in records if record["type"] == "review"]
+        self.assertEqual(len(reviews), 12 * 5)
+
+        for review in reviews:
+            self.assertEqual(set(review["module_scores"]), set(app.MODULE_NAMES))
+            self.assertEqual(review["is_fake"], len(review["flagged_by"]) >= app.FAKE_MIN_FLAGS)
+            if review["is_fake"]:
+                self.assertEqual(review["fake_score"], max(review["module_scores"].values()))
+
+        summary = records[-1]
+        self.assertEqual(summary["type"], "summary")
+        self.assertEqual(summary["total_reviews"], len(reviews))
+        self.assertEqual(summary["fake_reviews"], sum(review["is_fake"] for review in reviews))
+
+    def test_module_totals_follow_each_batch(self):
+        records = self.stream()
+        modules = [record for record in records if record["type"] == "module"]
+        # One record per module after each of the three batches
+        self.assertEqual(len(modules), 3 * len(app.MODULE_NAMES))
+        self.assertEqual([record["scored"] for record in modules if record["name"] == app.MODULE_NAMES[0]],
+                         [25, 50, 60])
+
+        reviews = [record for record in records if record["type"] == "review"]
+        for record in modules[-len(app.MODULE_NAMES):]:
+            name = record["name"]
+            self.assertEqual(record["state"], "complete")
+            self.assertEqual(record["flagged"], sum(name in review["flagged_by"] for review in reviews))
+            scores = [review["module_scores"][name] for review in reviews]
+            self.assertAlmostEqual(record["score"], 100 * sum(scores) / len(scores), delta=0.51)
+
+if __name__ == "__main__":
+    unittest.main()
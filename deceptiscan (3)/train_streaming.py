@@ -0,0 +1,68 @@
+"""
+Out-of-core training of an analyzer on a labelled review archive.
+
+Streams (text, label) pairs from a JSONL or CSV file in minibatches, trains
+the analyzer's hashed-feature SGD model with partial_fit, and calibrates its
+probabilities on held-out minibatches. Memory stays bounded by the minibatch
+size, so archives with tens of millions of reviews can be used on a CPU-only
+machine. The held-out report is printed as JSON.
+
+With --language the model is trained for that language's reviews and saved
+next to the English one, e.g. models/stylometry_model.es.artifact, where the
+language router (see models/language.py) looks for it.
+
+Usage:
+    python train_streaming.py labelled.jsonl --analyzer stylometry [--language es] [--batch-size N] [--epochs N]
+"""
+import argparse
+import json
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ANALYZERS = {
+    "stylometry": ("models.stylometry", "StyleAnalyzer", "stylometry_model.artifact"),
+    "sentiment": ("models.sentiment", "SentimentAnalyzer", "sentiment_model.artifact"),
+    "gan": ("models.gan_detector", "GANDetector", "gan_detector_model.artifact"),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Train an analyzer out of core on labelled reviews")
+    parser.add_argument("input", help="Labelled reviews as JSONL or CSV")
+    parser.add_argument("--analyzer", choices=sorted(ANALYZERS), default="stylometry")
+    parser.add_argument("--model-path", help="Where to save the model, defaults to the analyzer's artifact")
+    parser.add_argument("--language", default="en", help="Language of the training reviews")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Input format, detected from the file extension by default")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Reviews per minibatch")
+    parser.add_argument("--epochs", type=int, default=1, help="Passes over the training data")
+    parser.add_argument("--holdout-every", type=int, default=20,
+                        help="Keep every n-th minibatch out of training for calibration")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--label-field", default="label")
+    args = parser.parse_args()
+
+    if args.format is None:
+        args.format = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+
+    sys.path.insert(0, APP_DIR)
+    import importlib
+    from models.incremental import minibatches, read_labelled_reviews
+    from models.language import language_model_path
+
+    module_name, class_name, artifact = ANALYZERS[args.analyzer]
+    analyzer_class = getattr(importlib.import_module(module_name), class_name)
+    model_path = args.model_path or language_model_path(os.path.join(APP_DIR, "models", artifact), args.language)
+    analyzer = analyzer_class(model_path, language=args.language)
+
+    def make_batches():
+        reviews = read_labelled_reviews(args.input, args.format, args.text_field, args.label_field)
+        return minibatches(reviews, args.batch_size)
+
+    report = analyzer.train_streaming(make_batches, epochs=args.epochs, holdout_every=args.holdout_every)
+    print(json.dumps(dict(report, model_path=analyzer.model_path), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())